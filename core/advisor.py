@@ -0,0 +1,223 @@
+"""Tower placement advisor.
+
+Forks the live game state for every candidate (tile, tower type), simulates
+the coming wave headlessly in a process pool and ranks candidates by base
+HP saved per gold.
+
+State is cloned cheaply: a snapshot is just the map, rules, tower list,
+coins, base HP and wave number (there are no monsters during preparation), and each
+worker rebuilds a fresh Simulation from it. All candidates use the same
+seed so they face the same spawn pattern.
+
+The game keeps one Advisor (and its pool of workers) for its whole life and
+polls it every frame, so ranking never blocks the game loop.
+"""
+import multiprocessing
+import time
+from .config import *
+from .simulation import Simulation, init_headless
+
+ADVISOR_TOWER_TYPES = ['cannon', 'water', 'fire']
+ADVISOR_DT = 0.05         # Simulation step (seconds of game time)
+ADVISOR_MAX_WAVE_TIME = 240.0
+FIRE_UNLOCK_WAVE = 10
+ADVISOR_TIME_BUDGET = 2.0  # Seconds the candidates get once the baseline is known
+ADVISOR_CHECK_STEPS = 20   # Steps between checks that a job is still wanted
+
+# Shared with every worker by _init_worker: the request the game still wants
+# results for. Jobs of an older request give up, so a new request or a
+# cancelled one doesn't wait behind stale work.
+_wanted_request = None
+
+
+def _init_worker(wanted_request):
+    global _wanted_request
+    _wanted_request = wanted_request
+    init_headless()
+
+
+def _stale(request):
+    return request is not None and _wanted_request is not None and _wanted_request.value != request
+
+
+def snapshot(sim):
+    """Capture the state needed to replay the next wave from preparation."""
+    towers = [(t.tower_type, (t.pos[0] // TILE_SIZE, t.pos[1] // TILE_SIZE))
+              for t in sim.tower_manager.towers]
+    return {
+        'towers': towers,
+        'coins': sim.economy.coins,
+        'base_hp': sim.base.hp,
+        'wave_number': sim.wave_manager.wave_number,
+        'map_path': sim.path.map_path,
+        'endless': sim.endless,
+        'difficulty': sim.monster_manager.difficulty,
+    }
+
+
+def restore(state, seed=0):
+    """Build a headless Simulation from a snapshot."""
+    sim = Simulation(seed=seed, particles=False, difficulty=state['difficulty'], endless=state['endless'],
+                     map_path=state['map_path'])
+    sim.economy.coins = 10**9  # Existing towers are already paid for
+    for tower_type, (x, y) in state['towers']:
+        sim.place_tower(tower_type, x, y)
+    sim.economy.coins = state['coins']
+    sim.base.hp = state['base_hp']
+    sim.wave_manager.wave_number = state['wave_number']
+    return sim
+
+
+def simulate_wave(state, candidate=None, seed=0, hp_loss_cutoff=None, request=None):
+    """Play the next wave with an optional extra tower. Returns base HP lost.
+
+    Returns None if the run was cut off because it already lost more than
+    hp_loss_cutoff (it can no longer beat the reference), or because the
+    request it belongs to is no longer wanted.
+    """
+    if _stale(request):
+        return None
+    sim = restore(state, seed)
+    if candidate is not None:
+        tower_type, (x, y) = candidate
+        if not sim.place_tower(tower_type, x, y):
+            return None
+    start_hp = sim.base.hp
+    sim.start_wave()
+    elapsed = 0.0
+    steps = 0
+    while sim.wave_manager.wave_in_progress and sim.state == 'playing' and elapsed < ADVISOR_MAX_WAVE_TIME:
+        sim.update(ADVISOR_DT)
+        elapsed += ADVISOR_DT
+        steps += 1
+        if hp_loss_cutoff is not None and start_hp - sim.base.hp > hp_loss_cutoff:
+            return None
+        if steps % ADVISOR_CHECK_STEPS == 0 and _stale(request):
+            return None
+    return start_hp - sim.base.hp
+
+
+def candidate_placements(sim):
+    """All affordable (tower_type, tile) pairs on free build slots.
+
+    Tower types are interleaved tile by tile, so if the time budget runs out
+    part way through, every type has still been tried somewhere.
+    """
+    tower_types = [tower_type for tower_type in ADVISOR_TOWER_TYPES
+                   if sim.economy.coins >= TOWER_COSTS[tower_type]
+                   and not (tower_type == 'fire' and sim.wave_manager.wave_number < FIRE_UNLOCK_WAVE)]
+    candidates = []
+    for x, y in sorted(sim.path.buildable_tiles):
+        if sim.path.is_buildable_tile(x, y):
+            candidates.extend((tower_type, (x, y)) for tower_type in tower_types)
+    return candidates
+
+
+class Advisor:
+    """Ranks placements in the background while the game keeps running.
+
+    The pool is started on the first request and kept until close(), since
+    starting spawned workers costs more than a ranking. start() returns at
+    once; poll() returns the ranking the first time it is called after the
+    ranking is done, and None otherwise.
+    """
+    def __init__(self, workers=None, time_budget=ADVISOR_TIME_BUDGET, top_n=5, seed=0):
+        self.workers = workers or multiprocessing.cpu_count()
+        self.time_budget = time_budget
+        self.top_n = top_n
+        self.seed = seed
+        self.pool = None
+        self.wanted_request = None
+        self.request = 0
+        self.busy = False
+        self.baseline_loss = None  # Base HP lost by building nothing, once known
+
+    def start(self, sim):
+        """Rank placements for the coming wave of sim (replaces any running request)."""
+        if self.pool is None:
+            context = multiprocessing.get_context('spawn')
+            self.wanted_request = context.RawValue('i', 0)
+            # Spawned (not forked) workers, so they never share the game's display
+            self.pool = context.Pool(self.workers, initializer=_init_worker, initargs=(self.wanted_request,))
+        self.cancel()
+        self.busy = True
+        self.state = snapshot(sim)
+        self.candidates = candidate_placements(sim)
+        self.baseline_loss = None
+        self.jobs = None
+        self.baseline = self.pool.apply_async(simulate_wave, (self.state, None, self.seed, None, self.request))
+
+    def cancel(self):
+        """Drop the running request; its jobs give up in the workers."""
+        self.request += 1
+        if self.wanted_request is not None:
+            self.wanted_request.value = self.request
+        self.busy = False
+
+    def poll(self):
+        """The finished ranking (a list of dicts, best first), or None.
+
+        Each dict has tower_type, tile, cost, hp_lost, hp_saved and
+        hp_saved_per_gold. The list is empty when nothing leaks this wave
+        (baseline_loss is 0) or no placement helps. Candidates that lose more
+        HP than building nothing are cut off early, and whatever hasn't
+        finished when the time budget runs out is left out.
+        """
+        if not self.busy:
+            return None
+        if self.jobs is None:
+            # Waiting for the baseline: how much leaks if nothing is built
+            if not self.baseline.ready():
+                return None
+            self.baseline_loss = self.baseline.get()
+            if self.baseline_loss == 0 or not self.candidates:
+                self.busy = False
+                return []
+            self.deadline = time.perf_counter() + self.time_budget
+            self.jobs = [(c, self.pool.apply_async(simulate_wave, (self.state, c, self.seed, self.baseline_loss,
+                                                                   self.request)))
+                         for c in self.candidates]
+            return None
+        if time.perf_counter() < self.deadline and not all(job.ready() for _, job in self.jobs):
+            return None
+        results = []
+        for (tower_type, tile), job in self.jobs:
+            if not job.ready():
+                continue  # Out of time
+            hp_lost = job.get()
+            if hp_lost is None:
+                continue  # Hopeless: worse than building nothing
+            cost = TOWER_COSTS[tower_type]
+            hp_saved = self.baseline_loss - hp_lost
+            results.append({
+                'tower_type': tower_type,
+                'tile': tile,
+                'cost': cost,
+                'hp_lost': hp_lost,
+                'hp_saved': hp_saved,
+                'hp_saved_per_gold': hp_saved / cost,
+            })
+        self.cancel()  # Whatever is still running is no longer wanted
+        results.sort(key=lambda r: (-r['hp_saved_per_gold'], r['cost']))
+        return results[:self.top_n]
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+
+
+def suggest_placements(sim, top_n=5, time_budget=ADVISOR_TIME_BUDGET, workers=None, seed=0):
+    """Rank candidate placements for the coming wave, blocking until done
+    (for scripts; the game uses an Advisor). See Advisor.poll()."""
+    advisor = Advisor(workers, time_budget, top_n, seed)
+    try:
+        advisor.start(sim)
+        while True:
+            results = advisor.poll()
+            if results is not None:
+                return results
+            time.sleep(0.01)
+    finally:
+        advisor.close()
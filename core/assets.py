@@ -0,0 +1,103 @@
+"""Images, loaded and scaled once.
+
+load_image() returns the converted surface for a file at a given size and
+rotation. Within a process each variant is built once and shared: the HUD
+is rebuilt on every restart and several classes load the same files, so
+most calls are a dictionary lookup. The surfaces are shared, so copy one
+before drawing on it.
+
+Across launches, finished variants are kept in ASSET_CACHE_DIR as raw RGBA
+pixels under the hash of the source file, the size and the rotation. A
+cached variant is read straight into a surface with no PNG decoding or
+smoothscale; a changed source image simply hashes to a new file. The cache
+fills itself as the game runs, and `python -m core.assets` builds it for
+every image the game uses in one go (run it after changing the art).
+"""
+import hashlib
+import os
+import struct
+import pygame
+from .config import *
+
+ASSET_FORMAT_VERSION = 1  # Bump when the cache file layout changes
+HEADER = struct.Struct('<II')  # Width, height; RGBA rows follow
+
+# Finished surfaces by (path, size, angle)
+_images = {}
+# Source file hashes by path, so each file is read once
+_source_hashes = {}
+
+
+def _cache_path(path, size, angle):
+    digest = _source_hashes.get(path)
+    if digest is None:
+        with open(path, 'rb') as f:
+            digest = _source_hashes[path] = hashlib.sha1(f.read()).hexdigest()
+    key = hashlib.sha1(f'{digest} {size} {angle} {ASSET_FORMAT_VERSION}'.encode()).hexdigest()
+    return os.path.join(ASSET_CACHE_DIR, key + '.rgba')
+
+
+def _read_cached(cache_path):
+    with open(cache_path, 'rb') as f:
+        data = f.read()
+    width, height = HEADER.unpack_from(data)
+    return pygame.image.frombytes(data[HEADER.size:], (width, height), 'RGBA').convert_alpha()
+
+
+def _write_cached(cache_path, image):
+    try:
+        os.makedirs(ASSET_CACHE_DIR, exist_ok=True)
+        # Write then rename, so a half-written file is never picked up
+        tmp_path = f'{cache_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(HEADER.pack(*image.get_size()))
+            f.write(pygame.image.tobytes(image, 'RGBA'))
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"Failed to write asset cache: {e}")
+
+
+def load_image(path, size=None, angle=0):
+    """The image at path, rotated by angle degrees and then smoothscaled to size."""
+    key = (path, size, angle)
+    image = _images.get(key)
+    if image is not None:
+        return image
+    cache_path = _cache_path(path, size, angle)
+    try:
+        image = _read_cached(cache_path)
+    except (OSError, ValueError, struct.error, pygame.error):
+        image = pygame.image.load(path).convert_alpha()
+        if angle:
+            image = pygame.transform.rotate(image, angle)
+        if size is not None:
+            image = pygame.transform.smoothscale(image, size)
+        _write_cached(cache_path, image)
+    _images[key] = image
+    return image
+
+
+def main():
+    """Build step: put every image the game loads into the cache."""
+    from .simulation import init_headless
+    from .game import Game
+    from .frame_pacer import FramePacer
+    from entities.monster import Monster
+    from entities.sprite_utils import get_monster_sprites
+    from main import CURSOR_SIZE
+    init_headless()
+    pygame.font.init()
+    # A game draws its first frame with the HUD, map, towers and base...
+    game = Game(pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)), FramePacer('uncapped', TARGET_FPS))
+    game.draw()
+    # ...and every monster model at the sizes it is drawn at, bosses included
+    sim = game.sim
+    for monster_type in ['gnome', 'fast_spider', 'big_spider', 'boss_gnome', 'boss_fast_spider', 'boss_big_spider']:
+        monster = Monster(monster_type, sim.path, sim.base, sim.economy)
+        get_monster_sprites(monster.sprite_type, monster.size, monster.is_boss)
+    game.close()
+    load_image(os.path.join('assets', 'UI', 'cursor_image.png'), CURSOR_SIZE)
+    print(f"{len(os.listdir(ASSET_CACHE_DIR))} images cached in {ASSET_CACHE_DIR}")
+
+if __name__ == '__main__':
+    main()
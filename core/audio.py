@@ -0,0 +1,54 @@
+"""Sound effects with the mixer opened on demand.
+
+Opening the audio device is one of the slow parts of starting up, so the
+game leaves the mixer closed until its first frame is on screen (main.py
+calls init() then) or until something wants to make a noise, whichever
+comes first. Sounds are loaded the first time they are played and kept.
+"""
+import os
+import pygame
+
+SOUND_DIR = os.path.join('assets', 'sounds')
+
+# Loaded sounds by path parts (None for ones that failed to load)
+_sounds = {}
+_failed = False
+
+
+def init():
+    """Open the mixer if it isn't open yet. Returns False when there is no audio."""
+    global _failed
+    if pygame.mixer.get_init():
+        return True
+    if _failed:
+        return False
+    try:
+        pygame.mixer.init()
+    except pygame.error as e:
+        print(f"Failed to init mixer, playing without sound: {e}")
+        _failed = True
+        return False
+    return True
+
+
+def load_sound(*parts):
+    """The sound at assets/sounds/<parts>, or None if it can't be played."""
+    if parts in _sounds:
+        return _sounds[parts]
+    sound = None
+    if init():
+        path = os.path.join(SOUND_DIR, *parts)
+        try:
+            sound = pygame.mixer.Sound(path)
+        except Exception as e:
+            print(f"Failed to load sound {path}: {e}")
+    _sounds[parts] = sound
+    return sound
+
+
+def play_sound(*parts):
+    """Play the sound at assets/sounds/<parts> if there is one. Returns it."""
+    sound = load_sound(*parts)
+    if sound is not None:
+        sound.play()
+    return sound
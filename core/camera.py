@@ -0,0 +1,60 @@
+import math
+import pygame
+from .config import *
+
+
+class Camera:
+    """The part of the map shown on the game surface.
+
+    (x, y) is the world-pixel position of the view's top-left corner and
+    zoom is how many screen pixels one world pixel covers. The view is kept
+    inside the map, and only zoom levels at which the view still fits in the
+    map are offered, so a map the size of the screen stays fixed at 1x.
+    """
+    def __init__(self, world_width, world_height, view_width=SCREEN_WIDTH, view_height=SCREEN_HEIGHT):
+        self.world_width = world_width
+        self.world_height = world_height
+        self.view_width = view_width
+        self.view_height = view_height
+        self.zoom_levels = [z for z in ZOOM_LEVELS
+                            if view_width / z <= world_width and view_height / z <= world_height]
+        if not self.zoom_levels:
+            # Map smaller than the screen: zoom in just enough to fill it
+            self.zoom_levels = [max(view_width / world_width, view_height / world_height)]
+        self.zoom = min(self.zoom_levels, key=lambda z: abs(z - 1.0))
+        self.x = 0.0
+        self.y = 0.0
+
+    def view_rect(self):
+        """World-space rect currently on screen."""
+        return pygame.Rect(int(self.x), int(self.y),
+                           math.ceil(self.view_width / self.zoom),
+                           math.ceil(self.view_height / self.zoom))
+
+    def clamp(self):
+        self.x = max(0.0, min(self.x, self.world_width - self.view_width / self.zoom))
+        self.y = max(0.0, min(self.y, self.world_height - self.view_height / self.zoom))
+
+    def pan(self, dx, dy):
+        """Move the view by (dx, dy) screen pixels."""
+        self.x += dx / self.zoom
+        self.y += dy / self.zoom
+        self.clamp()
+
+    def zoom_at(self, steps, screen_pos):
+        """Step through the zoom levels, keeping the world point under screen_pos still."""
+        index = self.zoom_levels.index(self.zoom)
+        index = max(0, min(len(self.zoom_levels) - 1, index + steps))
+        world_x, world_y = self.x + screen_pos[0] / self.zoom, self.y + screen_pos[1] / self.zoom
+        self.zoom = self.zoom_levels[index]
+        self.x = world_x - screen_pos[0] / self.zoom
+        self.y = world_y - screen_pos[1] / self.zoom
+        self.clamp()
+
+    def to_world(self, screen_pos):
+        return (int(self.x) + int(screen_pos[0] / self.zoom),
+                int(self.y) + int(screen_pos[1] / self.zoom))
+
+    def to_screen(self, world_pos):
+        return (int((world_pos[0] - int(self.x)) * self.zoom),
+                int((world_pos[1] - int(self.y)) * self.zoom))
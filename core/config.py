@@ -6,6 +6,15 @@ GRID_WIDTH = 20
 GRID_HEIGHT = 15
 SCREEN_WIDTH = GRID_WIDTH * TILE_SIZE  # 640
 SCREEN_HEIGHT = GRID_HEIGHT * TILE_SIZE  # 480
+MAP_PATH = 'maps/default.json'
+MAP_CACHE_DIR = 'map_cache'  # Compiled maps, keyed by the map file's hash
+ASSET_CACHE_DIR = 'asset_cache'  # Scaled images as raw pixels, keyed by source hash and size
+
+# Camera and terrain (maps can be larger than the screen)
+CHUNK_TILES = 8           # Terrain is pre-rendered in CHUNK_TILES x CHUNK_TILES blocks
+TERRAIN_CHUNK_CACHE = 64  # Chunks kept before the least recently used is dropped
+ZOOM_LEVELS = [0.5, 0.75, 1.0, 1.25, 1.5, 2.0]
+CAMERA_PAN_SPEED = 480    # Screen pixels per second with the arrow keys
 
 # Game Balance
 STARTING_GOLD = 160  # Slightly higher so player can build a second tower after wave 1
@@ -141,6 +150,57 @@ WAVE_CONFIGS = {
     }
 }
 
+# Difficulty multipliers per wave stage (same stages as WAVE_CONFIGS), applied
+# on top of the monster health, monster counts and spawn delays above.
+# `python -m core.tuner` searches these and writes proposals to tuning/.
+DIFFICULTY = {
+    'early': {'health': 1.0, 'count': 1.0, 'delay': 1.0},
+    'mid': {'health': 1.0, 'count': 1.0, 'delay': 1.0},
+    'late': {'health': 1.0, 'count': 1.0, 'delay': 1.0},
+}
+
+# Endless mode: procedural waves after the boss wave
+ENDLESS_MODE = False
+ENDLESS_BASE_COUNTS = {'gnome': 40, 'fast_spider': 15, 'big_spider': 10}  # First endless wave
+ENDLESS_GROWTH = 1.3         # Monster count multiplier per endless wave
+ENDLESS_WAVE_DURATION = 40.0  # Seconds to spawn a whole endless wave
+SCALING_LOG_PATH = 'scaling_log.csv'  # Frame/tick time vs entity counts in endless mode
+
+# Limits that keep huge waves playable
+MAX_PARTICLES = 400  # New hit particles are dropped beyond this
+MAX_CORPSES = 40     # Oldest fading corpses are removed beyond this
+
+# --sim-process: the simulation runs in a worker process and shares its state
+SIM_PROCESS_RATE = 60            # Simulation ticks per second in the worker
+SIM_PROCESS_MAX_CATCH_UP = 5     # Ticks run back to back before the worker drops time
+SHARED_MAX_MONSTERS = 4096       # Capacity of the shared state (extra entities aren't drawn)
+SHARED_MAX_PROJECTILES = 4096
+SHARED_MAX_TOWERS = 4096
+SHARED_MAX_EVENTS = 1024         # Particle bursts kept for the renderer to pick up
+
+# Rewind history (F9 in game): compact snapshots in a ring buffer
+HISTORY_INTERVAL = 1.0     # Game seconds between snapshots
+HISTORY_SECONDS = 120.0    # How far back snapshots are kept
+HISTORY_BUDGET_MS = 0.5    # Most one tick may spend on a snapshot; one that would cost more is put off
+HISTORY_REWIND_STEP = 5.0  # Seconds rewound per F9 press
+
+# Frame pacing: 'vsync', 'capped' or 'uncapped' (benchmarks)
+FRAME_PACING = 'capped'
+TARGET_FPS = 60
+STARTUP_TARGET_MS = 300  # Launch to first frame on screen, checked by --profile-startup
+
+# Quality tiers, best first. The governor steps down a tier when frames
+# overrun FRAME_BUDGET_MS and back up when there is headroom again.
+FRAME_BUDGET_MS = 1000 / TARGET_FPS
+QUALITY_TIERS = [
+    {'particle_scale': 1.0, 'image_particles': True, 'corpse_duration': 2.0, 'smooth_scaling': True, 'decorations': True},
+    {'particle_scale': 0.5, 'image_particles': True, 'corpse_duration': 2.0, 'smooth_scaling': True, 'decorations': True},
+    {'particle_scale': 0.5, 'image_particles': False, 'corpse_duration': 2.0, 'smooth_scaling': True, 'decorations': True},
+    {'particle_scale': 0.5, 'image_particles': False, 'corpse_duration': 0.75, 'smooth_scaling': True, 'decorations': True},
+    {'particle_scale': 0.5, 'image_particles': False, 'corpse_duration': 0.75, 'smooth_scaling': False, 'decorations': True},
+    {'particle_scale': 0.25, 'image_particles': False, 'corpse_duration': 0.75, 'smooth_scaling': False, 'decorations': False},
+]
+
 # Colors
 COLORS = {
     'background': (90, 170, 255),
@@ -170,3 +230,7 @@ GAME_OVER_TEXT = "Game Over!"
 BUTTON_SIZE = 40  # Size of circular buttons
 BUTTON_MARGIN = 20  # Margin from screen edges
 BUTTON_SPACING = 10  # Space between buttons
+
+# Health bars
+HEALTH_BAR_LEVELS = 32  # Number of pre-rendered fill levels
+HIDE_FULL_HEALTH_BARS = False  # Skip bars for monsters that have not been hit
@@ -4,12 +4,17 @@ class Economy:
     """Tracks coins and handles spending/earning."""
     def __init__(self):
         self.coins = STARTING_GOLD
+        # Running totals (for telemetry)
+        self.earned = 0
+        self.spent = 0
 
     def earn(self, amount):
         self.coins += amount
+        self.earned += amount
 
     def spend(self, amount):
         if self.coins >= amount:
             self.coins -= amount
+            self.spent += amount
             return True
         return False
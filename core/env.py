@@ -0,0 +1,268 @@
+"""Gym-style environment API for placement bots.
+
+TowerDefenseEnv wraps one headless Simulation. VectorEnv runs N of them in
+lockstep, either in this process or spread over a pool of worker processes.
+
+Actions are integers:
+    0                   do nothing
+    1                   start the next wave
+    2 + i * 3 + t       build tower type TOWER_TYPES[t] on env.build_tiles[i]
+
+The build tiles (and so env.num_actions) depend on the map the env plays.
+
+Observations are dicts of NumPy arrays:
+    'tiles'            (map height, map width) int8: 0 grass, 1 path,
+                       2 free build slot, 3 + t tower of type t
+    'monster_density'  (number of path points,) float32: living monsters
+                       heading for each path point
+    'coins', 'base_hp', 'wave'   shape (1,) float32
+
+Needs NumPy, which the game itself doesn't.
+"""
+import multiprocessing
+try:
+    import numpy as np
+except ImportError:
+    np = None
+from .config import *
+from .path import Path
+from .simulation import Simulation, init_headless
+
+TOWER_TYPES = ['cannon', 'water', 'fire']
+
+ACTION_NOOP = 0
+ACTION_START_WAVE = 1
+
+TILE_GRASS = 0
+TILE_PATH = 1
+TILE_FREE = 2
+TILE_TOWER = 3  # + index into TOWER_TYPES
+
+# Fire tower is locked until this wave (same rule as the HUD tower menu)
+FIRE_UNLOCK_WAVE = 10
+
+
+def require_numpy():
+    if np is None:
+        raise ImportError("core.env needs NumPy: pip install numpy")
+
+
+def build_tiles(map_path=MAP_PATH):
+    """Fixed tile order for placement actions on a map."""
+    return sorted(Path(map_path).buildable_tiles)
+
+
+def count_actions(tiles):
+    return 2 + len(tiles) * len(TOWER_TYPES)
+
+
+class TowerDefenseEnv:
+    """One headless game driven by discrete actions.
+
+    Each step applies one action, then advances the simulation by
+    ticks_per_step fixed ticks of dt seconds. The reward is +1 for every
+    wave cleared during the step minus the fraction of base HP lost.
+    """
+    def __init__(self, ticks_per_step=10, dt=0.05, seed=None, map_path=MAP_PATH):
+        require_numpy()
+        init_headless()
+        self.ticks_per_step = ticks_per_step
+        self.dt = dt
+        self.map_path = map_path
+        self.build_tiles = build_tiles(map_path)
+        self.num_actions = count_actions(self.build_tiles)
+        self.sim = None
+        self.reset(seed)
+
+    def placement_action(self, tile, tower_type):
+        """Return the action id that builds tower_type on tile."""
+        return 2 + self.build_tiles.index(tile) * len(TOWER_TYPES) + TOWER_TYPES.index(tower_type)
+
+    def reset(self, seed=None):
+        """Start a new game and return the first observation."""
+        self.sim = Simulation(seed=seed, particles=False, map_path=self.map_path)
+        path = self.sim.path
+        self.tiles = np.zeros((path.height, path.width), dtype=np.int8)
+        for x, y in path.path_tiles:
+            self.tiles[y, x] = TILE_PATH
+        for x, y in self.build_tiles:
+            self.tiles[y, x] = TILE_FREE
+        self._density = np.zeros(len(self.sim.path.points), dtype=np.float32)
+        return self.observe()
+
+    def action_mask(self):
+        """Boolean array of the actions that are legal right now."""
+        sim = self.sim
+        mask = np.zeros(self.num_actions, dtype=bool)
+        mask[ACTION_NOOP] = True
+        mask[ACTION_START_WAVE] = (not sim.wave_manager.wave_in_progress
+                                   and sim.state not in ('gameover', 'completed'))
+        coins = sim.economy.coins
+        affordable = [coins >= TOWER_COSTS[t] for t in TOWER_TYPES]
+        affordable[TOWER_TYPES.index('fire')] &= sim.wave_manager.wave_number >= FIRE_UNLOCK_WAVE
+        if any(affordable):
+            for i, (x, y) in enumerate(self.build_tiles):
+                if sim.path.is_buildable_tile(x, y):
+                    base = 2 + i * len(TOWER_TYPES)
+                    mask[base:base + len(TOWER_TYPES)] = affordable
+        return mask
+
+    def step(self, action):
+        """Apply an action and advance the game. Returns (obs, reward, done, info)."""
+        sim = self.sim
+        if action == ACTION_START_WAVE:
+            sim.start_wave()
+        elif action >= 2:
+            tile_index, type_index = divmod(action - 2, len(TOWER_TYPES))
+            x, y = self.build_tiles[tile_index]
+            tower_type = TOWER_TYPES[type_index]
+            locked = tower_type == 'fire' and sim.wave_manager.wave_number < FIRE_UNLOCK_WAVE
+            if not locked and sim.place_tower(tower_type, x, y):
+                self.tiles[y, x] = TILE_TOWER + type_index
+
+        hp_before = sim.base.hp
+        waves_cleared = 0
+        for _ in range(self.ticks_per_step):
+            in_progress = sim.wave_manager.wave_in_progress
+            sim.update(self.dt)
+            if in_progress and not sim.wave_manager.wave_in_progress:
+                waves_cleared += 1
+            if sim.state != 'playing':
+                break
+        reward = waves_cleared - (hp_before - sim.base.hp) / BASE_HP
+        done = sim.state in ('gameover', 'completed')
+        info = {'wave': sim.wave_manager.wave_number, 'state': sim.state}
+        return self.observe(), reward, done, info
+
+    def observe(self):
+        sim = self.sim
+        density = self._density
+        density.fill(0)
+        last = len(density) - 1
+        for monster in sim.monster_manager.monsters:
+            if monster.is_alive():
+                density[min(monster.path_index, last)] += 1
+        return {
+            'tiles': self.tiles.copy(),
+            'monster_density': density.copy(),
+            'coins': np.array([sim.economy.coins], dtype=np.float32),
+            'base_hp': np.array([sim.base.hp], dtype=np.float32),
+            'wave': np.array([sim.wave_manager.wave_number], dtype=np.float32),
+        }
+
+
+def _stack(observations):
+    return {key: np.stack([obs[key] for obs in observations]) for key in observations[0]}
+
+
+class _EnvBatch:
+    """A list of envs stepped together; finished games are reset automatically."""
+    def __init__(self, seeds, env_kwargs):
+        self.envs = [TowerDefenseEnv(seed=seed, **env_kwargs) for seed in seeds]
+
+    def reset(self, seeds):
+        return [env.reset(seed) for env, seed in zip(self.envs, seeds)]
+
+    def step(self, actions):
+        results = []
+        for env, action in zip(self.envs, actions):
+            obs, reward, done, info = env.step(int(action))
+            if done:
+                info['final_observation'] = obs
+                obs = env.reset()
+            results.append((obs, reward, done, info))
+        return results
+
+    def action_masks(self):
+        return [env.action_mask() for env in self.envs]
+
+
+def _worker(conn, seeds, env_kwargs):
+    batch = _EnvBatch(seeds, env_kwargs)
+    while True:
+        command, data = conn.recv()
+        if command == 'step':
+            conn.send(batch.step(data))
+        elif command == 'reset':
+            conn.send(batch.reset(data))
+        elif command == 'masks':
+            conn.send(batch.action_masks())
+        elif command == 'close':
+            conn.close()
+            return
+
+
+class VectorEnv:
+    """N independent games stepped in lockstep.
+
+    mode='sync' steps every env in this process. mode='process' splits the
+    envs over num_workers processes (one per CPU by default), each stepping
+    its share in lockstep, so throughput scales with cores.
+    """
+    def __init__(self, num_envs, mode='sync', num_workers=None, seed=None, **env_kwargs):
+        require_numpy()
+        self.num_envs = num_envs
+        self.mode = mode
+        self.num_actions = count_actions(build_tiles(env_kwargs.get('map_path', MAP_PATH)))
+        seeds = self._seeds(seed)
+        if mode == 'sync':
+            self._batch = _EnvBatch(seeds, env_kwargs)
+        elif mode == 'process':
+            num_workers = min(num_envs, num_workers or multiprocessing.cpu_count())
+            self._chunks = [list(range(num_envs))[i::num_workers] for i in range(num_workers)]
+            self._conns = []
+            self._procs = []
+            for chunk in self._chunks:
+                parent, child = multiprocessing.Pipe()
+                proc = multiprocessing.Process(
+                    target=_worker, args=(child, [seeds[i] for i in chunk], env_kwargs), daemon=True)
+                proc.start()
+                child.close()
+                self._conns.append(parent)
+                self._procs.append(proc)
+        else:
+            raise ValueError(f"Unknown VectorEnv mode: {mode}")
+
+    def _seeds(self, seed):
+        if seed is None:
+            return [None] * self.num_envs
+        return [seed + i for i in range(self.num_envs)]
+
+    def _scatter(self, command, values):
+        """Send each worker its slice of values and gather results in env order."""
+        for conn, chunk in zip(self._conns, self._chunks):
+            conn.send((command, None if values is None else [values[i] for i in chunk]))
+        results = [None] * self.num_envs
+        for conn, chunk in zip(self._conns, self._chunks):
+            for i, result in zip(chunk, conn.recv()):
+                results[i] = result
+        return results
+
+    def reset(self, seed=None):
+        seeds = self._seeds(seed)
+        if self.mode == 'sync':
+            return _stack(self._batch.reset(seeds))
+        return _stack(self._scatter('reset', seeds))
+
+    def step(self, actions):
+        """Step every env with its action. Returns stacked (obs, rewards, dones, infos)."""
+        if self.mode == 'sync':
+            results = self._batch.step(actions)
+        else:
+            results = self._scatter('step', list(actions))
+        observations, rewards, dones, infos = zip(*results)
+        return (_stack(observations), np.array(rewards, dtype=np.float32),
+                np.array(dones, dtype=bool), list(infos))
+
+    def action_masks(self):
+        """(num_envs, num_actions) boolean array of legal actions."""
+        if self.mode == 'sync':
+            return np.stack(self._batch.action_masks())
+        return np.stack(self._scatter('masks', None))
+
+    def close(self):
+        if self.mode == 'process':
+            for conn in self._conns:
+                conn.send(('close', None))
+            for proc in self._procs:
+                proc.join()
@@ -0,0 +1,195 @@
+"""Flow field for open-field maps, where towers block tiles.
+
+Every walkable tile stores its step distance (4-neighbour BFS) to the base.
+A monster standing on a tile walks to the neighbour with the smallest
+distance, so any number of monsters share one field instead of each
+searching for a route.
+
+When a tower blocks a tile, only the tiles whose shortest route went through
+it are recomputed. That repair is also the placement legality check (can
+every spawn and monster still reach the base?): the tile is blocked
+tentatively and the block is undone if any of them ended up without a
+distance. Its cost is the size of the region that depended on the tile,
+which a legal placement pays anyway. Most tiles skip the check with a
+constant-time look at their 8 neighbours.
+"""
+from collections import deque
+from .config import *
+
+UNREACHABLE = 1 << 30
+# The 8 tiles around a tile, in order round the ring (orthogonal ones at even slots)
+RING = [(0, -1), (1, -1), (1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1)]
+
+
+def bfs_distances(width, height, walkable, goal):
+    """Step distance from every tile to goal (UNREACHABLE for walls and cut-off tiles)."""
+    dist = [UNREACHABLE] * (width * height)
+    start = goal[1] * width + goal[0]
+    dist[start] = 0
+    queue = deque([start])
+    while queue:
+        i = queue.popleft()
+        d = dist[i] + 1
+        x, y = i % width, i // width
+        for n, ok in ((i + 1, x + 1 < width), (i - 1, x > 0), (i + width, y + 1 < height), (i - width, y > 0)):
+            if ok and walkable[n] and dist[n] > d:
+                dist[n] = d
+                queue.append(n)
+    return dist
+
+
+class FlowField:
+    """Distances to the base over a tile grid, repaired incrementally as tiles are blocked."""
+    def __init__(self, width, height, walkable, goal, spawns, distances=None):
+        self.width = width
+        self.height = height
+        self.walkable = bytearray(walkable)
+        self.goal = goal
+        self.spawns = [y * width + x for x, y in spawns]
+        self.dist = list(distances) if distances is not None else bfs_distances(width, height, self.walkable, goal)
+        # Neighbour indices per tile, in a fixed order so ties break the same way every run
+        self.neighbours = []
+        for i in range(width * height):
+            x, y = i % width, i // width
+            self.neighbours.append(tuple(n for n, ok in ((i + 1, x + 1 < width), (i - 1, x > 0),
+                                                         (i + width, y + 1 < height), (i - width, y > 0)) if ok))
+
+    def tile_index(self, point):
+        return (int(point[1]) // TILE_SIZE) * self.width + int(point[0]) // TILE_SIZE
+
+    def next_point(self, point):
+        """Centre of the next tile to walk to from the tile containing point.
+
+        Returns None once point is next to the base (the walk is over).
+        """
+        i = self.tile_index(point)
+        if self.dist[i] <= 1:
+            return None
+        best = min(self.neighbours[i], key=self.dist.__getitem__)
+        if self.dist[best] >= UNREACHABLE:
+            return point  # Walled in: wait where it is
+        return ((best % self.width) * TILE_SIZE + TILE_SIZE // 2,
+                (best // self.width) * TILE_SIZE + TILE_SIZE // 2)
+
+    def is_walkable_point(self, point):
+        return self.walkable[self.tile_index(point)] == 1
+
+    def block(self, x, y):
+        """Make a tile unwalkable and repair the distances that depended on it.
+        Returns the (tile, old distance) pairs it changed, for undo_block()."""
+        dist = self.dist
+        walkable = self.walkable
+        neighbours = self.neighbours
+        start = y * self.width + x
+        walkable[start] = 0
+        if dist[start] >= UNREACHABLE:
+            return []
+        old = dist[start]
+        dist[start] = UNREACHABLE
+        changed = [(start, old)]
+
+        # Tiles whose every one-step-closer neighbour was lost are lost too.
+        # Walking outward level by level, all lost tiles of a level are marked
+        # before any tile of the next level is checked.
+        lost = []
+        queue = deque([(start, old)])
+        while queue:
+            i, d = queue.popleft()
+            for n in neighbours[i]:
+                if dist[n] != d + 1:
+                    continue
+                for m in neighbours[n]:
+                    if dist[m] == d:
+                        break  # Still has another way to the base
+                else:
+                    dist[n] = UNREACHABLE
+                    lost.append(n)
+                    changed.append((n, d + 1))
+                    queue.append((n, d + 1))
+
+        # Re-enter the lost region from its border. The border tiles start at
+        # different distances, so they are fed into the BFS in order as its
+        # frontier reaches their distance; every tile is then settled once.
+        seeds = []
+        for i in lost:
+            best = UNREACHABLE
+            for m in neighbours[i]:
+                if dist[m] < best:
+                    best = dist[m]
+            if best < UNREACHABLE:
+                seeds.append((best + 1, i))
+        seeds.sort()
+        queue = deque()
+        k = 0
+        while k < len(seeds) or queue:
+            if queue and (k == len(seeds) or queue[0][0] <= seeds[k][0]):
+                d, i = queue.popleft()
+            else:
+                d, i = seeds[k]
+                k += 1
+                if d >= dist[i]:
+                    continue
+                dist[i] = d
+            for n in neighbours[i]:
+                if walkable[n] and dist[n] > d + 1:
+                    dist[n] = d + 1
+                    queue.append((d + 1, n))
+        return changed
+
+    def undo_block(self, x, y, changed):
+        """Open a tile again that block() closed, given what block() returned."""
+        self.walkable[y * self.width + x] = 1
+        dist = self.dist
+        for i, d in changed:
+            dist[i] = d
+
+    def try_block(self, x, y, points=()):
+        """Block tile (x, y) if every spawn, and every tile containing one of
+        points (monster positions), stays connected to the base. Returns what
+        block() changed, for undo_block(), or None (and leaves the field as
+        it was) if the tile can't be blocked."""
+        start = y * self.width + x
+        required = set(self.spawns)
+        required.update(self.tile_index(p) for p in points)
+        if start in required or start == self.goal[1] * self.width + self.goal[0]:
+            return None
+        if self.dist[start] >= UNREACHABLE or self._ring_connected(x, y):
+            return self.block(x, y)  # Can't cut any route to the base
+        changed = self.block(x, y)
+        dist = self.dist
+        # Only tiles the block changed can have lost their way to the base
+        if all(dist[i] < UNREACHABLE for i, _ in changed if i in required):
+            return changed
+        self.undo_block(x, y, changed)
+        return None
+
+    def can_block(self, x, y, points=()):
+        """True if try_block() would block tile (x, y). The field is left as it was."""
+        changed = self.try_block(x, y, points)
+        if changed is None:
+            return False
+        self.undo_block(x, y, changed)
+        return True
+
+    def _open(self, x, y):
+        return 0 <= x < self.width and 0 <= y < self.height and self.walkable[y * self.width + x] == 1
+
+    def _ring_connected(self, x, y):
+        """True if the open orthogonal neighbours of (x, y) are joined by the
+        ring of 8 tiles around it, so blocking it can't split anything."""
+        ring = [self._open(x + dx, y + dy) for dx, dy in RING]
+        if all(ring):
+            return True
+        # Count runs of open ring tiles that contain an orthogonal neighbour
+        first_closed = ring.index(False)
+        runs = 0
+        in_run = has_orthogonal = False
+        for k in range(first_closed + 1, first_closed + 9):
+            slot = k % 8
+            if ring[slot]:
+                in_run = True
+                has_orthogonal = has_orthogonal or slot % 2 == 0
+            elif in_run:
+                runs += has_orthogonal
+                in_run = has_orthogonal = False
+        return runs <= 1
@@ -0,0 +1,116 @@
+import time
+from collections import deque
+import pygame
+
+PACING_MODES = ('vsync', 'capped', 'uncapped')
+VSYNC_PROBE_FRAMES = 8
+VSYNC_MIN_FLIP_MS = 2.0  # A flip that waits for the refresh takes at least this long (up to 500 Hz)
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def vsync_works(frames=VSYNC_PROBE_FRAMES):
+    """Flip a few blank frames and check that the flips waited for the refresh.
+
+    pygame quietly ignores vsync=1 when the display can't provide it, so
+    set_mode() not raising proves nothing.
+    """
+    window = pygame.display.get_surface()
+    window.fill((0, 0, 0))
+    pygame.display.flip()
+    flips = []
+    last = time.perf_counter()
+    for _ in range(frames):
+        pygame.display.flip()
+        now = time.perf_counter()
+        flips.append((now - last) * 1000)
+        last = now
+    return percentile(flips, 50) >= VSYNC_MIN_FLIP_MS
+
+
+class FramePacer:
+    """The one place the main loop waits for the next frame.
+
+    Modes:
+        'vsync'    - the display flip waits for the refresh; tick() only measures
+        'capped'   - Clock.tick_busy_loop(fps), more accurate than tick()'s sleep
+        'uncapped' - no waiting at all, for benchmarks
+
+    Every tick records the frame interval and the work time (the part of the
+    interval not spent waiting here). A frame that misses its deadline with
+    work under the budget points at pacing; one with work over the budget
+    points at the game itself.
+    """
+    def __init__(self, mode='capped', fps=60, history=600):
+        if mode not in PACING_MODES:
+            raise ValueError(f"Unknown frame pacing mode: {mode}")
+        self.mode = mode
+        self.fps = fps
+        self.target_ms = 1000.0 / fps
+        self.clock = pygame.time.Clock()
+        self.intervals = deque(maxlen=history)
+        self.work_times = deque(maxlen=history)
+        self.frames = 0
+        self.missed_pacing = 0  # Late although the work fit the budget
+        self.missed_work = 0    # Late because the work itself overran
+        self.interval_ms = 0.0
+        self.work_ms = 0.0
+        self._start = None
+        self._last = None
+
+    def tick(self):
+        """Wait for the next frame (per mode) and return dt in seconds."""
+        before_wait = time.perf_counter()
+        if self.mode == 'capped':
+            self.clock.tick_busy_loop(self.fps)
+        else:
+            self.clock.tick()
+        now = time.perf_counter()
+        if self._last is None:
+            # First frame: nothing to measure yet
+            self._start = self._last = now
+            return 0.0
+        self.interval_ms = (now - self._last) * 1000
+        self.work_ms = (before_wait - self._last) * 1000
+        self._last = now
+        self.frames += 1
+        self.intervals.append(self.interval_ms)
+        self.work_times.append(self.work_ms)
+        # Allow a little slack before calling a frame late
+        if self.mode != 'uncapped' and self.interval_ms > self.target_ms * 1.5:
+            if self.work_ms > self.target_ms:
+                self.missed_work += 1
+            else:
+                self.missed_pacing += 1
+        return self.interval_ms / 1000.0
+
+    def report(self):
+        """Achieved FPS, frame time and jitter percentiles, and missed deadlines."""
+        elapsed = (self._last - self._start) if self.frames else 0.0
+        intervals = list(self.intervals)
+        # Uncapped frames have no target, so jitter is measured against the median
+        expected = percentile(intervals, 50) if self.mode == 'uncapped' else self.target_ms
+        jitter = [abs(i - expected) for i in intervals]
+        return {
+            'mode': self.mode,
+            'target_fps': self.fps,
+            'frames': self.frames,
+            'fps': round(self.frames / elapsed, 2) if elapsed > 0 else 0.0,
+            'frame_ms_p50': round(percentile(intervals, 50), 3),
+            'frame_ms_p95': round(percentile(intervals, 95), 3),
+            'frame_ms_p99': round(percentile(intervals, 99), 3),
+            'work_ms_p50': round(percentile(list(self.work_times), 50), 3),
+            'work_ms_p95': round(percentile(list(self.work_times), 95), 3),
+            'jitter_ms_p50': round(percentile(jitter, 50), 3),
+            'jitter_ms_p95': round(percentile(jitter, 95), 3),
+            'jitter_ms_p99': round(percentile(jitter, 99), 3),
+            'missed_deadlines': self.missed_pacing + self.missed_work,
+            'missed_pacing': self.missed_pacing,
+            'missed_work': self.missed_work,
+        }
@@ -1,23 +1,52 @@
 import pygame
 import os
+import time
 from .config import *
-from .path import Path
-from .economy import Economy
-from entities.tower import TowerManager
-from entities.monster import MonsterManager
-from .wave import WaveManager
+from .simulation import Simulation
 from .boss_warning import BossWarning
 from .danger_warning import DangerWarning
-from entities.base import Base
 from ui.hud import HUD
 from ui.button import Button
 from .font_manager import get_font
+from .render_queue import RenderQueue
+from .advisor import Advisor
+from .scaling_log import ScalingLog
+from .quality import QualityGovernor
+from .camera import Camera
+from .terrain import TerrainRenderer
+from .sim_process import SimProcess
+from .history import SimHistory
+from .input import mouse
+from . import audio
 
 class Game:
     """Main game controller: manages state, updates, and rendering."""
-    def __init__(self, screen):
+    def __init__(self, screen, pacer, endless=ENDLESS_MODE, seed=None, recorder=None, replay=None, map_path=MAP_PATH,
+                 sim_process=False, telemetry=None):
         self.screen = screen
-        self.clock = pygame.time.Clock()
+        self.map_path = map_path
+        self.pacer = pacer  # Frame timing is owned by the main loop
+        self.endless = endless
+        self.seed = seed
+        # Player commands are written to the recorder and/or read from a replay
+        self.recorder = recorder
+        self.replay = replay
+        self.frame = 0
+        # With sim_process the simulation runs in a worker process; self.sim
+        # is then a local copy that is filled in from the worker's state
+        self.sim_process = SimProcess(seed, endless, map_path) if sim_process else None
+        # Endless mode doubles as the scaling harness (entity counts are only
+        # known to the worker in sim_process mode)
+        self.scaling_log = ScalingLog(SCALING_LOG_PATH) if endless and not sim_process else None
+        self.telemetry = telemetry  # Per-wave stats writer; follows the game across restarts
+        self.tick_ms = 0.0
+        self.draw_ms = 0.0
+        # Steps quality down on slow machines; lives across restarts
+        self.quality = QualityGovernor()
+        self.render_queue = RenderQueue()
+        # Placement advisor (S); its worker pool lives as long as the game
+        self.advisor = Advisor()
+        self.advisor_message = None
         self.boss_music_playing = False
         self.restart_game()
     
@@ -33,27 +62,39 @@ class Game:
         self.game_speed = 1.0
         self.paused = False
         
-        # Core systems
-        self.path = Path()
-        self.base = Base()
-        self.base.set_position(*self.path.base_pos)  # Set base at end of path
-        self.economy = Economy()
-        self.tower_manager = TowerManager(self.path)
-        self.monster_manager = MonsterManager(self.path, self.economy)
-        self.wave_manager = WaveManager(self.monster_manager, self.base)
-        self.monster_manager.base = self.base  # Set base reference for monster manager
+        # Core systems live in the simulation; keep short references for the UI
+        self.sim = Simulation(seed=self.seed, endless=self.endless, map_path=self.map_path)
+        if self.telemetry:
+            self.sim.attach_telemetry(self.telemetry)
+        # Snapshots for the F9 rewind (the worker owns the state in sim_process mode)
+        self.history = SimHistory() if not self.sim_process else None
+        self.path = self.sim.path
+        self.base = self.sim.base
+        self.economy = self.sim.economy
+        self.tower_manager = self.sim.tower_manager
+        self.monster_manager = self.sim.monster_manager
+        self.wave_manager = self.sim.wave_manager
+        self.apply_quality()
         self.hud = HUD(self)
+
+        # View onto the map; terrain chunks are cached per map
+        self.camera = Camera(self.path.width * TILE_SIZE, self.path.height * TILE_SIZE)
+        mouse.set_camera(self.camera)
+        self.terrain = TerrainRenderer(self.path)
+        self.view_surface = None  # World-scale render target when zoomed
+        self.drag_pos = None      # Middle-drag pan anchor
         
         # Game state
-        self.state = 'preparation'  # 'wave', 'gameover', 'victory'
         self.selected_tower = None
         self.selected_tile = None
+        self.clear_suggestions()  # Placement advisor results (self.suggestions), best first
         self.boss_music_playing = False
         
         # Boss and danger warning overlays
         self.boss_warning = BossWarning()
         self.danger_warning = DangerWarning()
         self._last_wave_in_progress = False
+        self._last_wave_num = 0
         
         # Game over screen
         self.game_over_font = get_font(64)
@@ -63,10 +104,117 @@ class Game:
             120, 40
         )
         self.restart_text = get_font(24).render('Restart?', True, (0, 0, 0))
+
+    # --- Player commands (recorded for replays) ---
+
+    def record(self, command, *args):
+        if self.recorder:
+            self.recorder.record(self.frame, command, *args)
+
+    def place_tower(self, tower_type, tile_x, tile_y):
+        if self.sim_process:
+            # The worker has the final say; the local copy screens out obvious misses
+            if not self.sim.can_place_tower(tower_type, tile_x, tile_y):
+                return False
+            self.sim_process.send('place', tower_type, tile_x, tile_y)
+            return True
+        placed = self.sim.place_tower(tower_type, tile_x, tile_y)
+        if placed:
+            self.record('place', tower_type, tile_x, tile_y)
+        return placed
+
+    def start_wave(self):
+        if self.sim_process:
+            self.sim_process.send('start_wave')
+        elif self.sim.start_wave():
+            self.record('start_wave')
+
+    def jump_to_wave(self, wave_number):
+        """Start the given wave right away (dev wave select menu)."""
+        if self.sim_process:
+            self.sim_process.send('jump_to_wave', wave_number)
+        elif self.sim.jump_to_wave(wave_number):
+            self.record('jump_to_wave', wave_number)
+
+    def set_next_wave(self, wave_number):
+        """Make wave_number the next wave to start (--start-wave)."""
+        if self.sim_process:
+            self.sim_process.send('set_next_wave', wave_number)
+        self.sim.set_next_wave(wave_number)  # Locally too, so the HUD shows it right away
+        self.record('set_next_wave', wave_number)
+
+    def add_gold(self, amount):
+        if self.sim_process:
+            self.sim_process.send('gold', amount)
+        self.sim.add_gold(amount)  # Locally too, so the HUD shows it right away
+        self.record('gold', amount)
+
+    def restart(self):
+        self.record('restart')
+        if self.sim_process:
+            self.sim_process.restart()
+        self.restart_game()
+
+    def rewind(self, seconds):
+        """Debug: put the simulation back about seconds of game time; play goes on from there."""
+        if self.history is None:
+            return
+        if self.recorder or self.replay:
+            print("Rewind is off while recording or replaying (the replay would no longer match)")
+            return
+        snapshot = self.history.rewind(self.sim, seconds)
+        if snapshot is None:
+            return
+        self._game_over_sound_played = False
+        self.clear_suggestions()
+        print(f"Rewound to {snapshot['clock']:.1f}s (wave {snapshot['wave_number']})")
+
+    def apply_quality(self):
+        """Push the quality tier's settings into the simulation (and the worker's)."""
+        self.quality.apply(self.sim)
+        if self.sim_process:
+            self.sim_process.send('corpse_duration', self.quality.settings['corpse_duration'])
+
+    def run_command(self, command, *args):
+        commands = {
+            'place': self.place_tower,
+            'start_wave': self.start_wave,
+            'jump_to_wave': self.jump_to_wave,
+            'set_next_wave': self.set_next_wave,
+            'gold': self.add_gold,
+            'restart': self.restart,
+        }
+        commands[command](*args)
+
+    @property
+    def state(self):
+        """'preparation', 'playing', 'gameover' or 'completed' (owned by the simulation)."""
+        return self.sim.state
+
+    @state.setter
+    def state(self, value):
+        self.sim.state = value
     
+    def handle_camera_event(self, event):
+        """Mouse wheel zooms at the cursor and middle-drag pans. Returns True if used."""
+        if event.type == pygame.MOUSEWHEEL:
+            self.camera.zoom_at(event.y, mouse.pos)
+            return True
+        if event.type in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP) and event.button in (2, 4, 5):
+            # Wheel steps also arrive as buttons 4/5; don't treat them as clicks
+            if event.button == 2:
+                self.drag_pos = mouse.pos if event.type == pygame.MOUSEBUTTONDOWN else None
+            return True
+        if event.type == pygame.MOUSEMOTION and self.drag_pos is not None:
+            self.camera.pan(self.drag_pos[0] - mouse.pos[0], self.drag_pos[1] - mouse.pos[1])
+            self.drag_pos = mouse.pos
+        return False
+
     def handle_event(self, event):
+        if self.handle_camera_event(event):
+            return
         if event.type == pygame.MOUSEBUTTONDOWN:
-            mouse_pos = pygame.mouse.get_pos()
+            mouse_pos = mouse.pos
             # Right click anywhere to deselect tower selection
             if self.selected_tower is not None and event.button == 3:
                 self.selected_tower = None
@@ -76,14 +224,8 @@ class Game:
             if self.state in ('gameover', 'completed'):
                 if self.restart_button.collidepoint(mouse_pos):
                     # Play button click sound
-                    if HUD.button_click_sound is None:
-                        try:
-                            HUD.button_click_sound = pygame.mixer.Sound(os.path.join('assets', 'sounds', 'UI', 'button_click.wav'))
-                        except Exception as e:
-                            print(f"Failed to load button_click sound: {e}")
-                    if HUD.button_click_sound:
-                        HUD.button_click_sound.play()
-                    self.restart_game()
+                    audio.play_sound('UI', 'button_click.wav')
+                    self.restart()
                 return
             
             # Handle tower menu selection
@@ -95,18 +237,14 @@ class Game:
                     return
             
             # Handle tower placement
-            tile_x = mouse_pos[0] // TILE_SIZE
-            tile_y = mouse_pos[1] // TILE_SIZE
+            world_x, world_y = mouse.world_pos
+            tile_x = world_x // TILE_SIZE
+            tile_y = world_y // TILE_SIZE
             
             if self.selected_tower and self.path.is_buildable_tile(tile_x, tile_y):
-                success = self.tower_manager.place_tower(
-                    self.selected_tower,
-                    (tile_x * TILE_SIZE + TILE_SIZE//2, tile_y * TILE_SIZE + TILE_SIZE//2),
-                    self.economy
-                )
-                if success:
-                    self.path.occupy_tile(tile_x, tile_y)
+                if self.place_tower(self.selected_tower, tile_x, tile_y):
                     self.selected_tower = None
+                    self.clear_suggestions()  # Ranking is stale once the layout changes
                     self.hud.tower_menu_open = False  # Close menu after placement
             
             self.selected_tile = (tile_x, tile_y)
@@ -119,12 +257,73 @@ class Game:
         # Handle escape key to cancel tower placement
         if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
             self.selected_tower = None
+            self.clear_suggestions()
+
+        # F9 (debug): rewind a few seconds
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_F9:
+            self.rewind(HISTORY_REWIND_STEP)
 
-    def update(self):
+        # S during preparation: simulate the coming wave for every placement
+        # (in the background; update() picks up the ranking)
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_s and self.state == 'preparation':
+            self.clear_suggestions()
+            try:
+                self.advisor.start(self.sim)
+                self.advisor_message = "Simulating placements..."
+            except Exception as e:
+                print(f"Placement advisor failed: {e}")
+
+    def clear_suggestions(self):
+        """Drop the advisor's ranking (and any ranking still being worked out)."""
+        self.suggestions = []
+        self.advisor_message = None
+        self.advisor.cancel()
+
+    def update_advisor(self):
+        if self.state != 'preparation':
+            if self.advisor.busy or self.advisor_message:
+                self.clear_suggestions()  # The wave started; the ranking would come too late
+            return
+        if not self.advisor.busy:
+            return
+        try:
+            ranking = self.advisor.poll()
+        except Exception as e:
+            print(f"Placement advisor failed: {e}")
+            self.clear_suggestions()
+            return
+        if ranking is None:
+            return
+        self.suggestions = ranking
+        if ranking:
+            self.advisor_message = None
+        elif self.advisor.baseline_loss == 0:
+            self.advisor_message = "Nothing leaks this wave"
+        else:
+            self.advisor_message = "No single tower saves any HP this wave"
+
+    def update(self, dt):
+        """Advance the game by dt seconds of wall time (scaled by game speed)."""
+        # Arrow keys pan the camera in real time, even while paused
+        keys = pygame.key.get_pressed()
+        pan_x = keys[pygame.K_RIGHT] - keys[pygame.K_LEFT]
+        pan_y = keys[pygame.K_DOWN] - keys[pygame.K_UP]
+        if pan_x or pan_y:
+            self.camera.pan(pan_x * CAMERA_PAN_SPEED * dt, pan_y * CAMERA_PAN_SPEED * dt)
+        self.update_advisor()
+        if self.sim_process:
+            self.sim_process.sync(self.sim, self.game_speed, self.paused)
         if self.paused:
             return
-            
-        dt = self.clock.tick(60) / 1000.0 * self.game_speed
+        if self.replay:
+            for command, args in self.replay.commands_for(self.frame):
+                self.run_command(command, *args)
+        self.frame += 1
+
+        dt *= self.game_speed
+        # Work time of the last frame, without the wait for the frame cap
+        if self.quality.record(self.pacer.work_ms):
+            self.apply_quality()
         
         # Track boss/danger warning triggers
         wave_num = self.wave_manager.wave_number
@@ -135,20 +334,16 @@ class Game:
             # Play danger sound(s) as on every 5th wave
             try:
                 from entities.monster import MonsterManager
-                if not hasattr(MonsterManager, 'danger_sound'):
-                    danger_path = os.path.join('assets', 'sounds', 'UI', 'danger.wav')
-                    if os.path.exists(danger_path):
-                        MonsterManager.danger_sound = pygame.mixer.Sound(danger_path)
-                if hasattr(MonsterManager, 'danger_sound') and MonsterManager.danger_sound:
-                    MonsterManager.danger_sound.play()
+                danger_sound = audio.play_sound('UI', 'danger.wav')
+                if danger_sound:
                     # If there is a chained danger sound, set up the timer as in main.py
                     MonsterManager._danger_sounds_left = 1
-                    pygame.time.set_timer(pygame.USEREVENT + 50, int(MonsterManager.danger_sound.get_length() * 1000), loops=1)
+                    pygame.time.set_timer(pygame.USEREVENT + 50, int(danger_sound.get_length() * 1000), loops=1)
             except Exception as e:
                 print(f"Failed to play danger sound on boss wave: {e}")
             # Play boss music
             boss_music_path = os.path.join('assets', 'sounds', 'ambient', 'boss_music.mp3')
-            if os.path.exists(boss_music_path):
+            if os.path.exists(boss_music_path) and audio.init():
                 try:
                     pygame.mixer.music.load(boss_music_path)
                     pygame.mixer.music.play(-1)  # Loop indefinitely
@@ -158,9 +353,9 @@ class Game:
         # Trigger dangerouswave music for waves 5, 10, 15 (not boss)
         if wave_num in (5, 10, 15) and wave_in_prog and not self._last_wave_in_progress:
             dangerouswave_path = os.path.join('assets', 'sounds', 'ambient', 'dangerouswave.mp3')
-            if os.path.exists(dangerouswave_path):
+            if os.path.exists(dangerouswave_path) and audio.init():
                 try:
-                    pygame.mixer.Channel(5).play(pygame.mixer.Sound(dangerouswave_path), loops=-1)
+                    pygame.mixer.Channel(5).play(audio.load_sound('ambient', 'dangerouswave.mp3'), loops=-1)
                     self.dangerouswave_playing = True
                 except Exception as e:
                     print(f"Failed to play dangerouswave music: {e}")
@@ -196,146 +391,57 @@ class Game:
             pygame.mixer.music.stop()
             self.boss_music_playing = False
 
-        if self.state == 'playing':
-            self.monster_manager.update(dt)
-            self.tower_manager.update(dt, self.monster_manager, self.economy)
-            self.wave_manager.update(dt)
+        if self.state == 'playing' and self.sim_process:
+            # The worker steps the simulation; only the hit particles run here
+            self.tick_ms = self.sim_process.tick_ms
+            self.monster_manager.particles.update(dt)
+        elif self.state == 'playing':
+            tick_start = time.perf_counter()
+            self.sim.update(dt)
+            self.tick_ms = (time.perf_counter() - tick_start) * 1000
+            self.history.record(self.sim, dt)
+            if self.scaling_log and self.wave_manager.wave_in_progress:
+                self.scaling_log.record(self.sim, self.pacer.interval_ms, self.tick_ms, self.draw_ms,
+                                        self.quality.tier)
             
-            # Check victory/defeat conditions
-            if self.base.hp <= 0:
-                # Play game over sound if not already played
+            # Play game over sound once when the base falls
+            if self.state == 'gameover':
                 if not hasattr(self, '_game_over_sound_played') or not self._game_over_sound_played:
                     try:
-                        if not hasattr(self, '_game_over_sound'):
-                            sound_path = os.path.join('assets', 'sounds', 'UI', 'game over.wav')
-                            if os.path.exists(sound_path):
-                                self._game_over_sound = pygame.mixer.Sound(sound_path)
-                            else:
-                                self._game_over_sound = None
-                        if self._game_over_sound:
-                            self._game_over_sound.play()
+                        audio.play_sound('UI', 'game over.wav')
                         self._game_over_sound_played = True
                     except Exception as e:
                         print(f"Failed to play game over sound: {e}")
-                self.state = 'gameover'
-            elif self.wave_manager.wave_number > TOTAL_WAVES:
-                boss_types = {'boss_gnome', 'boss_fast_spider', 'boss_big_spider'}
-                bosses_alive = any(m.type in boss_types for m in self.monster_manager.monsters)
-                if not bosses_alive:
-                    self.state = 'completed'
-
-    def draw(self):
-        # --- Load world images (if not already loaded) ---
-        if not hasattr(self, 'world_images'):
-            self.world_images = {}
-            for name in ['grass', 'path_stone', 'tower_placement_foundation', 'rock1', 'rock2', 'rock3', 'tree', 'dirt1', 'dirt2', 'hole']:
-                img = pygame.image.load(os.path.join('assets', 'world', f'{name}.png')).convert_alpha()
-                if name == 'hole':
-                    img = pygame.transform.rotate(img, -90)
-                self.world_images[name] = pygame.transform.smoothscale(img, (TILE_SIZE, TILE_SIZE))
 
-        grass_img = self.world_images['grass']
-        path_img = self.world_images['path_stone']
-        slot_img = self.world_images['tower_placement_foundation']
-        rock_imgs = [self.world_images['rock1'], self.world_images['rock2'], self.world_images['rock3']]
-        tree_img = self.world_images['tree']
-        dirt_imgs = [self.world_images['dirt1'], self.world_images['dirt2']]
-        hole_img = self.world_images['hole']
+    def close(self):
+        """Flush logs before the program exits."""
+        self.advisor.close()
+        if self.scaling_log:
+            self.scaling_log.close()
+        if self.telemetry:
+            self.telemetry.close()
+        if self.recorder:
+            self.recorder.close()
+        if self.sim_process:
+            self.sim_process.close()
 
-        # Generate scene interest map once
-        if not hasattr(self, 'scene_interest_map'):
-            import random
-            random.seed(42)  # Consistent visuals per run
-            self.scene_interest_map = {}
-            for y in range(GRID_HEIGHT):
-                for x in range(GRID_WIDTH):
-                    if (x, y) in self.path.path_tiles or (x, y) in self.path.buildable_tiles:
-                        continue
-                    r = random.random()
-                    if r < 0.06:
-                        import random
-                        rock_choice = random.choice(['rock1', 'rock2', 'rock3'])
-                        self.scene_interest_map[(x, y)] = rock_choice
-                    elif r < 0.12:
-                        self.scene_interest_map[(x, y)] = 'tree'
-                    elif r < 0.18:
-                        import random
-                        dirt_choice = random.choice(['dirt1', 'dirt2'])
-                        self.scene_interest_map[(x, y)] = dirt_choice
-                    # else: no detail
-
-        # --- Draw background (grass) ---
-        # Cache rock/tree scales and rock rotations for consistency
-        if not hasattr(self, 'rock_scales') or not hasattr(self, 'rock_rotations') or not hasattr(self, 'tree_scales'):
-            import random
-            self.rock_scales = {}
-            self.rock_rotations = {}
-            self.tree_scales = {}
-            for pos, detail in getattr(self, 'scene_interest_map', {}).items():
-                if detail in ('rock1', 'rock2', 'rock3'):
-                    self.rock_scales[pos] = random.uniform(0.4, 0.8)
-                    self.rock_rotations[pos] = random.uniform(0, 360)
-                elif detail == 'tree':
-                    self.tree_scales[pos] = random.uniform(0.7, 1.15)
-
-        for y in range(GRID_HEIGHT):
-            for x in range(GRID_WIDTH):
-                self.screen.blit(grass_img, (x * TILE_SIZE, y * TILE_SIZE))
-                # Draw scene interest (details) on grass
-                if hasattr(self, 'scene_interest_map') and (x, y) in self.scene_interest_map:
-                    detail = self.scene_interest_map[(x, y)]
-                    if detail in ('rock1', 'rock2'):
-                        rock_img = self.world_images[detail]
-                        scale = self.rock_scales.get((x, y), 0.6)
-                        scaled_size = int(TILE_SIZE * scale)
-                        scaled_rock = pygame.transform.smoothscale(rock_img, (scaled_size, scaled_size))
-                        angle = self.rock_rotations.get((x, y), 0)
-                        rotated_rock = pygame.transform.rotate(scaled_rock, angle)
-                        # Center the rotated rock in the tile
-                        rect = rotated_rock.get_rect(center=(x * TILE_SIZE + TILE_SIZE // 2, y * TILE_SIZE + TILE_SIZE // 2))
-                        self.screen.blit(rotated_rock, rect.topleft)
-                    elif detail == 'tree':
-                        scale = self.tree_scales.get((x, y), 1.0)
-                        scaled_size = int(TILE_SIZE * scale)
-                        scaled_tree = pygame.transform.smoothscale(tree_img, (scaled_size, scaled_size))
-                        # Center the scaled tree in the tile
-                        rect = scaled_tree.get_rect(center=(x * TILE_SIZE + TILE_SIZE // 2, y * TILE_SIZE + TILE_SIZE // 2))
-                        self.screen.blit(scaled_tree, rect.topleft)
-                    elif detail in ('dirt1', 'dirt2'):
-                        dirt_img = self.world_images[detail]
-                        self.screen.blit(dirt_img, (x * TILE_SIZE, y * TILE_SIZE))
-
-        # --- Draw path (path_stone) ---
-        for x, y in self.path.path_tiles:
-            self.screen.blit(path_img, (x * TILE_SIZE, y * TILE_SIZE))
-
-        # Draw monster spawn hole above the path for visibility
-        spawn_tile = self.path.path_tiles[0]
-        HOLE_SCALE = 1.5
-        hole_img = self.world_images['hole']
-        hole_size = int(TILE_SIZE * HOLE_SCALE)
-        scaled_hole = pygame.transform.smoothscale(hole_img, (hole_size, hole_size))
-        hole_offset = (TILE_SIZE - hole_size) // 2
-        self.screen.blit(scaled_hole, (spawn_tile[0] * TILE_SIZE + hole_offset, spawn_tile[1] * TILE_SIZE + hole_offset))
-
-
-        # --- Draw buildable slots (tower_placement_foundation) ---
-        for x, y in self.path.buildable_tiles:
-            self.screen.blit(slot_img, (x * TILE_SIZE, y * TILE_SIZE))
+    def draw(self):
+        draw_start = time.perf_counter()
+        self.draw_frame()
+        self.draw_ms = (time.perf_counter() - draw_start) * 1000
 
-        # Draw game elements
-        self.path.draw(self.screen)
-        # Draw towers and their hit particles
-        self.tower_manager.draw(self.screen, monster_particles=self.monster_manager.particles)
-        # Draw monsters (without drawing particles again)
-        self.monster_manager.draw(self.screen)
+    def draw_frame(self):
+        self.draw_world()
         # Draw HUD
         self.hud.draw(self.screen)
         # Draw danger warning overlay (draw before boss warning so boss takes priority)
         self.danger_warning.draw(self.screen)
         # Draw boss warning overlay
         self.boss_warning.draw(self.screen)
-        self.base.draw(self.screen)
+        # Advisor status ("Simulating placements...", "Nothing leaks this wave")
+        if self.advisor_message and self.state == 'preparation':
+            label = get_font(20).render(self.advisor_message, True, (255, 255, 255))
+            self.screen.blit(label, label.get_rect(midtop=(SCREEN_WIDTH // 2, 8)))
         
         # Draw game over screen
         if self.state == 'gameover':
@@ -351,7 +457,7 @@ class Game:
             self.screen.blit(text_surface, text_rect)
             
             # Draw restart button
-            button_color = COLORS['restart_button_hover'] if self.restart_button.collidepoint(pygame.mouse.get_pos()) else COLORS['restart_button']
+            button_color = COLORS['restart_button_hover'] if self.restart_button.collidepoint(mouse.pos) else COLORS['restart_button']
             pygame.draw.rect(self.screen, button_color, self.restart_button)
             pygame.draw.rect(self.screen, (0, 0, 0), self.restart_button, 2)
             
@@ -374,7 +480,7 @@ class Game:
             self.screen.blit(text_surface1, text_rect1)
             self.screen.blit(text_surface2, text_rect2)
             # Draw restart button
-            button_color = COLORS['restart_button_hover'] if self.restart_button.collidepoint(pygame.mouse.get_pos()) else COLORS['restart_button']
+            button_color = COLORS['restart_button_hover'] if self.restart_button.collidepoint(mouse.pos) else COLORS['restart_button']
             pygame.draw.rect(self.screen, button_color, self.restart_button)
             pygame.draw.rect(self.screen, (0, 0, 0), self.restart_button, 2)
             # Draw restart text
@@ -383,6 +489,50 @@ class Game:
         
         # Draw tower preview if placing
         if self.selected_tower:
-            mouse_pos = pygame.mouse.get_pos()
+            mouse_pos = mouse.pos
             pygame.draw.circle(self.screen, (255, 255, 255, 128),
-                            mouse_pos, TOWER_STATS[self.selected_tower]['range'] * TILE_SIZE, 1)
+                            mouse_pos, TOWER_STATS[self.selected_tower]['range'] * TILE_SIZE * self.camera.zoom, 1)
+
+    def draw_world(self):
+        """Draw the visible part of the map: cached terrain chunks, then the
+        entities inside the camera view."""
+        camera = self.camera
+        view = camera.view_rect()
+        if camera.zoom == 1.0:
+            target = self.screen
+        else:
+            # Render at world scale, then scale the view up or down to the screen
+            if self.view_surface is None or self.view_surface.get_size() != view.size:
+                self.view_surface = pygame.Surface(view.size).convert()
+            target = self.view_surface
+        self.terrain.draw(target, view, self.quality.settings['decorations'])
+
+        # Draw game elements: towers, monsters, projectiles, particles and the
+        # base are gathered into one render queue and drawn in depth order.
+        # Each skips what is outside the view before building its sprites
+        self.path.draw(target)
+        self.tower_manager.queue_draw(self.render_queue, view)
+        if self.sim_process:
+            self.sim_process.queue_draw(self.render_queue, view)
+        self.monster_manager.queue_draw(self.render_queue, view)
+        self.base.queue_draw(self.render_queue, view)
+        self.render_queue.flush(target, view)
+        # Highlight advisor suggestions (only meaningful before the wave starts)
+        if self.suggestions and self.state == 'preparation':
+            self.draw_suggestions(target, (-view.x, -view.y))
+
+        if target is not self.screen:
+            if self.quality.settings['smooth_scaling']:
+                pygame.transform.smoothscale(target, (SCREEN_WIDTH, SCREEN_HEIGHT), self.screen)
+            else:
+                pygame.transform.scale(target, (SCREEN_WIDTH, SCREEN_HEIGHT), self.screen)
+
+    def draw_suggestions(self, target, offset):
+        """Outline suggested tiles, numbered by rank, with the tower type to build."""
+        font = get_font(14)
+        for rank, suggestion in enumerate(self.suggestions, 1):
+            x, y = suggestion['tile']
+            rect = pygame.Rect(x * TILE_SIZE + offset[0], y * TILE_SIZE + offset[1], TILE_SIZE, TILE_SIZE)
+            pygame.draw.rect(target, (255, 215, 0), rect, 3 if rank == 1 else 2)
+            label = font.render(f"{rank} {suggestion['tower_type']}", True, (255, 255, 255))
+            target.blit(label, (rect.x + 3, rect.y + 2))
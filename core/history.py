@@ -0,0 +1,251 @@
+"""Rewindable state history for debugging late-wave bugs and stalls.
+
+Every HISTORY_INTERVAL seconds of game time the simulation is packed into
+a compact snapshot: one flat array of float64s per kind of entity (monsters,
+towers, projectiles) plus the handful of scalars that drive the rules (rng
+state, spawn queue, economy, wave). Snapshots from the last HISTORY_SECONDS
+are kept in a ring buffer. Nothing holds on to Monster or Tower objects,
+surfaces or sounds.
+
+restore() writes a snapshot back into the live simulation (same objects the
+game and HUD refer to) and the game simply simulates forward from there.
+
+Monsters write their state into flat records as it changes (see
+RECORD_FIELDS in entities/monster.py), so a snapshot copies all of them in
+one go, into memory that was set aside ahead of time (or that of a
+snapshot that fell out of the ring). No tick should spend more than
+HISTORY_BUDGET_MS on it: the copy's cost is predicted from the last one,
+and a snapshot that would not fit is put off.
+"""
+import heapq
+import time
+from array import array
+from collections import deque
+from .config import *
+from entities.monster import (Monster, MONSTER_TYPES, DIRECTIONS, EFFECT_KINDS, RECORD_FIELDS, R_SEQ, R_TYPE,
+                              R_ROUTE, R_HP, R_MAX_HP, R_SPEED, R_REWARD, R_DISTANCE, R_X, R_Y, R_FLOW_X,
+                              R_FLOW_Y, R_DIRECTION, R_FRAME, R_ANIM_TIMER, R_DEAD_TIMER, R_DEAD_DURATION,
+                              R_EFFECTS)
+from entities.tower import Projectile
+
+TOWER_TYPES = list(TOWER_STATS)
+T_TYPE, T_TILE_X, T_TILE_Y, T_ATTACK_TIMER, T_SHOTS, T_TARGET = range(6)
+TOWER_FIELDS = 6
+P_TOWER, P_X, P_Y, P_TARGET = range(4)
+PROJECTILE_FIELDS = 4
+CHUNK = array('d', bytes(8 * 8192))  # Snapshots hold monster records in chunks of 64 KB
+
+
+def _unmaybe(value):
+    return None if value != value else value  # NaN back to None
+
+
+def capture(sim, clock, monsters=None):
+    """Pack the simulation into a snapshot dict. monsters is a list of arrays
+    the caller already copied the monster records into, one after the other,
+    or None to copy them here."""
+    monster_manager = sim.monster_manager
+    records = monster_manager.records
+    if monsters is None:
+        monsters = [records[:]]
+
+    # Towers in the order they were built, so restoring them rebuilds the same
+    # layout. Targets are stored as record offsets; a monster that was already
+    # removed has no record, and a projectile chasing it can only land on a
+    # corpse, so it is left out
+    tower_data = array('d')
+    projectile_data = array('d')
+    for t, ((tile_x, tile_y), tower) in enumerate(sim.tower_manager.tower_at.items()):
+        target = tower.target
+        target = target.record if target is not None and target.records is records else -1
+        tower_data.extend((TOWER_TYPES.index(tower.tower_type), tile_x, tile_y,
+                           tower.attack_timer, tower.shots_fired, target))
+        for proj in tower.projectiles:
+            if proj.target.records is records:
+                projectile_data.extend((t, proj.pos[0], proj.pos[1], proj.target.record))
+
+    return {
+        'clock': clock,
+        'state': sim.state,
+        'rng': sim.rng.getstate(),
+        'coins': sim.economy.coins,
+        'earned': sim.economy.earned,
+        'spent': sim.economy.spent,
+        'base_hp': sim.base.hp,
+        'wave_number': sim.wave_manager.wave_number,
+        'wave_in_progress': sim.wave_manager.wave_in_progress,
+        'spawn': (monster_manager.spawn_timer, monster_manager.wave_in_progress,
+                  monster_manager.monsters_to_spawn, monster_manager.spawn_index,
+                  getattr(monster_manager, 'current_wave', 0),
+                  monster_manager.stage_scale, monster_manager.endless_delay, monster_manager.next_route,
+                  monster_manager.spawned),
+        'effects': (monster_manager.effects.time, monster_manager.effects._next_token),
+        'monsters': monsters,
+        'monster_values': len(records),
+        'towers': tower_data,
+        'projectiles': projectile_data,
+    }
+
+
+def restore(sim, snapshot):
+    """Write a snapshot back into sim, in place."""
+    sim.state = snapshot['state']
+    sim.rng.setstate(snapshot['rng'])
+    sim.economy.coins = snapshot['coins']
+    sim.economy.earned = snapshot['earned']
+    sim.economy.spent = snapshot['spent']
+    sim.base.hp = snapshot['base_hp']
+    sim.wave_manager.wave_number = snapshot['wave_number']
+    sim.wave_manager.wave_in_progress = snapshot['wave_in_progress']
+    monster_manager = sim.monster_manager
+    # The spawn list is shared with the snapshot: it is never changed once a wave starts
+    (monster_manager.spawn_timer, monster_manager.wave_in_progress, monster_manager.monsters_to_spawn,
+     monster_manager.spawn_index, monster_manager.current_wave, monster_manager.stage_scale,
+     monster_manager.endless_delay, monster_manager.next_route, monster_manager.spawned) = snapshot['spawn']
+
+    # Monsters are rebuilt from their records, in spawn order, and keep writing to them
+    data = array('d')
+    for chunk in snapshot['monsters']:
+        data.extend(chunk)
+    del data[snapshot['monster_values']:]
+    used = []
+    free = []
+    for i in range(0, len(data), RECORD_FIELDS):
+        if data[i + R_SEQ] != data[i + R_SEQ]:
+            free.append(i)
+        else:
+            used.append((data[i + R_SEQ], i))
+    used.sort()
+    heapq.heapify(free)
+    monsters = []
+    by_record = {}
+    for _, i in used:
+        m = Monster(MONSTER_TYPES[int(data[i + R_TYPE])], sim.path, sim.base, sim.economy,
+                    route_id=int(data[i + R_ROUTE]))
+        hp = data[i + R_HP]
+        m.hp = int(hp) if hp.is_integer() else hp
+        m.max_hp = int(data[i + R_MAX_HP])
+        m.speed = data[i + R_SPEED]
+        m.reward = int(data[i + R_REWARD])
+        m.distance = data[i + R_DISTANCE]
+        if sim.path.flow is None and m.distance < m.route.length:
+            m.pos = list(m.route.position_at(m.distance))  # Route walkers only record the distance
+        else:
+            m.pos = [data[i + R_X], data[i + R_Y]]
+        flow_x = _unmaybe(data[i + R_FLOW_X])
+        m.flow_target = None if flow_x is None else (flow_x, data[i + R_FLOW_Y])
+        m.anim_direction = DIRECTIONS[int(data[i + R_DIRECTION])]
+        m.anim_frame = int(data[i + R_FRAME])
+        m.anim_timer = data[i + R_ANIM_TIMER]
+        m.dead_timer = _unmaybe(data[i + R_DEAD_TIMER])
+        m.dead_duration = data[i + R_DEAD_DURATION]
+        for k, kind in enumerate(EFFECT_KINDS):
+            j = i + R_EFFECTS + 3 * k
+            if _unmaybe(data[j + 2]) is not None:
+                m.effects[kind] = [data[j], data[j + 1], int(data[j + 2])]
+        m.records, m.record = data, i
+        m.on_effects_changed()
+        monsters.append(m)
+        by_record[i] = m
+    monster_manager.monsters = monsters
+    monster_manager.records = data
+    monster_manager.free_records = free
+    monster_manager.effects.restore(*snapshot['effects'], monsters)
+
+    # Towers: the layout is only rebuilt if towers were placed since
+    tower_manager = sim.tower_manager
+    data = snapshot['towers']
+    layout = [(TOWER_TYPES[int(data[i + T_TYPE])], int(data[i + T_TILE_X]), int(data[i + T_TILE_Y]))
+              for i in range(0, len(data), TOWER_FIELDS)]
+    current = [(tower.tower_type, x, y) for (x, y), tower in tower_manager.tower_at.items()]
+    if layout != current:
+        tower_manager.clear()
+        sim.path.clear_occupied()
+        for tower_type, x, y in layout:
+            tower_manager.add_tower(tower_type, (x * TILE_SIZE + TILE_SIZE // 2, y * TILE_SIZE + TILE_SIZE // 2))
+            sim.path.occupy_tile(x, y)
+    towers = list(tower_manager.tower_at.values())
+    for t, tower in enumerate(towers):
+        i = t * TOWER_FIELDS
+        tower.attack_timer = data[i + T_ATTACK_TIMER]
+        tower.shots_fired = int(data[i + T_SHOTS])
+        target = int(data[i + T_TARGET])
+        tower.target = by_record[target] if target >= 0 else None
+        tower.projectiles = []
+    data = snapshot['projectiles']
+    for i in range(0, len(data), PROJECTILE_FIELDS):
+        tower = towers[int(data[i + P_TOWER])]
+        tower.projectiles.append(Projectile((data[i + P_X], data[i + P_Y]), by_record[int(data[i + P_TARGET])],
+                                            tower.projectile_speed, tower.projectile_color,
+                                            tower.projectile_size, tower.projectile_type))
+
+    monster_manager.particles.particles.clear()
+    monster_manager.index_routes()
+    if sim.telemetry is not None:
+        sim.telemetry.attach(sim)  # Counters of the rewound stretch no longer add up
+
+
+class SimHistory:
+    """Ring buffer of snapshots taken every HISTORY_INTERVAL seconds of game time."""
+    def __init__(self, interval=HISTORY_INTERVAL, seconds=HISTORY_SECONDS, budget_ms=HISTORY_BUDGET_MS):
+        self.interval = interval
+        self.seconds = seconds
+        self.budget_ms = budget_ms
+        self.snapshots = deque()
+        self.chunks = []  # Where the next snapshot copies the monster records to
+        self.clock = 0.0  # Game seconds since the history started
+        self.since_snapshot = 0.0
+        self.capture_ms = 0.0  # Cost of the last snapshot
+        self.copy_ms = 0.0  # What copying one record value cost last time, to predict the next copy
+        self.skipped = 0  # Ticks a due snapshot was put off to stay within budget
+
+    def record(self, sim, dt):
+        """Called after every simulation tick."""
+        self.clock += dt
+        self.since_snapshot += dt
+        records = sim.monster_manager.records
+        size = len(records)
+        chunks = self.chunks
+        if len(chunks) * len(CHUNK) < size:
+            # Memory for the snapshot is added a chunk per tick ahead of time,
+            # so taking it is a plain copy into memory that is already there
+            chunks.append(array('d', CHUNK))
+        if self.snapshots and self.since_snapshot < self.interval:
+            return
+        if len(chunks) * len(CHUNK) < size or self.copy_ms * size > self.budget_ms:
+            # The copy would go over this tick's budget: put the snapshot off
+            # (until the wave thins out, if it is that big)
+            self.skipped += 1
+            return
+        start = time.perf_counter()
+        view = memoryview(records)
+        for k, at in enumerate(range(0, size, len(CHUNK))):
+            end = min(at + len(CHUNK), size)
+            memoryview(chunks[k])[:end - at] = view[at:end]
+        view.release()
+        copied = time.perf_counter()
+        self.snapshots.append(capture(sim, self.clock, chunks))
+        self.capture_ms = (time.perf_counter() - start) * 1000
+        if size:
+            self.copy_ms = (copied - start) * 1000 / size
+        # The next snapshot reuses the chunks of one that fell out of the ring
+        self.chunks = []
+        while self.snapshots[0]['clock'] < self.clock - self.seconds:
+            self.chunks = self.snapshots.popleft()['monsters']
+        del self.chunks[size // len(CHUNK) + 1:]  # Don't hold on to what a big wave needed
+        self.since_snapshot = 0.0
+
+    def rewind(self, sim, seconds):
+        """Restore the newest snapshot at least seconds old (the oldest one if
+        none is). Newer snapshots are dropped, since play forks from there.
+        Returns the snapshot, or None if there is none."""
+        if not self.snapshots:
+            return None
+        target = self.clock - seconds
+        while len(self.snapshots) > 1 and self.snapshots[-1]['clock'] > target:
+            self.snapshots.pop()
+        snapshot = self.snapshots[-1]
+        restore(sim, snapshot)
+        self.clock = snapshot['clock']
+        self.since_snapshot = 0.0
+        return snapshot
@@ -0,0 +1,59 @@
+import pygame
+from .config import SCREEN_WIDTH, SCREEN_HEIGHT
+
+MOUSE_EVENTS = (pygame.MOUSEMOTION, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP)
+
+
+class Mouse:
+    """The cursor in game-surface coordinates.
+
+    The game is drawn to a fixed-size surface that main() scales into the
+    window. Positions are mapped into game space once per frame (update)
+    and once per mouse event (map_event, which rewrites event.pos in place),
+    and everything else just reads mouse.pos. Things on the map (tiles,
+    towers) read mouse.world_pos, which also goes through the game camera.
+    """
+    def __init__(self):
+        self.scale = 1.0
+        self.x_offset = 0
+        self.y_offset = 0
+        self.screen_pos = (0, 0)  # Window coordinates, for drawing a software cursor
+        self.pos = (0, 0)         # Game surface coordinates
+        self.camera = None
+
+    def set_viewport(self, scale, x_offset, y_offset):
+        """Where the game surface sits in the window (changes on resize)."""
+        self.scale = scale
+        self.x_offset = x_offset
+        self.y_offset = y_offset
+
+    def set_camera(self, camera):
+        """The camera that maps game-surface positions onto the map."""
+        self.camera = camera
+
+    @property
+    def world_pos(self):
+        """Map (world pixel) coordinates under the cursor."""
+        if self.camera is None:
+            return self.pos
+        return self.camera.to_world(self.pos)
+
+    def to_game(self, screen_pos):
+        mx = int((screen_pos[0] - self.x_offset) / self.scale)
+        my = int((screen_pos[1] - self.y_offset) / self.scale)
+        # Clamp to valid range
+        return (max(0, min(SCREEN_WIDTH - 1, mx)), max(0, min(SCREEN_HEIGHT - 1, my)))
+
+    def update(self):
+        """Read the cursor once at the start of a frame."""
+        self.screen_pos = pygame.mouse.get_pos()
+        self.pos = self.to_game(self.screen_pos)
+
+    def map_event(self, event):
+        """Convert a mouse event's pos to game coordinates (in place)."""
+        if event.type in MOUSE_EVENTS:
+            self.screen_pos = event.pos
+            event.pos = self.pos = self.to_game(event.pos)
+
+
+mouse = Mouse()
@@ -0,0 +1,184 @@
+"""Map files and their compiled form.
+
+A map is a JSON file:
+    name              display name
+    mode              'path' (default) or 'flow'
+    width, height     size in tiles
+    base              [x, y] tile of the base
+    decoration_seed   seed for the rocks, trees and dirt on the grass
+
+Path maps have fixed routes:
+    path              list of [x, y] tiles, spawn first, ending next to the base
+    routes            or a list of such paths, for several spawns or a road
+                      that forks and joins again (routes may share tiles)
+    buildable         optional list of [x, y] build slots (default: every
+                      tile next to a path)
+
+Flow maps are an open field that the player mazes with towers. Monsters
+follow a flow field towards the base (see core/flow_field.py):
+    spawn             [x, y] tile where monsters appear
+    spawns            or a list of such tiles
+    walls             optional list of [x, y] tiles nobody can walk or build on
+
+Maps are compiled once into the tables the game uses at runtime: each route's
+pixel points with cumulative arc lengths, flat row-major buildable/path bitmaps,
+the decoration layout and, for flow maps, the walkable bitmap and starting
+distance field. The compiled form is cached in MAP_CACHE_DIR
+under the hash of the map file, so a map is only compiled again when it
+changes.
+"""
+import hashlib
+import json
+import math
+import os
+import random
+from .config import *
+from .flow_field import bfs_distances
+
+MAP_FORMAT_VERSION = 3  # Bump when the compiled form changes
+
+# Compiled maps already loaded by this process, by content hash
+_compiled = {}
+
+
+def _check_tiles(tiles, width, height, what):
+    for x, y in tiles:
+        if not (0 <= x < width and 0 <= y < height):
+            raise ValueError(f"{what} tile {(x, y)} is outside the {width}x{height} map")
+
+
+def compile_map(data):
+    """Build the runtime tables for a parsed map file."""
+    width, height = data['width'], data['height']
+    mode = data.get('mode', 'path')
+    if mode == 'flow':
+        # No fixed route: monsters start on the spawn tile and follow the flow field
+        path_tiles = []
+        spawns = [tuple(tile) for tile in data['spawns']] if 'spawns' in data else [tuple(data['spawn'])]
+        routes = [[spawn] for spawn in spawns]
+    elif mode == 'path':
+        routes = data['routes'] if 'routes' in data else [data['path']]
+        routes = [[tuple(tile) for tile in route] for route in routes]
+        if not routes or not all(routes):
+            raise ValueError("Map has an empty path")
+        # Every tile any route uses, in first-seen order
+        path_tiles = list(dict.fromkeys(tile for route in routes for tile in route))
+        spawns = list(dict.fromkeys(route[0] for route in routes))
+    else:
+        raise ValueError(f"Unknown map mode: {mode}")
+    base = tuple(data['base'])
+    walls = [tuple(tile) for tile in data.get('walls', [])]
+    _check_tiles(path_tiles, width, height, 'Path')
+    _check_tiles(spawns + [base] + walls, width, height, 'Spawn/base/wall')
+
+    wall_mask = bytearray(width * height)
+    for x, y in walls:
+        wall_mask[y * width + x] = 1
+
+    path_mask = bytearray(width * height)
+    for x, y in path_tiles:
+        path_mask[y * width + x] = 1
+
+    # Build slots: listed explicitly, or every tile next to the path
+    buildable = bytearray(width * height)
+    if mode == 'flow':
+        # Any open tile except the spawns and the base
+        for i in range(width * height):
+            buildable[i] = 0 if wall_mask[i] else 1
+        for x, y in spawns + [base]:
+            buildable[y * width + x] = 0
+    elif 'buildable' in data:
+        for x, y in data['buildable']:
+            buildable[y * width + x] = 1
+    else:
+        for x, y in path_tiles:
+            for dx in [-1, 0, 1]:
+                for dy in [-1, 0, 1]:
+                    new_x, new_y = x + dx, y + dy
+                    if 0 <= new_x < width and 0 <= new_y < height and not path_mask[new_y * width + new_x]:
+                        buildable[new_y * width + new_x] = 1
+
+    # Pixel points of each route and the distance travelled to reach each point
+    compiled_routes = []
+    for route in routes:
+        points = [(x * TILE_SIZE + TILE_SIZE//2, y * TILE_SIZE + TILE_SIZE//2) for x, y in route]
+        arc_lengths = [0.0]
+        for (x0, y0), (x1, y1) in zip(points, points[1:]):
+            arc_lengths.append(arc_lengths[-1] + math.hypot(x1 - x0, y1 - y0))
+        compiled_routes.append({'points': [list(point) for point in points], 'arc_lengths': arc_lengths})
+
+    # Decorations on free grass tiles (same draws, in the same order, as the
+    # layout the game used to roll on its first frame)
+    rng = random.Random(data.get('decoration_seed', 42))
+    layout = []
+    for y in range(height):
+        for x in range(width):
+            if path_mask[y * width + x] or buildable[y * width + x]:
+                continue
+            if wall_mask[y * width + x]:
+                layout.append([x, y, rng.choice(['rock1', 'rock2'])])
+                continue
+            if mode == 'flow' and ((x, y) in spawns or (x, y) == base):
+                continue
+            r = rng.random()
+            if r < 0.06:
+                layout.append([x, y, rng.choice(['rock1', 'rock2', 'rock3'])])
+            elif r < 0.12:
+                layout.append([x, y, 'tree'])
+            elif r < 0.18:
+                layout.append([x, y, rng.choice(['dirt1', 'dirt2'])])
+    decorations = []
+    for x, y, kind in layout:
+        scale, rotation = 1.0, 0.0
+        if kind in ('rock1', 'rock2', 'rock3'):
+            scale = rng.uniform(0.4, 0.8)
+            rotation = rng.uniform(0, 360)
+        elif kind == 'tree':
+            scale = rng.uniform(0.7, 1.15)
+        decorations.append([x, y, kind, scale, rotation])
+
+    compiled = {
+        'version': MAP_FORMAT_VERSION,
+        'name': data.get('name', 'Untitled'),
+        'mode': mode,
+        'width': width,
+        'height': height,
+        'path_tiles': [list(tile) for tile in path_tiles],
+        'spawns': [list(tile) for tile in spawns],
+        'base_pos': list(base),
+        'routes': compiled_routes,
+        'path_mask': list(path_mask),
+        'buildable': list(buildable),
+        'decorations': decorations,
+    }
+    if mode == 'flow':
+        walkable = bytearray(1 - w for w in wall_mask)
+        compiled['walkable'] = list(walkable)
+        compiled['flow_distances'] = bfs_distances(width, height, walkable, base)
+    return compiled
+
+
+def load_map(map_path=MAP_PATH):
+    """Return the compiled form of a map file, compiling it if it changed."""
+    with open(map_path, 'rb') as f:
+        raw = f.read()
+    key = hashlib.sha1(raw + str(MAP_FORMAT_VERSION).encode()).hexdigest()
+    if key in _compiled:
+        return _compiled[key]
+    cache_path = os.path.join(MAP_CACHE_DIR, key + '.json')
+    try:
+        with open(cache_path) as f:
+            compiled = json.load(f)
+    except (OSError, ValueError):
+        compiled = compile_map(json.loads(raw))
+        try:
+            os.makedirs(MAP_CACHE_DIR, exist_ok=True)
+            # Write then rename, so a half-written file is never picked up
+            tmp_path = f'{cache_path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(compiled, f)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            print(f"Failed to write map cache: {e}")
+    _compiled[key] = compiled
+    return compiled
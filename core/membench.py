@@ -0,0 +1,52 @@
+"""Memory footprint of the entity classes.
+
+Run with `python -m core.membench` from the game's root directory. Builds
+1,000 and 10,000 live monsters, projectiles, particles and towers and prints
+the bytes each one costs (measured with tracemalloc, so everything the
+entity allocates for itself is counted: the object, its attribute storage,
+position lists, effect dicts; shared data such as routes and sprites is not).
+"""
+import gc
+import tracemalloc
+from .config import *
+from .simulation import Simulation, init_headless
+from entities.monster import Monster
+from entities.tower import Tower, Projectile
+from entities.particle import Particle
+
+COUNTS = [1000, 10000]
+
+
+def measure(make, count):
+    """Bytes per object for count objects built by make(i)."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [make(i) for i in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # The list holding them isn't part of the entities
+    list_bytes = len(objects) * 8 + 56
+    return (after - before - list_bytes) / count
+
+
+def main():
+    init_headless()
+    sim = Simulation(seed=0, particles=False)
+    path, base, economy = sim.path, sim.base, sim.economy
+    monster_types = ['gnome', 'fast_spider', 'big_spider']
+    tower_types = list(TOWER_STATS)
+    target = Monster('gnome', path, base, economy)
+    makers = {
+        'Monster': lambda i: Monster(monster_types[i % 3], path, base, economy, position_offset=i % 500),
+        'Projectile': lambda i: Projectile((i % 640, i % 480), target, 400, (150, 75, 0), 'small', 'cannon'),
+        'Particle': lambda i: Particle((i % 640, i % 480), (255, 0, 0)),
+        'Tower': lambda i: Tower(tower_types[i % 3], (i % 640, i % 480)),
+    }
+    print(f"{'entity':<12}" + ''.join(f"{count:>12,}" for count in COUNTS) + '   (bytes per entity)')
+    for name, make in makers.items():
+        print(f"{name:<12}" + ''.join(f"{measure(make, count):>12.0f}" for count in COUNTS))
+
+
+if __name__ == '__main__':
+    main()
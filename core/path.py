@@ -1,55 +1,139 @@
+import bisect
+import math
 import pygame
 from core.config import *
+from core.map_loader import load_map
+from core.flow_field import FlowField
+
+COVERAGE_MARGIN = 1.0  # Pixels added to each end of a coverage interval against rounding
+
+
+class Route:
+    """One way from a spawn to the base: pixel points and the distance along
+    the route to each. Monsters on a route only store how far they have come."""
+    def __init__(self, points, arc_lengths):
+        self.points = [tuple(point) for point in points]
+        self.arc_lengths = arc_lengths
+        self.length = arc_lengths[-1]
+
+    def position_at(self, distance):
+        """Pixel position after travelling distance along the route."""
+        if distance <= 0:
+            return self.points[0]
+        if distance >= self.length:
+            return self.points[-1]
+        i = bisect.bisect_right(self.arc_lengths, distance) - 1
+        x0, y0 = self.points[i]
+        x1, y1 = self.points[i + 1]
+        t = (distance - self.arc_lengths[i]) / (self.arc_lengths[i + 1] - self.arc_lengths[i])
+        return (x0 + (x1 - x0) * t, y0 + (y1 - y0) * t)
+
+    def coverage(self, center, radius):
+        """Sorted, non-overlapping (start, end) distance intervals of the route
+        that lie within radius of center."""
+        cx, cy = center
+        intervals = []
+        for i in range(len(self.points) - 1):
+            (x0, y0), (x1, y1) = self.points[i], self.points[i + 1]
+            seg_len = self.arc_lengths[i + 1] - self.arc_lengths[i]
+            if seg_len == 0:
+                continue
+            # Solve |p0 + t*u - c| = radius for t along the segment
+            ux, uy = (x1 - x0) / seg_len, (y1 - y0) / seg_len
+            fx, fy = x0 - cx, y0 - cy
+            b = fx * ux + fy * uy
+            disc = b * b - (fx * fx + fy * fy - radius * radius)
+            if disc < 0:
+                continue
+            root = math.sqrt(disc)
+            t0, t1 = max(0.0, -b - root), min(seg_len, -b + root)
+            if t0 > t1:
+                continue
+            start = self.arc_lengths[i] + t0 - COVERAGE_MARGIN
+            end = self.arc_lengths[i] + t1 + COVERAGE_MARGIN
+            if intervals and start <= intervals[-1][1]:
+                intervals[-1] = (intervals[-1][0], max(intervals[-1][1], end))
+            else:
+                intervals.append((start, end))
+        return intervals
+
 
 class Path:
-    """Represents the fixed, winding path monsters follow and buildable tile locations."""
-    def __init__(self):
-        # Define path points in tile coordinates - S-shaped path with multiple turns
-        self.path_tiles = [
-            # Start at bottom left
-            (0, 13), (1, 13), (2, 13), (3, 13), (4, 13), (5, 13),
-            # Turn up
-            (5, 12), (5, 11), (5, 10), (5, 9),
-            # Go right
-            (6, 9), (7, 9), (8, 9), (9, 9), (10, 9),
-            # Turn up again
-            (10, 8), (10, 7), (10, 6), (10, 5),
-            # Go left
-            (9, 5), (8, 5), (7, 5), (6, 5), (5, 5), (4, 5), (3, 5),
-            # Up again
-            (3, 4), (3, 3),
-            # Final stretch to the right
-            (4, 3), (5, 3), (6, 3), (7, 3), (8, 3), (9, 3), (10, 3),
-            (11, 3), (12, 3), (13, 3), (14, 3), (15, 3), (16, 3), (17, 3), (18, 3)
-        ]
-        
-        # Base position (end of path)
-        self.base_pos = (19, 3)
-        
-        # Convert to pixel coordinates for drawing and movement
-        self.points = [(x * TILE_SIZE + TILE_SIZE//2, y * TILE_SIZE + TILE_SIZE//2)
-                      for x, y in self.path_tiles]
-        
-        # Define buildable tiles adjacent to path
-        self.buildable_tiles = set()
+    """The routes monsters follow and the buildable tile locations, loaded from a map file."""
+    def __init__(self, map_path=MAP_PATH):
+        compiled = load_map(map_path)
+        self.map_path = map_path
+        self.name = compiled['name']
+        self.mode = compiled['mode']
+        self.width = compiled['width']
+        self.height = compiled['height']
+
+        # Every path tile in tile coordinates; the base sits just past the end
+        self.path_tiles = [tuple(tile) for tile in compiled['path_tiles']]
+        self.base_pos = tuple(compiled['base_pos'])
+        self.spawns = [tuple(tile) for tile in compiled['spawns']]
+
+        # Routes from the spawns to the base, shared by every monster on them
+        # (a flow map has a one-point route per spawn, for where monsters appear)
+        self.routes = [Route(route['points'], route['arc_lengths']) for route in compiled['routes']]
+        # The first route, for code that only knows about one path
+        self.points = self.routes[0].points
+        self.arc_lengths = self.routes[0].arc_lengths
+        self.length = self.routes[0].length
+
+        # Row-major bitmaps (index y * width + x) for O(1) tile checks
+        self.path_mask = bytearray(compiled['path_mask'])
+        self.buildable = bytearray(compiled['buildable'])
+        self.occupied = bytearray(len(self.buildable))
+        self.buildable_tiles = {(i % self.width, i // self.width)
+                                for i, free in enumerate(self.buildable) if free}
         self.occupied_tiles = set()
-        for x, y in self.path_tiles:
-            # Check adjacent tiles
-            for dx in [-1, 0, 1]:
-                for dy in [-1, 0, 1]:
-                    new_x, new_y = x + dx, y + dy
-                    if (new_x, new_y) not in self.path_tiles and \
-                       0 <= new_x < GRID_WIDTH and \
-                       0 <= new_y < GRID_HEIGHT:
-                        self.buildable_tiles.add((new_x, new_y))
+
+        # (x, y) -> (kind, scale, rotation) for the grass details
+        self.decorations = {(x, y): (kind, scale, rotation)
+                            for x, y, kind, scale, rotation in compiled['decorations']}
+
+        # Flow maps: monsters walk a shared distance field that towers reshape
+        self.flow = None
+        if self.mode == 'flow':
+            self.flow = FlowField(self.width, self.height, compiled['walkable'], self.base_pos,
+                                  self.spawns, compiled['flow_distances'])
     
     def is_buildable_tile(self, x, y):
         """Check if a tile coordinate is buildable and not yet occupied."""
-        return (x, y) in self.buildable_tiles and (x, y) not in self.occupied_tiles
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return False
+        i = y * self.width + x
+        return self.buildable[i] == 1 and not self.occupied[i]
 
     def occupy_tile(self, x, y):
         """Mark a buildable tile as occupied (after tower placed)."""
+        self.occupied[y * self.width + x] = 1
         self.occupied_tiles.add((x, y))
+        if self.flow is not None:
+            self.flow.block(x, y)
+
+    def clear_occupied(self):
+        """Free every tile (and on flow maps reset the field) before towers are put back."""
+        self.occupied = bytearray(len(self.buildable))
+        self.occupied_tiles = set()
+        if self.flow is not None:
+            compiled = load_map(self.map_path)
+            self.flow = FlowField(self.width, self.height, compiled['walkable'], self.base_pos,
+                                  self.spawns, compiled['flow_distances'])
+
+    def position_at(self, distance):
+        """Pixel position after travelling distance along the first route."""
+        return self.routes[0].position_at(distance)
+
+    def coverage(self, center, radius):
+        """(route id, start, end) for every stretch of route within radius of
+        center. None on flow maps, where monsters aren't tied to a route."""
+        if self.flow is not None:
+            return None
+        return [(route_id, start, end)
+                for route_id, route in enumerate(self.routes)
+                for start, end in route.coverage(center, radius)]
     
     def get_next_point(self, current_pos):
         """Get the next path point for monster movement."""
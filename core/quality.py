@@ -0,0 +1,59 @@
+from collections import deque
+from .config import FRAME_BUDGET_MS, QUALITY_TIERS
+
+
+class QualityGovernor:
+    """Steps rendering quality down when frames overrun the budget, and back up.
+
+    Frame work times (excluding the wait for the frame cap) go into a
+    rolling window. Once per window the average is checked: above the
+    budget drops one tier (see QUALITY_TIERS), and staying well below it
+    for several windows in a row climbs one tier back. The wait before
+    climbing keeps it from flapping between two tiers.
+    """
+    def __init__(self, budget_ms=FRAME_BUDGET_MS, window=60, headroom=0.6, recover_windows=3):
+        self.budget_ms = budget_ms
+        self.window = window
+        self.headroom = headroom  # Fraction of the budget that counts as "well below"
+        self.recover_windows = recover_windows
+        self.frame_times = deque(maxlen=window)
+        self.frames_until_check = window
+        self.calm_windows = 0
+        self.tier = 0
+        self.settings = QUALITY_TIERS[0]
+
+    def record(self, frame_ms):
+        """Add one frame's work time. Returns True when the tier changed."""
+        self.frame_times.append(frame_ms)
+        self.frames_until_check -= 1
+        if self.frames_until_check > 0:
+            return False
+        self.frames_until_check = self.window
+        average = sum(self.frame_times) / len(self.frame_times)
+        if average > self.budget_ms:
+            self.calm_windows = 0
+            return self.set_tier(self.tier + 1)
+        if average < self.budget_ms * self.headroom:
+            self.calm_windows += 1
+            if self.calm_windows >= self.recover_windows:
+                self.calm_windows = 0
+                return self.set_tier(self.tier - 1)
+        else:
+            self.calm_windows = 0
+        return False
+
+    def set_tier(self, tier):
+        tier = max(0, min(len(QUALITY_TIERS) - 1, tier))
+        if tier == self.tier:
+            return False
+        self.tier = tier
+        self.settings = QUALITY_TIERS[tier]
+        return True
+
+    def apply(self, sim):
+        """Push the current tier's settings into the simulation's entities."""
+        settings = self.settings
+        particles = sim.monster_manager.particles
+        particles.scale = settings['particle_scale']
+        particles.image_particles = settings['image_particles']
+        sim.monster_manager.set_corpse_duration(settings['corpse_duration'])
@@ -0,0 +1,104 @@
+import heapq
+from operator import itemgetter
+
+# Draw layers, back to front
+LAYER_GROUND = 0       # Corpses lying on the path
+LAYER_ENTITIES = 1     # Towers, monsters and the base, ordered by y
+LAYER_PROJECTILES = 2
+LAYER_EFFECTS = 3      # Hit particles
+LAYER_OVERLAY = 4      # Health bars, range circles
+NUM_LAYERS = 5
+
+_by_y = itemgetter(0)
+
+# How far (world pixels) an entity's sprites reach from its position: a boss
+# sprite is 128 pixels across and its health bar sits 80 pixels above it
+CULL_MARGIN = 96
+_UNBOUNDED = (float('-inf'), float('-inf'), float('inf'), float('inf'))
+
+
+def cull_bounds(view):
+    """(left, top, right, bottom) an entity's position must lie inside for
+    any of its sprites to reach view. Unbounded when view is None."""
+    if view is None:
+        return _UNBOUNDED
+    return (view.left - CULL_MARGIN, view.top - CULL_MARGIN,
+            view.right + CULL_MARGIN, view.bottom + CULL_MARGIN)
+
+
+def _visible(ordered, view):
+    """(surface, dest) commands that overlap view, shifted into view space."""
+    left, top, right, bottom = view.left, view.top, view.right, view.bottom
+    commands = []
+    for _, surface, (x, y) in ordered:
+        if x < right and y < bottom:
+            w, h = surface.get_size()
+            if x + w > left and y + h > top:
+                commands.append((surface, (x - left, y - top)))
+    return commands
+
+
+class RenderQueue:
+    """Collects sprite draw commands for one frame and submits them in batches.
+
+    Managers add (y, surface, dest) commands instead of blitting directly.
+    flush() sorts each layer by y once, merging in runs that are already
+    sorted (like the static towers), and hands every layer to a single
+    Surface.blits (or fblits, when available) call. Primitive drawing that
+    can't be expressed as a blit is queued as a callback and runs after the
+    sprites of its layer.
+
+    Commands are in world coordinates. Managers are given the camera's view
+    rect too and skip entities outside cull_bounds(view) before building
+    any sprites for them. flush() culls what is left against the view
+    exactly (the cached tower run, sprite edges) and shifts the rest into
+    view space; callbacks receive the same offset.
+    """
+    def __init__(self):
+        self.items = [[] for _ in range(NUM_LAYERS)]
+        self.sorted_runs = [[] for _ in range(NUM_LAYERS)]
+        self.callbacks = [[] for _ in range(NUM_LAYERS)]
+
+    def add(self, layer, surface, dest, y=0):
+        """Queue a blit of surface at dest (top-left); y is the depth within the layer."""
+        self.items[layer].append((y, surface, dest))
+
+    def add_sorted_run(self, layer, run):
+        """Queue a list of (y, surface, dest) commands that is already sorted by y."""
+        if run:
+            self.sorted_runs[layer].append(run)
+
+    def add_draw(self, layer, draw_fn):
+        """Queue a primitive drawing callback, called as draw_fn(screen, offset)."""
+        self.callbacks[layer].append(draw_fn)
+
+    def flush(self, screen, view=None):
+        """Draw everything queued this frame, then clear the queue.
+
+        view is the world rect shown on screen; None draws everything at
+        world coordinates.
+        """
+        fblits = getattr(screen, 'fblits', None)
+        offset = (0, 0) if view is None else (-view.x, -view.y)
+        for layer in range(NUM_LAYERS):
+            items = self.items[layer]
+            runs = self.sorted_runs[layer]
+            if items or runs:
+                items.sort(key=_by_y)
+                if runs:
+                    ordered = heapq.merge(items, *runs, key=_by_y)
+                else:
+                    ordered = items
+                if view is None:
+                    commands = [(surface, dest) for _, surface, dest in ordered]
+                else:
+                    commands = _visible(ordered, view)
+                if fblits is not None:
+                    fblits(commands)
+                else:
+                    screen.blits(commands, doreturn=False)
+            for draw_fn in self.callbacks[layer]:
+                draw_fn(screen, offset)
+            items.clear()
+            runs.clear()
+            self.callbacks[layer].clear()
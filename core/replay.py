@@ -0,0 +1,57 @@
+import json
+
+# Player commands that change the game, as (name, args) pairs:
+#   place         tower_type, tile_x, tile_y
+#   start_wave
+#   jump_to_wave  wave_number   (dev wave select menu)
+#   set_next_wave wave_number   (--start-wave)
+#   gold          amount        (dev gold button)
+#   restart
+REPLAY_VERSION = 1
+
+
+class ReplayRecorder:
+    """Writes the player's commands to a JSON-lines replay file.
+
+    The first line is a header with the simulation seed and fixed timestep;
+    every following line is one command with the frame it happened on.
+    """
+    def __init__(self, path, seed, dt):
+        self.file = open(path, 'w')
+        self._write({'version': REPLAY_VERSION, 'seed': seed, 'dt': dt})
+
+    def _write(self, entry):
+        self.file.write(json.dumps(entry) + '\n')
+
+    def record(self, frame, command, *args):
+        self._write({'frame': frame, 'command': command, 'args': list(args)})
+
+    def close(self):
+        self.file.close()
+
+
+class ReplayPlayer:
+    """Reads a replay file and hands back each frame's commands in order."""
+    def __init__(self, path):
+        with open(path) as f:
+            lines = [json.loads(line) for line in f if line.strip()]
+        if not lines or lines[0].get('version') != REPLAY_VERSION:
+            raise ValueError(f"{path} is not a version {REPLAY_VERSION} replay file")
+        header = lines[0]
+        self.seed = header['seed']
+        self.dt = header['dt']
+        self.commands = lines[1:]
+        self.next_index = 0
+
+    def commands_for(self, frame):
+        """Return the (command, args) pairs recorded on this frame."""
+        due = []
+        while self.next_index < len(self.commands) and self.commands[self.next_index]['frame'] <= frame:
+            entry = self.commands[self.next_index]
+            due.append((entry['command'], entry['args']))
+            self.next_index += 1
+        return due
+
+    @property
+    def finished(self):
+        return self.next_index >= len(self.commands)
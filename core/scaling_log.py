@@ -0,0 +1,56 @@
+import csv
+import time
+
+
+class ScalingLog:
+    """CSV log of frame and simulation tick times against live entity counts.
+
+    Endless mode writes one row per frame while a wave runs, so the cost of
+    a frame can be plotted against how many monsters, projectiles and
+    particles were alive at the time.
+    """
+    FIELDS = ['time', 'wave', 'frame_ms', 'tick_ms', 'draw_ms', 'quality_tier',
+              'monsters', 'corpses', 'projectiles', 'particles']
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+        self.writer = None
+        self.start_time = time.perf_counter()
+        self.rows_since_flush = 0
+
+    def record(self, sim, frame_ms, tick_ms, draw_ms, quality_tier=0):
+        if self.path is None:
+            return
+        if self.file is None:
+            try:
+                self.file = open(self.path, 'w', newline='')
+            except OSError as e:
+                print(f"Failed to open scaling log {self.path}: {e}")
+                self.path = None
+                return
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(self.FIELDS)
+        monsters = sim.monster_manager.monsters
+        alive = sum(1 for m in monsters if m.is_alive())
+        self.writer.writerow([
+            round(time.perf_counter() - self.start_time, 3),
+            sim.wave_manager.wave_number,
+            round(frame_ms, 2),
+            round(tick_ms, 3),
+            round(draw_ms, 3),
+            quality_tier,
+            alive,
+            len(monsters) - alive,
+            sum(len(t.projectiles) for t in sim.tower_manager.towers),
+            len(sim.monster_manager.particles.particles),
+        ])
+        self.rows_since_flush += 1
+        if self.rows_since_flush >= 120:
+            self.file.flush()
+            self.rows_since_flush = 0
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
@@ -0,0 +1,411 @@
+"""Run the simulation in a worker process (--sim-process).
+
+The worker owns the real Simulation and steps it SIM_PROCESS_RATE times a
+second. After each batch of ticks it publishes what the renderer needs
+(monster and projectile positions, animation frames, hp fractions, flags,
+the tower list and a few scalars) into a shared memory block, and the game
+process draws straight from that block. Player commands go the other way
+over a pipe.
+
+The block holds three slots of float64s. The worker always writes the slot
+that is neither the newest one (front) nor the one the renderer is reading,
+then makes it the front, so neither side ever waits for the other. Each
+entity carries its previously published position as well, and the renderer
+interpolates between the two by how far it is into the next tick.
+
+Hit particles are cosmetic and live in the game process; the worker records
+each burst in a ring buffer in the same block and the renderer emits them.
+Sounds are played by the worker.
+"""
+import os
+import time
+from multiprocessing import get_context, shared_memory
+import pygame
+from .config import *
+
+MONSTER_MODELS = ['gnome', 'fast_spider', 'big_spider']
+DIRECTIONS = ['down', 'up', 'left', 'right']
+TOWER_TYPES = list(TOWER_STATS)
+STATES = ['preparation', 'playing', 'gameover', 'completed']
+
+# Control block: which slot is newest, which one the renderer holds, and how
+# many particle bursts have been written in total
+FRONT, READING, EVENTS_WRITTEN = 0, 1, 2
+CONTROL_SIZE = 4
+
+# Slot header
+(PUBLISHED, PUBLISH_TIME, PUBLISH_INTERVAL, GENERATION, TICK_MS, COINS, BASE_HP,
+ WAVE_NUMBER, WAVE_IN_PROGRESS, STATE, MONSTER_COUNT, PROJECTILE_COUNT, TOWER_COUNT) = range(13)
+HEADER_SIZE = 16
+
+# One record per monster, projectile, tower and particle burst
+M_X, M_Y, M_PREV_X, M_PREV_Y, M_MODEL, M_BOSS, M_SIZE, M_HP, M_DIRECTION, M_FRAME, M_SLOWED, M_FADE = range(12)
+MONSTER_FIELDS = 12
+P_X, P_Y, P_PREV_X, P_PREV_Y, P_TYPE = range(5)
+PROJECTILE_FIELDS = 5
+TOWER_FIELDS = 3  # type, tile x, tile y
+E_X, E_Y, E_R, E_G, E_B, E_COUNT, E_IMAGE = range(7)
+EVENT_FIELDS = 7
+
+MONSTERS_AT = HEADER_SIZE
+PROJECTILES_AT = MONSTERS_AT + SHARED_MAX_MONSTERS * MONSTER_FIELDS
+TOWERS_AT = PROJECTILES_AT + SHARED_MAX_PROJECTILES * PROJECTILE_FIELDS
+SLOT_SIZE = TOWERS_AT + SHARED_MAX_TOWERS * TOWER_FIELDS
+SLOTS = 3
+EVENTS_AT = CONTROL_SIZE + SLOTS * SLOT_SIZE
+BLOCK_SIZE = EVENTS_AT + SHARED_MAX_EVENTS * EVENT_FIELDS
+
+
+class ParticleEvents:
+    """Stands in for the worker's ParticleManager: bursts are recorded for
+    the renderer instead of being simulated."""
+    def __init__(self):
+        self.enabled = True
+        self.particles = []
+        self.scale = 1.0
+        self.image_particles = True
+        self.bursts = []
+
+    def emit(self, pos, color, count=8, image=None):
+        self.bursts.append((pos[0], pos[1], color, count, image))
+
+    def update(self, dt):
+        pass
+
+    def queue_draw(self, queue, view=None):
+        pass
+
+
+class SimWorker:
+    """The worker side: a Simulation plus the code that publishes it."""
+    def __init__(self, data, options):
+        from entities.tower import Tower
+        self.data = data
+        self.options = options
+        self.generation = 0
+        self.speed = 1.0
+        self.paused = False
+        self.corpse_duration = None
+        self.tick_ms = 0.0
+        self.last_publish = time.perf_counter()
+        self.last_positions = {}  # id -> (entity, x, y) as last published
+        # Projectile images identify image particles across the process boundary
+        Tower.load_images()
+        self.image_codes = {id(img): TOWER_TYPES.index(ttype)
+                            for ttype, img in Tower.projectile_images.items() if img}
+        self.new_sim()
+
+    def new_sim(self):
+        from .simulation import Simulation
+        self.sim = Simulation(seed=self.options['seed'], endless=self.options['endless'],
+                              map_path=self.options['map_path'])
+        self.sim.monster_manager.particles = ParticleEvents()
+        if self.corpse_duration is not None:
+            self.sim.monster_manager.set_corpse_duration(self.corpse_duration)
+        self.last_positions = {}
+
+    def run_command(self, command, args):
+        sim = self.sim
+        if command == 'place':
+            sim.place_tower(*args)
+        elif command == 'start_wave':
+            sim.start_wave()
+        elif command == 'jump_to_wave':
+            sim.jump_to_wave(*args)
+        elif command == 'set_next_wave':
+            sim.set_next_wave(*args)
+        elif command == 'gold':
+            sim.add_gold(*args)
+        elif command == 'restart':
+            self.generation += 1
+            self.new_sim()
+        elif command == 'speed':
+            self.speed, self.paused = args
+        elif command == 'corpse_duration':
+            self.corpse_duration = args[0]
+            sim.monster_manager.set_corpse_duration(self.corpse_duration)
+
+    def step(self, dt):
+        if self.paused or self.sim.state != 'playing':
+            return
+        tick_start = time.perf_counter()
+        self.sim.update(dt * self.speed)
+        self.tick_ms = (time.perf_counter() - tick_start) * 1000
+
+    def publish(self):
+        """Write the simulation into a free slot and make it the front one."""
+        data = self.data
+        sim = self.sim
+        front = int(data[FRONT])
+        reading = int(data[READING])
+        slot = next(s for s in range(SLOTS) if s != front and s != reading)
+        at = CONTROL_SIZE + slot * SLOT_SIZE
+        last_positions = self.last_positions
+        positions = {}
+
+        count = 0
+        for monster in sim.monster_manager.monsters:
+            fade = monster.corpse_fade()
+            if fade == 0:
+                continue
+            if count == SHARED_MAX_MONSTERS:
+                break
+            x, y = monster.pos
+            previous = last_positions.get(id(monster))
+            prev_x, prev_y = (previous[1], previous[2]) if previous and previous[0] is monster else (x, y)
+            positions[id(monster)] = (monster, x, y)
+            i = at + MONSTERS_AT + count * MONSTER_FIELDS
+            data[i + M_X] = x
+            data[i + M_Y] = y
+            data[i + M_PREV_X] = prev_x
+            data[i + M_PREV_Y] = prev_y
+            data[i + M_MODEL] = MONSTER_MODELS.index(monster.sprite_type)
+            data[i + M_BOSS] = monster.is_boss
+            data[i + M_SIZE] = monster.size
+            data[i + M_HP] = monster.hp / monster.max_hp
+            data[i + M_DIRECTION] = DIRECTIONS.index(monster.anim_direction)
+            data[i + M_FRAME] = monster.anim_frame
+            data[i + M_SLOWED] = 'slow' in monster.effects
+            data[i + M_FADE] = -1 if fade is None else fade
+            count += 1
+        data[at + MONSTER_COUNT] = count
+
+        count = 0
+        for tower in sim.tower_manager.towers:
+            for proj in tower.projectiles:
+                if count == SHARED_MAX_PROJECTILES:
+                    break
+                x, y = proj.pos
+                previous = last_positions.get(id(proj))
+                prev_x, prev_y = (previous[1], previous[2]) if previous and previous[0] is proj else (x, y)
+                positions[id(proj)] = (proj, x, y)
+                i = at + PROJECTILES_AT + count * PROJECTILE_FIELDS
+                data[i + P_X] = x
+                data[i + P_Y] = y
+                data[i + P_PREV_X] = prev_x
+                data[i + P_PREV_Y] = prev_y
+                data[i + P_TYPE] = TOWER_TYPES.index(proj.proj_type)
+                count += 1
+        data[at + PROJECTILE_COUNT] = count
+        self.last_positions = positions
+
+        # Towers in the order they were built, so the renderer only adds the new ones
+        count = 0
+        for (tile_x, tile_y), tower in sim.tower_manager.tower_at.items():
+            if count == SHARED_MAX_TOWERS:
+                break
+            i = at + TOWERS_AT + count * TOWER_FIELDS
+            data[i] = TOWER_TYPES.index(tower.tower_type)
+            data[i + 1] = tile_x
+            data[i + 2] = tile_y
+            count += 1
+        data[at + TOWER_COUNT] = count
+
+        # Particle bursts go into the ring before the slot is published
+        bursts = sim.monster_manager.particles.bursts
+        written = int(data[EVENTS_WRITTEN])
+        for x, y, color, burst_count, image in bursts:
+            i = EVENTS_AT + (written % SHARED_MAX_EVENTS) * EVENT_FIELDS
+            data[i + E_X] = x
+            data[i + E_Y] = y
+            data[i + E_R], data[i + E_G], data[i + E_B] = color[:3]
+            data[i + E_COUNT] = burst_count
+            data[i + E_IMAGE] = self.image_codes.get(id(image), -1) if image else -1
+            written += 1
+        bursts.clear()
+
+        now = time.perf_counter()
+        data[at + PUBLISH_TIME] = now
+        data[at + PUBLISH_INTERVAL] = now - self.last_publish
+        self.last_publish = now
+        data[at + GENERATION] = self.generation
+        data[at + TICK_MS] = self.tick_ms
+        data[at + COINS] = sim.economy.coins
+        data[at + BASE_HP] = sim.base.hp
+        data[at + WAVE_NUMBER] = sim.wave_manager.wave_number
+        data[at + WAVE_IN_PROGRESS] = sim.wave_manager.wave_in_progress
+        data[at + STATE] = STATES.index(sim.state)
+        data[at + PUBLISHED] = data[at + PUBLISHED] + 1
+        data[EVENTS_WRITTEN] = written
+        data[FRONT] = slot
+
+
+def run_worker(shm_name, commands, options):
+    """Worker process entry point: step and publish until told to quit."""
+    # No window here. Audio is left on the game's driver so the worker's
+    # sounds (shots, hits, deaths) are heard.
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_NO_SIGNAL_HANDLERS', '1')
+    try:
+        pygame.mixer.init()
+    except pygame.error as e:
+        print(f"Simulation process has no audio: {e}")
+    from .simulation import init_headless
+    init_headless()
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    data = shm.buf[:BLOCK_SIZE * 8].cast('d')
+    worker = SimWorker(data, options)
+    tick = 1.0 / SIM_PROCESS_RATE
+    next_tick = time.perf_counter()
+    try:
+        while True:
+            # Wait for the next tick, waking early for commands
+            if commands.poll(max(0.0, next_tick - time.perf_counter())):
+                command, args = commands.recv()
+                if command == 'quit':
+                    break
+                worker.run_command(command, args)
+                continue
+            steps = 0
+            while next_tick <= time.perf_counter() and steps < SIM_PROCESS_MAX_CATCH_UP:
+                worker.step(tick)
+                next_tick += tick
+                steps += 1
+            if next_tick < time.perf_counter():
+                next_tick = time.perf_counter()  # Too far behind: slow down instead of spiralling
+            if steps:
+                worker.publish()
+    except (EOFError, KeyboardInterrupt):
+        pass  # The game went away
+    finally:
+        data.release()
+        shm.close()
+
+
+class SimProcess:
+    """The game side: starts the worker, sends it commands and reads its state."""
+    def __init__(self, seed=None, endless=ENDLESS_MODE, map_path=MAP_PATH):
+        self.shm = shared_memory.SharedMemory(create=True, size=BLOCK_SIZE * 8)
+        self.data = self.shm.buf[:BLOCK_SIZE * 8].cast('d')
+        self.data[FRONT] = 0
+        self.data[READING] = SLOTS  # None yet
+        self.generation = 0
+        self.slot_at = None
+        self.events_read = 0
+        self.tick_ms = 0.0
+        self.sent_speed = (1.0, False)
+        # 'spawn' so the worker doesn't inherit this process's window and audio state
+        context = get_context('spawn')
+        worker_commands, self.commands = context.Pipe(duplex=False)
+        options = {'seed': seed, 'endless': endless, 'map_path': map_path}
+        self.process = context.Process(target=run_worker, args=(self.shm.name, worker_commands, options),
+                                       daemon=True)
+        self.process.start()
+
+    def send(self, command, *args):
+        try:
+            self.commands.send((command, args))
+        except (BrokenPipeError, OSError) as e:
+            print(f"Simulation process is gone: {e}")
+
+    def restart(self):
+        """The game was restarted; ignore the old game's state from now on."""
+        self.generation += 1
+        self.events_read = int(self.data[EVENTS_WRITTEN])
+        self.send('restart')
+
+    def acquire(self):
+        """Hold the newest slot until the next call, so the worker leaves it alone."""
+        data = self.data
+        while True:
+            slot = data[FRONT]
+            data[READING] = slot
+            if data[FRONT] == slot:  # Not replaced while we were claiming it
+                break
+        self.slot_at = CONTROL_SIZE + int(slot) * SLOT_SIZE
+        return self.slot_at
+
+    def sync(self, sim, speed=1.0, paused=False):
+        """Copy the worker's newest state into the game's local simulation.
+
+        The local simulation is never stepped; it holds the map, the towers
+        and the numbers the HUD shows, and its particle manager draws the
+        worker's hit bursts. Returns False until the worker has published.
+        """
+        if (speed, paused) != self.sent_speed:
+            self.send('speed', speed, paused)
+            self.sent_speed = (speed, paused)
+        data = self.data
+        at = self.acquire()
+        if data[at + PUBLISHED] == 0 or data[at + GENERATION] != self.generation:
+            return False
+        self.tick_ms = data[at + TICK_MS]
+        sim.economy.coins = int(data[at + COINS])
+        sim.base.hp = int(data[at + BASE_HP])
+        sim.wave_manager.wave_number = int(data[at + WAVE_NUMBER])
+        sim.wave_manager.wave_in_progress = bool(data[at + WAVE_IN_PROGRESS])
+        sim.state = STATES[int(data[at + STATE])]
+
+        # Towers are only ever added, so copy the ones built since last time
+        tower_manager = sim.tower_manager
+        for k in range(len(tower_manager.tower_at), int(data[at + TOWER_COUNT])):
+            i = at + TOWERS_AT + k * TOWER_FIELDS
+            tile_x, tile_y = int(data[i + 1]), int(data[i + 2])
+            tower_manager.add_tower(TOWER_TYPES[int(data[i])],
+                                    (tile_x * TILE_SIZE + TILE_SIZE//2, tile_y * TILE_SIZE + TILE_SIZE//2))
+            sim.path.occupy_tile(tile_x, tile_y)
+
+        # Particle bursts written since last time (the oldest are lost if we fell a ring behind)
+        from entities.tower import Tower
+        particles = sim.monster_manager.particles
+        written = int(data[EVENTS_WRITTEN])
+        for k in range(max(self.events_read, written - SHARED_MAX_EVENTS), written):
+            i = EVENTS_AT + (k % SHARED_MAX_EVENTS) * EVENT_FIELDS
+            image_code = int(data[i + E_IMAGE])
+            image = None
+            if image_code >= 0 and Tower.projectile_images:
+                image = Tower.projectile_images.get(TOWER_TYPES[image_code])
+            particles.emit((data[i + E_X], data[i + E_Y]),
+                           (int(data[i + E_R]), int(data[i + E_G]), int(data[i + E_B])),
+                           count=int(data[i + E_COUNT]), image=image)
+        self.events_read = written
+        return True
+
+    def queue_draw(self, queue, view=None):
+        """Queue the monsters and projectiles of the slot held since sync(),
+        interpolated between their last two published positions. Those
+        outside view are skipped."""
+        from entities.monster import queue_monster_sprite
+        from entities.tower import queue_projectile, PROJECTILE_STYLES
+        from core.render_queue import cull_bounds
+        left, top, right, bottom = cull_bounds(view)
+        data = self.data
+        at = self.slot_at
+        if at is None or data[at + PUBLISHED] == 0 or data[at + GENERATION] != self.generation:
+            return
+        interval = data[at + PUBLISH_INTERVAL]
+        t = (time.perf_counter() - data[at + PUBLISH_TIME]) / interval if interval > 0 else 1.0
+        t = min(1.0, max(0.0, t))
+
+        for k in range(int(data[at + MONSTER_COUNT])):
+            i = at + MONSTERS_AT + k * MONSTER_FIELDS
+            prev_x, prev_y = data[i + M_PREV_X], data[i + M_PREV_Y]
+            x = prev_x + (data[i + M_X] - prev_x) * t
+            y = prev_y + (data[i + M_Y] - prev_y) * t
+            if not (left < x < right and top < y < bottom):
+                continue
+            fade = data[i + M_FADE]
+            queue_monster_sprite(queue, MONSTER_MODELS[int(data[i + M_MODEL])], int(data[i + M_SIZE]),
+                                 bool(data[i + M_BOSS]), x, y, None if fade < 0 else fade, data[i + M_HP], bool(data[i + M_SLOWED]),
+                                 DIRECTIONS[int(data[i + M_DIRECTION])], int(data[i + M_FRAME]))
+
+        for k in range(int(data[at + PROJECTILE_COUNT])):
+            i = at + PROJECTILES_AT + k * PROJECTILE_FIELDS
+            prev_x, prev_y = data[i + P_PREV_X], data[i + P_PREV_Y]
+            x = prev_x + (data[i + P_X] - prev_x) * t
+            y = prev_y + (data[i + P_Y] - prev_y) * t
+            if not (left < x < right and top < y < bottom):
+                continue
+            proj_type = TOWER_TYPES[int(data[i + P_TYPE])]
+            color, size, _ = PROJECTILE_STYLES[proj_type]
+            queue_projectile(queue, proj_type, x, y, color, size)
+
+    def close(self):
+        self.send('quit')
+        self.process.join(timeout=2)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.data.release()
+        self.shm.close()
+        self.shm.unlink()
@@ -0,0 +1,146 @@
+import os
+import random
+import time
+import pygame
+from .config import *
+from .path import Path
+from .economy import Economy
+from .wave import WaveManager
+from entities.tower import TowerManager
+from entities.monster import MonsterManager
+from entities.base import Base
+
+BOSS_TYPES = {'boss_gnome', 'boss_fast_spider', 'boss_big_spider'}
+
+
+def init_headless():
+    """Initialise pygame for simulations without a window or an audio device.
+
+    Images and sounds still load (against SDL's dummy drivers), so the
+    regular entity classes can be used unchanged. Asset paths are relative,
+    so this must run from the game's root directory.
+    """
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    # By default SDL turns SIGTERM into a quit event, which would keep
+    # worker pools from terminating headless processes
+    os.environ.setdefault('SDL_NO_SIGNAL_HANDLERS', '1')
+    if not pygame.display.get_init():
+        pygame.display.init()
+    if pygame.display.get_surface() is None:
+        pygame.display.set_mode((1, 1))
+    if not pygame.mixer.get_init():
+        try:
+            pygame.mixer.init()
+        except pygame.error as e:
+            print(f"Failed to init mixer for headless simulation: {e}")
+
+
+class Simulation:
+    """The game rules without rendering, input or a wall clock.
+
+    Owns the path, base, economy and the tower/monster/wave managers and
+    advances them by an explicit dt. Game wraps one of these for play; bots
+    and tools drive it directly with a fixed timestep. In endless mode the
+    game never completes; waves past the boss wave are generated.
+    """
+    def __init__(self, seed=None, particles=True, difficulty=None, endless=False, map_path=MAP_PATH):
+        self.endless = endless  # Keep generating waves after the boss wave
+        self.rng = random.Random(seed)
+        self.path = Path(map_path)
+        self.base = Base()
+        self.base.set_position(*self.path.base_pos)  # Set base at end of path
+        self.economy = Economy()
+        self.tower_manager = TowerManager(self.path)
+        self.monster_manager = MonsterManager(self.path, self.economy, rng=self.rng,
+                                              difficulty=difficulty, endless=endless)
+        self.monster_manager.particles.enabled = particles
+        self.wave_manager = WaveManager(self.monster_manager, self.base)
+        self.monster_manager.base = self.base  # Set base reference for monster manager
+        self.state = 'preparation'  # 'playing', 'gameover', 'completed'
+        self.telemetry = None  # Per-wave stats (see core/telemetry.py), opt-in
+
+    def attach_telemetry(self, telemetry):
+        self.telemetry = telemetry
+        telemetry.attach(self)
+
+    def can_place_tower(self, tower_type, tile_x, tile_y):
+        return (self.path.is_buildable_tile(tile_x, tile_y)
+                and self.economy.coins >= TOWER_COSTS[tower_type]
+                and self.route_stays_open(tile_x, tile_y))
+
+    def route_stays_open(self, tile_x, tile_y):
+        """On flow maps a tower may not cut the base off from the spawn or any monster."""
+        flow = self.path.flow
+        if flow is None:
+            return True
+        monsters = [m.pos for m in self.monster_manager.monsters if m.is_alive()]
+        return flow.can_block(tile_x, tile_y, monsters)
+
+    def place_tower(self, tower_type, tile_x, tile_y):
+        """Build a tower on a tile. Returns True if it was placed."""
+        if not self.path.is_buildable_tile(tile_x, tile_y):
+            return False
+        flow = self.path.flow
+        if flow is not None:
+            # The legality check is the block itself; it is undone if the tower isn't built
+            monsters = [m.pos for m in self.monster_manager.monsters if m.is_alive()]
+            changed = flow.try_block(tile_x, tile_y, monsters)
+            if changed is None:
+                return False
+        placed = self.tower_manager.place_tower(
+            tower_type,
+            (tile_x * TILE_SIZE + TILE_SIZE//2, tile_y * TILE_SIZE + TILE_SIZE//2),
+            self.economy
+        )
+        if placed:
+            self.path.occupy_tile(tile_x, tile_y)  # The field is already blocked, so this is cheap
+        elif flow is not None:
+            flow.undo_block(tile_x, tile_y, changed)
+        return placed
+
+    def start_wave(self):
+        """Start the next wave. Returns False if one is already running."""
+        if self.wave_manager.wave_in_progress or self.state in ('gameover', 'completed'):
+            return False
+        self.wave_manager.start_wave()
+        self.state = 'playing'
+        return True
+
+    def jump_to_wave(self, wave_number):
+        """Start the given wave right away. Returns False if a wave is running."""
+        if self.wave_manager.wave_in_progress:
+            return False
+        self.set_next_wave(wave_number)
+        self.start_wave()
+        return True
+
+    def set_next_wave(self, wave_number):
+        """Make wave_number the next wave to start. Outside endless mode there
+        is nothing past the boss wave, so that is as far as it goes."""
+        if not self.endless:
+            wave_number = min(wave_number, TOTAL_WAVES)
+        self.wave_manager.wave_number = wave_number - 1
+
+    def add_gold(self, amount):
+        self.economy.coins += amount
+
+    def update(self, dt):
+        if self.state != 'playing':
+            return
+        telemetry = self.telemetry
+        if telemetry is not None:
+            tick_start = time.perf_counter()
+            telemetry.start_tick(dt)
+        self.monster_manager.update(dt)
+        self.tower_manager.update(dt, self.monster_manager, self.economy)
+        self.wave_manager.update(dt)
+
+        # Check victory/defeat conditions
+        if self.base.hp <= 0:
+            self.state = 'gameover'
+        elif self.wave_manager.wave_number > TOTAL_WAVES and not self.endless:
+            if not any(m.type in BOSS_TYPES for m in self.monster_manager.monsters):
+                self.state = 'completed'
+        if telemetry is not None:
+            telemetry.end_tick((time.perf_counter() - tick_start) * 1000)
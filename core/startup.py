@@ -0,0 +1,38 @@
+"""Startup phase timings (--profile-startup).
+
+main.py notes the time before its heavy imports and marks the end of each
+phase; the report lists how long each took and whether the first frame
+made it on screen within STARTUP_TARGET_MS.
+"""
+import time
+from .config import STARTUP_TARGET_MS
+
+
+class StartupProfile:
+    """Wall-clock time of each startup phase, in the order they ran."""
+    def __init__(self, start):
+        self.start = start
+        self.last = start
+        self.phases = []
+        self.first_frame_ms = None
+
+    def mark(self, name):
+        """End the current phase, naming it."""
+        now = time.perf_counter()
+        self.phases.append((name, (now - self.last) * 1000))
+        self.last = now
+
+    def first_frame(self):
+        """Mark the first frame as on screen."""
+        self.mark('first frame')
+        self.first_frame_ms = (self.last - self.start) * 1000
+
+    def report(self):
+        lines = ['Startup:']
+        for name, ms in self.phases:
+            lines.append(f"  {name:<14}{ms:8.1f} ms")
+        if self.first_frame_ms is not None:
+            verdict = 'ok' if self.first_frame_ms <= STARTUP_TARGET_MS else 'over target'
+            lines.append(f"  first frame after {self.first_frame_ms:.1f} ms "
+                         f"(target {STARTUP_TARGET_MS} ms, {verdict})")
+        return '\n'.join(lines)
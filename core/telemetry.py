@@ -0,0 +1,229 @@
+"""Opt-in per-wave telemetry (--telemetry FILE).
+
+The simulation only bumps counters while a wave runs. When a wave ends, one
+'wave' record and one 'tower' record per tower are queued, and a background
+thread writes them out, so the game loop never waits on the disk.
+
+Output is JSON lines (one record per line, with a 'kind' field), or CSV when
+FILE ends in .csv: wave records go to FILE and tower records to
+FILE_towers.csv. Either loads straight into pandas:
+    df = pandas.read_json('telemetry.jsonl', lines=True)
+    towers = df[df.kind == 'tower']
+"""
+import csv
+import json
+import os
+import queue
+import threading
+from .frame_pacer import percentile
+
+WAVE_FIELDS = ['kind', 'game', 'wave', 'result', 'duration_s', 'spawned', 'kills', 'leaks',
+               'base_hp_lost', 'gold_earned', 'gold_spent', 'coins', 'ttk_s_mean', 'ttk_s_p95',
+               'ticks', 'tick_ms_p50', 'tick_ms_p95', 'tick_ms_p99', 'tick_ms_max']
+TOWER_FIELDS = ['kind', 'game', 'wave', 'tile_x', 'tile_y', 'tower_type', 'level', 'shots', 'hits',
+                'damage', 'overkill', 'kills', 'ttk_s_mean']
+
+
+class TowerStats:
+    """Counters for one tower during one wave."""
+    def __init__(self):
+        self.hits = 0
+        self.damage = 0
+        self.overkill = 0
+        self.kills = 0
+        self.kill_times = []
+
+
+class Telemetry:
+    """Collects per-wave and per-tower counters and streams them to a file."""
+    def __init__(self, path):
+        self.path = path
+        self.records = queue.SimpleQueue()
+        self.writer = threading.Thread(target=self.write_loop, name='telemetry', daemon=True)
+        self.writer.start()
+        self.game = 0
+        self.sim = None
+        self.in_wave = False
+        self.clock = 0.0  # Simulated seconds since the telemetry was attached
+
+    # --- Collection (game thread) ---
+
+    def attach(self, sim):
+        """Start collecting from sim (a new game). An unfinished wave of the
+        previous game is written out as 'abandoned'."""
+        if self.in_wave:
+            self.end_wave('abandoned')
+        self.game += 1
+        self.sim = sim
+        sim.monster_manager.telemetry = self
+        sim.tower_manager.telemetry = self
+        self.clock = 0.0
+        self.mark()
+
+    def mark(self):
+        """Reset the counters. Everything between two wave records (building
+        before a wave included) counts towards the later one."""
+        self.spawned = 0
+        self.kills = 0
+        self.leaks = 0
+        self.spawn_times = {}  # Monster -> clock when it spawned
+        self.kill_times = []
+        self.tick_times = []
+        self.towers = {}  # Tower -> TowerStats
+        self.shots_at_start = {tower: tower.shots_fired for tower in self.sim.tower_manager.towers}
+        self.earned_at_start = self.sim.economy.earned
+        self.spent_at_start = self.sim.economy.spent
+
+    def start_tick(self, dt):
+        """Called by the simulation before every tick."""
+        self.clock += dt
+        if not self.in_wave and self.sim.wave_manager.wave_in_progress:
+            self.in_wave = True
+            self.wave = self.sim.wave_manager.wave_number
+            self.wave_start = self.clock - dt
+            self.base_hp_at_start = self.sim.base.hp
+
+    def spawned_monster(self, monster):
+        self.spawned += 1
+        self.spawn_times[monster] = self.clock
+
+    def leaked(self, monster):
+        self.leaks += 1
+        self.spawn_times.pop(monster, None)
+
+    def hits(self, monster, sources, hp_before, killed):
+        """Share one tick's damage on monster between the towers that dealt it,
+        in hit order. sources is a list of (tower, damage); damage past the
+        monster's remaining hp is overkill, and the hit that took it to zero
+        gets the kill."""
+        remaining = max(hp_before, 0)
+        for tower, damage in sources:
+            stats = self.towers.get(tower)
+            if stats is None:
+                stats = self.towers[tower] = TowerStats()
+            dealt = min(damage, remaining)
+            stats.hits += 1
+            stats.damage += dealt
+            stats.overkill += damage - dealt
+            if killed and remaining > 0 and dealt == remaining:
+                stats.kills += 1
+                spawned_at = self.spawn_times.pop(monster, None)
+                if spawned_at is not None:
+                    stats.kill_times.append(self.clock - spawned_at)
+                    self.kill_times.append(self.clock - spawned_at)
+            remaining -= dealt
+        if killed:
+            self.kills += 1
+
+    def end_tick(self, tick_ms):
+        """Called by the simulation after every tick."""
+        if not self.in_wave:
+            return
+        self.tick_times.append(tick_ms)
+        sim = self.sim
+        if sim.state in ('gameover', 'completed'):
+            self.end_wave(sim.state)
+        elif not sim.wave_manager.wave_in_progress:
+            self.end_wave('cleared')
+
+    def end_wave(self, result):
+        sim = self.sim
+        self.in_wave = False
+        # Percentiles are worked out by the writer thread from the raw times
+        self.records.put({
+            'kind': 'wave',
+            'game': self.game,
+            'wave': self.wave,
+            'result': result,
+            'duration_s': round(self.clock - self.wave_start, 3),
+            'spawned': self.spawned,
+            'kills': self.kills,
+            'leaks': self.leaks,
+            'base_hp_lost': max(0, self.base_hp_at_start - sim.base.hp),
+            'gold_earned': sim.economy.earned - self.earned_at_start,
+            'gold_spent': sim.economy.spent - self.spent_at_start,
+            'coins': sim.economy.coins,
+            'kill_times': self.kill_times,
+            'tick_times': self.tick_times,
+        })
+        # Every tower gets a row, idle ones included
+        for (tile_x, tile_y), tower in sim.tower_manager.tower_at.items():
+            stats = self.towers.get(tower) or TowerStats()
+            self.records.put({
+                'kind': 'tower',
+                'game': self.game,
+                'wave': self.wave,
+                'tile_x': tile_x,
+                'tile_y': tile_y,
+                'tower_type': tower.tower_type,
+                'level': tower.level,
+                'shots': tower.shots_fired - self.shots_at_start.get(tower, 0),
+                'hits': stats.hits,
+                'damage': stats.damage,
+                'overkill': stats.overkill,
+                'kills': stats.kills,
+                'kill_times': stats.kill_times,
+            })
+        self.mark()
+
+    def close(self):
+        """Write out an unfinished wave, then wait for the writer to finish."""
+        if self.in_wave:
+            self.end_wave('unfinished')
+        self.records.put(None)
+        self.writer.join()
+
+    # --- Writing (background thread) ---
+
+    def write_loop(self):
+        files = {}
+        writers = {}
+        failed = False
+        while True:
+            record = self.records.get()
+            if record is None:
+                break
+            if failed:
+                continue
+            try:
+                self.write(record, files, writers)
+                # Records come in a burst at the end of a wave; flush after the burst
+                if self.records.empty():
+                    for f in files.values():
+                        f.flush()
+            except OSError as e:
+                print(f"Failed to write telemetry to {self.path}: {e}")
+                failed = True
+        for f in files.values():
+            f.close()
+
+    @staticmethod
+    def summarise(record):
+        """Replace the raw time lists of a record with their summaries."""
+        kill_times = record.pop('kill_times')
+        record['ttk_s_mean'] = round(sum(kill_times) / len(kill_times), 3) if kill_times else None
+        if record['kind'] == 'wave':
+            record['ttk_s_p95'] = round(percentile(kill_times, 95), 3) if kill_times else None
+            tick_times = record.pop('tick_times')
+            record['ticks'] = len(tick_times)
+            for pct in (50, 95, 99):
+                record[f'tick_ms_p{pct}'] = round(percentile(tick_times, pct), 3)
+            record['tick_ms_max'] = round(max(tick_times), 3) if tick_times else 0.0
+
+    def write(self, record, files, writers):
+        self.summarise(record)
+        kind = record['kind']
+        if not self.path.endswith('.csv'):
+            if 'jsonl' not in files:
+                files['jsonl'] = open(self.path, 'w')
+            files['jsonl'].write(json.dumps(record) + '\n')
+            return
+        if kind not in files:
+            if kind == 'wave':
+                path, fields = self.path, WAVE_FIELDS
+            else:
+                path, fields = os.path.splitext(self.path)[0] + '_towers.csv', TOWER_FIELDS
+            files[kind] = open(path, 'w', newline='')
+            writers[kind] = csv.DictWriter(files[kind], fieldnames=fields)
+            writers[kind].writeheader()
+        writers[kind].writerow(record)
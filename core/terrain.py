@@ -0,0 +1,123 @@
+import os
+from collections import OrderedDict
+import pygame
+from .config import *
+from .assets import load_image
+
+WORLD_IMAGE_NAMES = ['grass', 'path_stone', 'tower_placement_foundation', 'rock1', 'rock2', 'rock3',
+                     'tree', 'dirt1', 'dirt2', 'hole']
+HOLE_SCALE = 1.5  # The spawn hole is drawn a bit larger than a tile
+
+
+class TerrainRenderer:
+    """Draws the static ground (grass, details, path, spawn hole, build slots).
+
+    The map is split into chunks of CHUNK_TILES x CHUNK_TILES tiles. A chunk
+    is rendered to its own surface the first time it is on screen and kept
+    in an LRU cache, so a frame costs one blit per visible chunk however big
+    the map is.
+    """
+    world_images = None
+
+    @staticmethod
+    def load_images():
+        if TerrainRenderer.world_images is not None:
+            return
+        TerrainRenderer.world_images = {}
+        for name in WORLD_IMAGE_NAMES:
+            angle = -90 if name == 'hole' else 0
+            TerrainRenderer.world_images[name] = load_image(os.path.join('assets', 'world', f'{name}.png'),
+                                                            (TILE_SIZE, TILE_SIZE), angle)
+
+    def __init__(self, path, chunk_tiles=CHUNK_TILES, max_chunks=TERRAIN_CHUNK_CACHE):
+        self.path = path
+        self.chunk_tiles = chunk_tiles
+        self.chunk_size = chunk_tiles * TILE_SIZE
+        self.max_chunks = max_chunks
+        self.chunks = OrderedDict()  # (cx, cy, decorations) -> Surface, oldest first
+
+    def chunk(self, cx, cy, decorations):
+        key = (cx, cy, decorations)
+        surface = self.chunks.get(key)
+        if surface is None:
+            surface = self.render_chunk(cx, cy, decorations)
+            self.chunks[key] = surface
+            if len(self.chunks) > self.max_chunks:
+                self.chunks.popitem(last=False)
+        else:
+            self.chunks.move_to_end(key)
+        return surface
+
+    def render_chunk(self, cx, cy, decorations):
+        """Draw one chunk. Tiles one step outside it are drawn too (and clipped),
+        since trees, rocks and the spawn hole can spill over a tile edge."""
+        images = TerrainRenderer.world_images
+        path = self.path
+        origin_x = cx * self.chunk_size
+        origin_y = cy * self.chunk_size
+        width = min(self.chunk_size, path.width * TILE_SIZE - origin_x)
+        height = min(self.chunk_size, path.height * TILE_SIZE - origin_y)
+        surface = pygame.Surface((width, height)).convert()
+        x0 = max(0, cx * self.chunk_tiles - 1)
+        y0 = max(0, cy * self.chunk_tiles - 1)
+        x1 = min(path.width, (cx + 1) * self.chunk_tiles + 1)
+        y1 = min(path.height, (cy + 1) * self.chunk_tiles + 1)
+
+        def in_range(x, y):
+            return x0 <= x < x1 and y0 <= y < y1
+
+        # Grass with the map's details on top
+        for y in range(y0, y1):
+            for x in range(x0, x1):
+                left, top = x * TILE_SIZE - origin_x, y * TILE_SIZE - origin_y
+                surface.blit(images['grass'], (left, top))
+                if not decorations or (x, y) not in path.decorations:
+                    continue
+                detail, scale, angle = path.decorations[(x, y)]
+                center = (left + TILE_SIZE // 2, top + TILE_SIZE // 2)
+                if detail in ('rock1', 'rock2'):
+                    scaled_size = int(TILE_SIZE * scale)
+                    scaled_rock = pygame.transform.smoothscale(images[detail], (scaled_size, scaled_size))
+                    rotated_rock = pygame.transform.rotate(scaled_rock, angle)
+                    surface.blit(rotated_rock, rotated_rock.get_rect(center=center).topleft)
+                elif detail == 'tree':
+                    scaled_size = int(TILE_SIZE * scale)
+                    scaled_tree = pygame.transform.smoothscale(images['tree'], (scaled_size, scaled_size))
+                    surface.blit(scaled_tree, scaled_tree.get_rect(center=center).topleft)
+                elif detail in ('dirt1', 'dirt2'):
+                    surface.blit(images[detail], (left, top))
+
+        # Path stones
+        for x, y in path.path_tiles:
+            if in_range(x, y):
+                surface.blit(images['path_stone'], (x * TILE_SIZE - origin_x, y * TILE_SIZE - origin_y))
+
+        # Monster spawn holes
+        for spawn_x, spawn_y in path.spawns:
+            if in_range(spawn_x, spawn_y):
+                hole_size = int(TILE_SIZE * HOLE_SCALE)
+                scaled_hole = pygame.transform.smoothscale(images['hole'], (hole_size, hole_size))
+                hole_offset = (TILE_SIZE - hole_size) // 2
+                surface.blit(scaled_hole, (spawn_x * TILE_SIZE + hole_offset - origin_x,
+                                           spawn_y * TILE_SIZE + hole_offset - origin_y))
+
+        # Build slots (on flow maps every open tile is one, so none are drawn)
+        if path.flow is None:
+            for x, y in path.buildable_tiles:
+                if in_range(x, y):
+                    surface.blit(images['tower_placement_foundation'], (x * TILE_SIZE - origin_x, y * TILE_SIZE - origin_y))
+        return surface
+
+    def draw(self, target, view, decorations=True):
+        """Blit the chunks overlapping view (a world rect) onto target, shifted by view's corner."""
+        TerrainRenderer.load_images()
+        first_cx = view.left // self.chunk_size
+        first_cy = view.top // self.chunk_size
+        last_cx = min((view.right - 1) // self.chunk_size, (self.path.width * TILE_SIZE - 1) // self.chunk_size)
+        last_cy = min((view.bottom - 1) // self.chunk_size, (self.path.height * TILE_SIZE - 1) // self.chunk_size)
+        commands = []
+        for cy in range(first_cy, last_cy + 1):
+            for cx in range(first_cx, last_cx + 1):
+                commands.append((self.chunk(cx, cy, decorations),
+                                 (cx * self.chunk_size - view.left, cy * self.chunk_size - view.top)))
+        target.blits(commands, doreturn=False)
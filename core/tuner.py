@@ -0,0 +1,339 @@
+"""Difficulty tuner.
+
+Searches the DIFFICULTY multipliers (monster health, monster count and
+spawn delay per wave stage) so that scripted reference strategies follow
+target survival curves: the fraction of base HP left after each wave.
+
+Every candidate is played out by headless Simulations, one game per
+(strategy, seed), spread over a process pool. The search is a small
+evolution strategy in log space (sample a population around the mean, move
+the mean to the best few, shrink or widen the step per parameter from
+their spread), which is close enough to CMA for 9 parameters.
+
+Results are cached on disk, so an interrupted run resumes where it
+stopped and re-evaluating a known point is free:
+
+    tuning/cache.jsonl        one line per played game
+    tuning/state.json         search state after each generation
+    tuning/proposed_difficulty.py   best DIFFICULTY found so far
+
+Run from the game's root directory:
+
+    python -m core.tuner --generations 12 --population 12
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import random
+from .config import *
+from .simulation import Simulation, init_headless
+
+STAGES = ['early', 'mid', 'late']
+KNOBS = ['health', 'count', 'delay']
+PARAMS = [(stage, knob) for stage in STAGES for knob in KNOBS]
+STAGE_FIRST_WAVE = {'early': 1, 'mid': 6, 'late': 16}
+# Multipliers are kept inside these bounds
+PARAM_MIN = 0.25
+PARAM_MAX = 4.0
+
+TUNER_DT = 0.05
+TUNER_MAX_WAVE_TIME = 300.0
+FIRE_UNLOCK_WAVE = 10
+
+
+def _curve(points):
+    """Expand {wave: hp_fraction} corner points into a linear per-wave curve."""
+    waves = sorted(points)
+    curve = []
+    for wave in range(1, TOTAL_WAVES):
+        for lo, hi in zip(waves, waves[1:]):
+            if lo <= wave <= hi:
+                t = (wave - lo) / (hi - lo)
+                curve.append(points[lo] + (points[hi] - points[lo]) * t)
+                break
+    return curve
+
+
+# Base HP fraction left after waves 1-20 for each reference strategy. A
+# careful mixed build should end with a scratched base; spamming cannons
+# should hold early and break down in the late waves.
+DEFAULT_TARGETS = {
+    'mixed': _curve({1: 1.0, 5: 1.0, 10: 0.9, 15: 0.7, 20: 0.4}),
+    'cannons': _curve({1: 1.0, 5: 0.9, 10: 0.6, 15: 0.2, 17: 0.0, 20: 0.0}),
+}
+
+
+def _tile_ranking(path, tower_type):
+    """Buildable tiles sorted by how many path tiles a tower there would cover."""
+    reach = TOWER_STATS[tower_type]['range']
+    def coverage(tile):
+        return sum(1 for px, py in path.path_tiles
+                   if math.hypot(px - tile[0], py - tile[1]) <= reach)
+    return sorted(path.buildable_tiles, key=lambda tile: (-coverage(tile), tile))
+
+
+def _build_order(wave_number, tower_count):
+    """Tower type the 'mixed' strategy buys next: three cannons to open, then
+    every third tower is water, and from the fire unlock every fourth is fire."""
+    if tower_count < 3:
+        return 'cannon'
+    if wave_number >= FIRE_UNLOCK_WAVE and tower_count % 4 == 3:
+        return 'fire'
+    return 'water' if tower_count % 3 == 0 else 'cannon'
+
+
+def _spend(sim, strategy, rankings):
+    """Buy towers for the coming wave until the next one is unaffordable."""
+    while True:
+        if strategy == 'cannons':
+            tower_type = 'cannon'
+        else:
+            tower_type = _build_order(sim.wave_manager.wave_number + 1,
+                                      len(sim.tower_manager.towers))
+        if sim.economy.coins < TOWER_COSTS[tower_type]:
+            return
+        for x, y in rankings[tower_type]:
+            if sim.path.is_buildable_tile(x, y):
+                sim.place_tower(tower_type, x, y)
+                break
+        else:
+            return  # Map is full
+
+
+def play_strategy(difficulty, strategy, seed, waves):
+    """Play a reference strategy for the given number of waves.
+
+    Returns the base HP fraction left after each wave (zeros once lost).
+    """
+    sim = Simulation(seed=seed, particles=False, difficulty=difficulty)
+    rankings = {t: _tile_ranking(sim.path, t) for t in TOWER_COSTS}
+    curve = []
+    for _ in range(waves):
+        _spend(sim, strategy, rankings)
+        sim.start_wave()
+        elapsed = 0.0
+        while sim.wave_manager.wave_in_progress and sim.state == 'playing' and elapsed < TUNER_MAX_WAVE_TIME:
+            sim.update(TUNER_DT)
+            elapsed += TUNER_DT
+        curve.append(sim.base.hp / BASE_HP)
+        if sim.state == 'gameover':
+            break
+    return curve + [0.0] * (waves - len(curve))
+
+
+def _play_job(job):
+    key, params, strategy, seed, waves = job
+    return key, play_strategy(params_to_difficulty(params), strategy, seed, waves)
+
+
+def params_to_difficulty(params):
+    difficulty = {stage: dict(DIFFICULTY[stage]) for stage in STAGES}
+    for (stage, knob), value in zip(PARAMS, params):
+        difficulty[stage][knob] = value
+    return difficulty
+
+
+def difficulty_to_params(difficulty):
+    return [difficulty[stage][knob] for stage, knob in PARAMS]
+
+
+def _job_key(params, strategy, seed, waves):
+    return json.dumps([params, strategy, seed, waves])
+
+
+class Tuner:
+    """Evolution-strategy search over DIFFICULTY with an on-disk game cache."""
+    def __init__(self, out_dir='tuning', targets=None, seeds=(0, 1), waves=20,
+                 population=12, elite=4, workers=None, rng_seed=0):
+        self.out_dir = out_dir
+        self.targets = targets or DEFAULT_TARGETS
+        self.seeds = list(seeds)
+        self.waves = waves
+        self.population = population
+        self.elite = elite
+        self.workers = workers or multiprocessing.cpu_count()
+        self.rng_seed = rng_seed
+        # Stages the played waves never reach keep their current multipliers
+        self.active = [STAGE_FIRST_WAVE[stage] <= waves for stage, _ in PARAMS]
+        self.cache_path = os.path.join(out_dir, 'cache.jsonl')
+        self.state_path = os.path.join(out_dir, 'state.json')
+        self.proposal_path = os.path.join(out_dir, 'proposed_difficulty.py')
+        os.makedirs(out_dir, exist_ok=True)
+        self.cache = self._load_cache()
+        self.state = self._load_state()
+
+    def _load_cache(self):
+        cache = {}
+        if os.path.exists(self.cache_path):
+            with open(self.cache_path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # Partly written line from an interrupted run
+                    cache[entry['key']] = entry['curve']
+        return cache
+
+    def _load_state(self):
+        # Only resume a search that used the same targets and settings
+        settings = {'targets': self.targets, 'seeds': self.seeds, 'waves': self.waves,
+                    'population': self.population, 'elite': self.elite}
+        if os.path.exists(self.state_path):
+            try:
+                with open(self.state_path) as f:
+                    state = json.load(f)
+                if state.get('settings') == settings:
+                    print(f"Resuming tuning at generation {state['generation']}")
+                    return state
+            except (OSError, ValueError) as e:
+                print(f"Failed to read tuner state, starting over: {e}")
+        return {
+            'settings': settings,
+            'generation': 0,
+            'mean': [math.log(v) for v in difficulty_to_params(DIFFICULTY)],
+            'sigma': [0.3] * len(PARAMS),
+            'best': None,
+        }
+
+    def _save_state(self):
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state, f, indent=1)
+        os.replace(tmp_path, self.state_path)
+
+    def error(self, params):
+        """Mean squared distance between the played and target survival curves."""
+        total = 0.0
+        count = 0
+        for strategy, target in self.targets.items():
+            target = target[:self.waves]
+            for seed in self.seeds:
+                curve = self.cache[_job_key(params, strategy, seed, self.waves)]
+                total += sum((c - t) ** 2 for c, t in zip(curve, target))
+                count += len(target)
+        return total / count
+
+    def evaluate(self, candidates, pool):
+        """Play every uncached (candidate, strategy, seed) game and return the errors."""
+        jobs = {}
+        for params in candidates:
+            for strategy in self.targets:
+                for seed in self.seeds:
+                    key = _job_key(params, strategy, seed, self.waves)
+                    if key not in self.cache and key not in jobs:
+                        jobs[key] = (key, params, strategy, seed, self.waves)
+        if jobs:
+            with open(self.cache_path, 'a') as f:
+                for key, curve in pool.imap_unordered(_play_job, jobs.values()):
+                    self.cache[key] = curve
+                    # Write as results arrive so an interruption loses little
+                    f.write(json.dumps({'key': key, 'curve': curve}) + '\n')
+                    f.flush()
+        return [self.error(params) for params in candidates]
+
+    def sample(self):
+        """Draw a population around the mean (the mean itself is always included)."""
+        state = self.state
+        # Seeded per generation, so a resumed run draws the same samples
+        rng = random.Random(self.rng_seed * 100003 + state['generation'])
+        candidates = [self._round(state['mean'])]
+        while len(candidates) < self.population:
+            point = [m + s * rng.gauss(0, 1) if active else m
+                     for m, s, active in zip(state['mean'], state['sigma'], self.active)]
+            candidates.append(self._round(point))
+        return candidates
+
+    @staticmethod
+    def _round(log_params):
+        # Rounding keeps the cache useful: nearby samples share games
+        return [round(min(PARAM_MAX, max(PARAM_MIN, math.exp(v))), 2) for v in log_params]
+
+    def step(self, pool):
+        """Run one generation and move the search distribution."""
+        state = self.state
+        candidates = self.sample()
+        errors = self.evaluate(candidates, pool)
+        ranked = sorted(zip(errors, candidates))
+        if state['best'] is None or ranked[0][0] < state['best']['error']:
+            state['best'] = {'error': ranked[0][0], 'params': ranked[0][1]}
+        elites = [[math.log(v) for v in params] for _, params in ranked[:self.elite]]
+        # Log-weighted recombination of the elites, as in CMA-ES
+        weights = [math.log(self.elite + 0.5) - math.log(i + 1) for i in range(self.elite)]
+        weight_sum = sum(weights)
+        new_mean = [sum(w * e[i] for w, e in zip(weights, elites)) / weight_sum
+                    for i in range(len(PARAMS))]
+        # Per-parameter step size from the elite spread, smoothed so it can't collapse at once
+        for i in range(len(PARAMS)):
+            spread = math.sqrt(sum(w * (e[i] - state['mean'][i]) ** 2
+                                   for w, e in zip(weights, elites)) / weight_sum)
+            state['sigma'][i] = max(0.02, 0.5 * state['sigma'][i] + 0.5 * spread)
+        state['mean'] = new_mean
+        state['generation'] += 1
+        self._save_state()
+        self.write_proposal()
+        return ranked[0]
+
+    def write_proposal(self):
+        """Write the best multipliers so far as a DIFFICULTY block for config.py."""
+        best = self.state['best']
+        difficulty = params_to_difficulty(best['params'])
+        lines = [
+            '# Proposed by core/tuner.py; copy into core/config.py to adopt.',
+            f"# Generation {self.state['generation']}, survival curve MSE {best['error']:.4f}",
+            f"# Strategies: {', '.join(self.targets)}; seeds: {self.seeds}; waves 1-{self.waves}",
+            'DIFFICULTY = {',
+        ]
+        for stage in STAGES:
+            knobs = ', '.join(f"'{knob}': {difficulty[stage][knob]}" for knob in KNOBS)
+            lines.append(f"    '{stage}': {{{knobs}}},")
+        lines.append('}')
+        lines.append('')
+        lines.append('# Survival curves with these multipliers (base HP fraction after each wave):')
+        for strategy, target in self.targets.items():
+            for seed in self.seeds:
+                curve = self.cache[_job_key(best['params'], strategy, seed, self.waves)]
+                lines.append(f"#   {strategy} seed {seed}: " + ' '.join(f'{c:.2f}' for c in curve))
+            lines.append(f"#   {strategy} target: " + ' '.join(f'{t:.2f}' for t in target[:self.waves]))
+        with open(self.proposal_path, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+
+    def run(self, generations):
+        pool = multiprocessing.get_context('spawn').Pool(self.workers, initializer=init_headless)
+        try:
+            while self.state['generation'] < generations:
+                error, params = self.step(pool)
+                print(f"Generation {self.state['generation']}: best {error:.4f} {params}"
+                      f" (overall {self.state['best']['error']:.4f})")
+        finally:
+            pool.terminate()
+        print(f"Proposal written to {self.proposal_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tune DIFFICULTY against target survival curves.')
+    parser.add_argument('--generations', type=int, default=12)
+    parser.add_argument('--population', type=int, default=12)
+    parser.add_argument('--elite', type=int, default=4)
+    parser.add_argument('--seeds', type=int, default=2, help='games per strategy and candidate')
+    parser.add_argument('--waves', type=int, default=20)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--targets', help='JSON file of {strategy: [hp fraction per wave]}')
+    parser.add_argument('--out', default='tuning')
+    args = parser.parse_args()
+
+    targets = None
+    if args.targets:
+        with open(args.targets) as f:
+            targets = json.load(f)
+        unknown = set(targets) - set(DEFAULT_TARGETS)
+        if unknown:
+            parser.error(f"Unknown strategies in targets: {', '.join(sorted(unknown))}")
+    tuner = Tuner(out_dir=args.out, targets=targets, seeds=range(args.seeds), waves=args.waves,
+                  population=args.population, elite=args.elite, workers=args.workers)
+    tuner.run(args.generations)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+import heapq
+
+# How repeated applications of the same effect combine:
+#   'strongest' - keep the stronger value; an equally strong one extends the duration
+#   'refresh'   - the new value and duration replace the old ones
+#   'stack'     - values add up (up to 'max_stacks'), duration is refreshed
+EFFECT_RULES = {
+    # Slow multiplies movement speed, so a lower factor is stronger
+    'slow': {'stacking': 'strongest', 'stronger': lambda new, old: new < old},
+}
+
+
+class EffectManager:
+    """Timed status effects (slow, future debuffs) for all monsters.
+
+    Each monster keeps its active effects in monster.effects as
+    kind -> [value, expires_at, token]. Expiry times live in one heap, so
+    nothing is decremented per monster per tick: an effect only costs work
+    when it is applied and when it runs out. Stale heap entries (effects
+    that were refreshed or replaced) are recognised by their token and
+    dropped when they surface.
+    """
+    def __init__(self):
+        self.time = 0.0
+        self._heap = []
+        self._next_token = 0
+
+    def apply(self, monster, kind, value, duration):
+        """Apply an effect to a monster, following the stacking rule for its kind."""
+        rule = EFFECT_RULES[kind]
+        expires_at = self.time + duration
+        current = monster.effects.get(kind)
+        if current is not None:
+            old_value, old_expiry = current[0], current[1]
+            stacking = rule['stacking']
+            if stacking == 'strongest':
+                stronger = rule['stronger'](value, old_value)
+                extends = value == old_value and expires_at > old_expiry
+                if not (stronger or extends):
+                    return
+            elif stacking == 'stack':
+                value = old_value + value
+                if 'max_stacks' in rule:
+                    value = min(value, rule['max_stacks'])
+        self._next_token += 1
+        monster.effects[kind] = [value, expires_at, self._next_token]
+        heapq.heappush(self._heap, (expires_at, self._next_token, kind, monster))
+        monster.on_effects_changed()
+
+    def restore(self, time, next_token, monsters):
+        """Set the effect clock and rebuild the expiry heap from the effects
+        stored on monsters (after rewinding to a snapshot)."""
+        self.time = time
+        self._next_token = next_token
+        self._heap = [(expires_at, token, kind, monster) for monster in monsters
+                      for kind, (value, expires_at, token) in monster.effects.items()]
+        heapq.heapify(self._heap)
+
+    def update(self, dt):
+        """Advance effect time and expire everything that ran out."""
+        self.time += dt
+        heap = self._heap
+        while heap and heap[0][0] <= self.time:
+            _, token, kind, monster = heapq.heappop(heap)
+            current = monster.effects.get(kind)
+            if current is not None and current[2] == token:
+                del monster.effects[kind]
+                monster.on_effects_changed()
@@ -0,0 +1,35 @@
+import pygame
+from core.config import TILE_SIZE, HEALTH_BAR_LEVELS
+
+# Bar size (width, height) per kind of health bar
+HEALTH_BAR_SIZES = {
+    'monster': (30, 4),
+    'boss': (30, 4),
+    'base': (TILE_SIZE, 5),
+}
+
+# Pre-rendered strips, keyed by kind: list of one subsurface per fill level
+_health_bar_strips = {}
+
+def _build_strip(width, height, levels):
+    """Render every fill level of a bar into one vertical strip surface."""
+    strip = pygame.Surface((width, height * (levels + 1)))
+    bars = []
+    for level in range(levels + 1):
+        y = level * height
+        strip.fill((255, 0, 0), (0, y, width, height))  # Background (red)
+        green_width = int(width * level / levels)
+        if green_width > 0:
+            strip.fill((0, 255, 0), (0, y, green_width, height))  # Foreground (green)
+        bars.append(strip.subsurface((0, y, width, height)))
+    return bars
+
+def get_health_bar(kind, fraction):
+    """Return the pre-rendered bar surface for a health fraction (0..1)."""
+    bars = _health_bar_strips.get(kind)
+    if bars is None:
+        width, height = HEALTH_BAR_SIZES[kind]
+        bars = _build_strip(width, height, HEALTH_BAR_LEVELS)
+        _health_bar_strips[kind] = bars
+    level = int(max(0.0, min(1.0, fraction)) * HEALTH_BAR_LEVELS)
+    return bars[level]
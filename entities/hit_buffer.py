@@ -0,0 +1,93 @@
+from entities.monster import play_monster_death_sound
+
+
+class HitBuffer:
+    """Collects projectile hits for one tick and resolves them in a single pass.
+
+    Towers only record hits while updating their projectiles. Damage, slows,
+    particles, death sounds and rewards are then applied once per tick by
+    resolve(), so a burst of splash hits costs one pass over the monsters.
+    """
+    def __init__(self):
+        self.hits = []     # (target, damage, slow, proj_color, proj_img, source)
+        self.splashes = [] # (center, radius, damage, slow, proj_color, proj_img, source)
+
+    def add(self, target, damage, slow=None, proj_color=None, proj_img=None, source=None):
+        """Record a single-target hit. slow is a (factor, duration) tuple or None,
+        source the tower that fired."""
+        self.hits.append((target, damage, slow, proj_color, proj_img, source))
+
+    def add_splash(self, center, radius, damage, slow=None, proj_color=None, proj_img=None, source=None):
+        """Record an area hit that damages every living monster within radius of center."""
+        self.splashes.append((center[0], center[1], radius * radius, damage, slow, proj_color, proj_img, source))
+
+    def resolve(self, monster_manager, economy, telemetry=None):
+        """Apply all recorded hits, then process deaths and rewards once.
+
+        With telemetry, each target also keeps the (tower, damage) of every
+        hit, so damage, overkill and kills can be credited per tower.
+        """
+        if not self.hits and not self.splashes:
+            return
+        track = telemetry is not None
+        # Accumulate per target: [monster, damage, slow, proj_color, proj_img, sources]
+        pending = {}
+        for target, damage, slow, proj_color, proj_img, source in self.hits:
+            self._accumulate(pending, target, damage, slow, proj_color, proj_img, source if track else None)
+        if self.splashes:
+            # One pass over the monsters tests every splash center of this tick
+            for monster in monster_manager.monsters:
+                if not monster.is_alive():
+                    continue
+                mx, my = monster.pos
+                for sx, sy, radius_sq, damage, slow, proj_color, proj_img, source in self.splashes:
+                    dx = mx - sx
+                    dy = my - sy
+                    if dx*dx + dy*dy <= radius_sq:
+                        self._accumulate(pending, monster, damage, slow, proj_color, proj_img,
+                                         source if track else None)
+        self.hits.clear()
+        self.splashes.clear()
+
+        particles = monster_manager.particles
+        reward = 0
+        dead_types = set()
+        for monster, damage, slow, proj_color, proj_img, sources in pending.values():
+            if not monster.is_alive():
+                # Already dead this tick (or a corpse): no extra reward or effects
+                if sources:
+                    telemetry.hits(monster, sources, 0, False)  # All overkill
+                continue
+            # One burst of particles per target, however many hits landed
+            hit_pos = (monster.pos[0], monster.pos[1] - monster.size)
+            particles.emit(hit_pos, monster.color, count=8)
+            if proj_color is not None:
+                particles.emit(hit_pos, proj_color, count=6, image=proj_img)
+            if slow is not None:
+                monster_manager.effects.apply(monster, 'slow', *slow)
+            hp_before = monster.hp
+            killed = monster.apply_damage(damage)
+            if killed:
+                reward += monster.reward
+                dead_types.add(monster.type)
+            if sources:
+                telemetry.hits(monster, sources, hp_before, killed)
+        # Deaths and rewards are processed once per tick
+        for monster_type in dead_types:
+            play_monster_death_sound(monster_type)
+        if reward:
+            economy.earn(reward)
+
+    @staticmethod
+    def _accumulate(pending, monster, damage, slow, proj_color, proj_img, source):
+        entry = pending.get(id(monster))
+        if entry is None:
+            pending[id(monster)] = [monster, damage, slow, proj_color, proj_img,
+                                    [(source, damage)] if source is not None else None]
+            return
+        entry[1] += damage
+        if source is not None:
+            entry[5].append((source, damage))
+        # Keep the strongest slow (lowest factor)
+        if slow is not None and (entry[2] is None or slow[0] < entry[2][0]):
+            entry[2] = slow
@@ -1,62 +1,93 @@
 import pygame
+import bisect
+import heapq
 import math
+import random
+from array import array
+from operator import attrgetter
 from core.config import *
+from core import audio
 from entities.particle import ParticleManager
-from entities.sprite_utils import load_sprite_sheet
-import os
+from entities.effects import EffectManager, EFFECT_RULES
+from entities.sprite_utils import get_monster_sprites
+from entities.health_bar import get_health_bar
+from core.render_queue import LAYER_GROUND, LAYER_ENTITIES, LAYER_OVERLAY, cull_bounds
+
+# Death sound per monster type (bosses use the same sound as their model)
+DEATH_SOUNDS = {'gnome': 'gnome_death.wav', 'fast_spider': 'spider_fast_death.wav',
+                'big_spider': 'spider_big_death.wav'}
+
+# Every monster's state is also kept in a flat float64 record in its
+# manager's records array, written whenever the state changes, so a history
+# snapshot (core/history.py) copies all monsters in one go. After the fields
+# below come value, expiry and token per effect kind.
+MONSTER_TYPES = list(MONSTER_STATS) + ['boss_gnome', 'boss_fast_spider', 'boss_big_spider']
+DIRECTIONS = ['down', 'up', 'left', 'right']
+DIRECTION_INDEX = {direction: i for i, direction in enumerate(DIRECTIONS)}
+EFFECT_KINDS = sorted(EFFECT_RULES)
+NONE = float('nan')  # Stands in for None (no flow target, no dead timer, a free record)
+(R_SEQ, R_TYPE, R_ROUTE, R_HP, R_MAX_HP, R_SPEED, R_REWARD, R_DISTANCE, R_X, R_Y, R_FLOW_X, R_FLOW_Y,
+ R_DIRECTION, R_FRAME, R_ANIM_TIMER, R_DEAD_TIMER, R_DEAD_DURATION, R_EFFECTS) = range(18)
+RECORD_FIELDS = R_EFFECTS + 3 * len(EFFECT_KINDS)
+EMPTY_RECORD = array('d', [NONE] * RECORD_FIELDS)
+# Monsters outside a manager (previews, benchmarks) all write to this one
+DETACHED_RECORDS = array('d', EMPTY_RECORD)
 
-death_sounds_loaded = False
 def play_monster_death_sound(monster_type):
     """Play the correct death sound for the monster type."""
-    global death_sounds_loaded, MONSTER_DEATH_SOUND, GNOME_DEATH_SOUND, SPIDER_FAST_DEATH_SOUND, SPIDER_BIG_DEATH_SOUND
-    if not death_sounds_loaded:
-        MONSTER_DEATH_SOUND = None
-        GNOME_DEATH_SOUND = None
-        SPIDER_FAST_DEATH_SOUND = None
-        SPIDER_BIG_DEATH_SOUND = None
-        try:
-            path = os.path.join('assets', 'sounds', 'monsters', 'death.wav')
-            if os.path.exists(path):
-                MONSTER_DEATH_SOUND = pygame.mixer.Sound(path)
-        except Exception as e:
-            print(f"Failed to load death.wav: {e}")
-        try:
-            path = os.path.join('assets', 'sounds', 'monsters', 'gnome_death.wav')
-            if os.path.exists(path):
-                GNOME_DEATH_SOUND = pygame.mixer.Sound(path)
-        except Exception as e:
-            print(f"Failed to load gnome_death.wav: {e}")
-        try:
-            path = os.path.join('assets', 'sounds', 'monsters', 'spider_fast_death.wav')
-            if os.path.exists(path):
-                SPIDER_FAST_DEATH_SOUND = pygame.mixer.Sound(path)
-        except Exception as e:
-            print(f"Failed to load spider_fast_death.wav: {e}")
-        try:
-            path = os.path.join('assets', 'sounds', 'monsters', 'spider_big_death.wav')
-            if os.path.exists(path):
-                SPIDER_BIG_DEATH_SOUND = pygame.mixer.Sound(path)
-        except Exception as e:
-            print(f"Failed to load spider_big_death.wav: {e}")
-        death_sounds_loaded = True
     # Always play generic death
-    if MONSTER_DEATH_SOUND:
-        MONSTER_DEATH_SOUND.play()
-    # Play specific sound for monster type (bosses use the same sound as their model)
-    if monster_type in ('gnome', 'boss_gnome') and GNOME_DEATH_SOUND:
-        GNOME_DEATH_SOUND.play()
-    elif monster_type in ('fast_spider', 'boss_fast_spider') and SPIDER_FAST_DEATH_SOUND:
-        SPIDER_FAST_DEATH_SOUND.play()
-    elif monster_type in ('big_spider', 'boss_big_spider') and SPIDER_BIG_DEATH_SOUND:
-        SPIDER_BIG_DEATH_SOUND.play()
+    audio.play_sound('monsters', 'death.wav')
+    name = DEATH_SOUNDS.get(monster_type.replace('boss_', ''))
+    if name:
+        audio.play_sound('monsters', name)
+
+def queue_monster_sprite(queue, sprite_type, size, is_boss, x, y, fade, hp_fraction, slowed, direction, frame):
+    """Queue a monster's sprite (and health bar) centred on (x, y).
+
+    fade is None for a living monster, or how much of a corpse is left (1 to 0).
+    """
+    sprites = get_monster_sprites(sprite_type, size, is_boss)
+    x, y = int(x), int(y)
+    # --- Dead monster image logic ---
+    if fade is not None:
+        # Fade out dead image using the pre-baked alpha steps
+        dead_fade = sprites['dead_fade']
+        dead_img = dead_fade[min(len(dead_fade) - 1, int(fade * len(dead_fade)))]
+        w, h = dead_img.get_size()
+        queue.add(LAYER_GROUND, dead_img, (x - w//2, y - h//2), y)
+        return
+    # Health bar from the pre-rendered strip
+    if hp_fraction < 1 or not HIDE_FULL_HEALTH_BARS:
+        bar = get_health_bar('boss' if is_boss else 'monster', hp_fraction)
+        if is_boss:
+            # Offset further up for boss (scaled sprite)
+            bar_y = y - size * 2 - 16
+        else:
+            bar_y = y - size - 8
+        queue.add(LAYER_OVERLAY, bar, (x - bar.get_width()//2, bar_y), y)
+    # Draw the correct directional frame for all monsters (bosses use scaled-up sprites)
+    # Visual indicator for slow: pre-tinted blue frames
+    frames = sprites['slowed'] if slowed else sprites['frames']
+    sprite = frames[direction][frame]
+    w, h = sprite.get_size()
+    queue.add(LAYER_ENTITIES, sprite, (x - w//2, y - h//2), y)
+
 
 class Monster:
-    """Base class for all monsters."""
-    def __init__(self, monster_type, path, base, economy, position_offset=0):
-        # ... existing code ...
-        self.slow_timer = 0
+    """Base class for all monsters.
+
+    Slotted: a monster holds only scalars and references to shared data
+    (its route, the per-model sprites), so big waves stay small in memory.
+    """
+    __slots__ = ('effects', 'slow_factor', 'type', 'path', 'base', 'economy', 'is_boss',
+                 'max_hp', 'hp', 'speed', 'size', 'color', 'reward', 'route_id', 'route', 'distance',
+                 'pos', 'flow_target', 'sprite_type', 'anim_direction', 'anim_frame', 'anim_timer',
+                 'anim_delay', 'dead_timer', 'dead_duration', 'records', 'record')
+
+    def __init__(self, monster_type, path, base, economy, position_offset=0, route_id=0):
+        # Active status effects, managed by MonsterManager.effects
+        self.effects = {}
         self.slow_factor = 1.0
-        self._original_speed = None
 
         self.type = monster_type
         self.path = path
@@ -83,109 +114,47 @@ class Monster:
         self.color = stats['color']
         self.reward = stats['reward']
         
-        # Position and movement
-        self.path_index = 0
-        # Offset the starting position along the path if requested
-        if position_offset == 0:
-            self.pos = list(self.path.points[0])
-        else:
-            # Move position_offset pixels along the path direction
-            if len(self.path.points) > 1:
-                x0, y0 = self.path.points[0]
-                x1, y1 = self.path.points[1]
-                dx = x1 - x0
-                dy = y1 - y0
-                dist = math.hypot(dx, dy)
-                if dist > 0:
-                    ox = dx / dist * position_offset
-                    oy = dy / dist * position_offset
-                    self.pos = [x0 + ox, y0 + oy]
-                    # --- Fix: If the monster is closer to point 1 than point 0, increment path_index ---
-                    d0 = math.hypot(self.pos[0] - x0, self.pos[1] - y0)
-                    d1 = math.hypot(self.pos[0] - x1, self.pos[1] - y1)
-                    if d1 < d0:
-                        self.path_index = 1
-                else:
-                    self.pos = list(self.path.points[0])
-            else:
-                self.pos = list(self.path.points[0])
-
-        # Sprite animation for gnome
-        def load_and_scale(path):
-            img = pygame.image.load(path).convert_alpha()
-            scale = 2.0 if self.is_boss else 1.0
-            scaled_size = int(self.size*2*scale)
-            return pygame.transform.smoothscale(img, (scaled_size, scaled_size))
-
-        if sprite_type == 'gnome':
-            self.anim_frames = {
-                'up':   [load_and_scale(f'assets/monsters/gnome/gnome_up{i}.png') for i in range(1, 4)],
-                'left': [load_and_scale(f'assets/monsters/gnome/gnome_left{i}.png') for i in range(1, 4)],
-                'right':[load_and_scale(f'assets/monsters/gnome/gnome_right{i}.png') for i in range(1, 4)],
-                'down': [load_and_scale(f'assets/monsters/gnome/gnome_up1.png')]*3
-            }
-            # Death image: gnome_right3 rotated -90 degrees (laying on back)
-            base_img = pygame.image.load('assets/monsters/gnome/gnome_right3.png').convert_alpha()
-            scale = 2.0 if self.is_boss else 1.0
-            scaled_size = int(self.size*2*scale)
-            base_img = pygame.transform.smoothscale(base_img, (scaled_size, scaled_size))
-            self.dead_image = pygame.transform.rotate(base_img, -90)
-            self.anim_direction = 'down'
-            self.anim_frame = 0
-            self.anim_timer = 0
-            self.anim_delay = 0.15
-            self._last_pos = self.pos[:]
-            self.dead_timer = None
-            self.dead_duration = 2.0  # seconds
-        elif sprite_type == 'fast_spider':
-            self.anim_frames = {
-                'up':   [load_and_scale(f'assets/monsters/spider_fast/up{i}.png') for i in range(1, 4)],
-                'left': [load_and_scale(f'assets/monsters/spider_fast/left{i}.png') for i in range(1, 4)],
-                'right':[load_and_scale(f'assets/monsters/spider_fast/right{i}.png') for i in range(1, 4)],
-                'down': [load_and_scale(f'assets/monsters/spider_fast/up1.png')]*3
-            }
-            # Death image for fast spider (boss and normal)
-            img = pygame.image.load('assets/monsters/spider_fast/dead.png').convert_alpha()
-            scale = 2.0 if self.is_boss else 1.0
-            scaled_size = int(self.size*2*scale)
-            self.dead_image = pygame.transform.smoothscale(img, (scaled_size, scaled_size))
-            self.anim_direction = 'down'
-            self.anim_frame = 0
-            self.anim_timer = 0
-            self.anim_delay = 0.10
-            self._last_pos = self.pos[:]
-            self.dead_timer = None
-            self.dead_duration = 2.0  # seconds
-        elif sprite_type == 'big_spider':
-            self.anim_frames = {
-                'up':   [load_and_scale(f'assets/monsters/spider_big/up{i}.png') for i in range(1, 4)],
-                'left': [load_and_scale(f'assets/monsters/spider_big/left{i}.png') for i in range(1, 4)],
-                'right':[load_and_scale(f'assets/monsters/spider_big/right{i}.png') for i in range(1, 4)],
-                'down': [load_and_scale(f'assets/monsters/spider_big/up1.png')]*3
-            }
-            # Death image for big spider (boss and normal)
-            img = pygame.image.load('assets/monsters/spider_big/dead.png').convert_alpha()
-            scale = 2.0 if self.is_boss else 1.0
-            scaled_size = int(self.size*2*scale)
-            self.dead_image = pygame.transform.smoothscale(img, (scaled_size, scaled_size))
-            self.anim_direction = 'down'
-            self.anim_frame = 0
-            self.anim_timer = 0
-            self.anim_delay = 0.20
-            self._last_pos = self.pos[:]
-            self.dead_timer = None
-            self.dead_duration = 2.0  # seconds
-        
+        # Position and movement: the route (shared with every monster on it)
+        # and how far along it the monster is, starting position_offset pixels in
+        self.route_id = route_id
+        self.route = path.routes[route_id]
+        self.distance = position_offset if path.flow is None else 0
+        self.pos = list(self.route.position_at(self.distance))
+        # Flow maps: the tile centre being walked to (the spawn tile at first)
+        self.flow_target = self.route.points[0] if path.flow is not None else None
+
+        # Sprites are shared per model (see get_monster_sprites), loaded on first draw
+        self.sprite_type = sprite_type
+        self.anim_direction = 'down'
+        self.anim_frame = 0
+        self.anim_timer = 0
+        self.anim_delay = {'gnome': 0.15, 'fast_spider': 0.10, 'big_spider': 0.20}[sprite_type]
+        self.dead_timer = None
+        self.dead_duration = 2.0  # seconds
+        # The array holding this monster's record and where it starts (see MonsterManager.attach)
+        self.records = DETACHED_RECORDS
+        self.record = 0
+
+    def write_record(self, seq):
+        """Write the monster's whole state into its record."""
+        flow_x, flow_y = self.flow_target or (NONE, NONE)
+        r = self.record
+        self.records[r:r + R_EFFECTS] = array('d', (
+            seq, MONSTER_TYPES.index(self.type), self.route_id, self.hp, self.max_hp, self.speed,
+            self.reward, self.distance, self.pos[0], self.pos[1], flow_x, flow_y,
+            DIRECTION_INDEX[self.anim_direction], self.anim_frame, self.anim_timer,
+            NONE if self.dead_timer is None else self.dead_timer, self.dead_duration))
+        self.write_effects()
+
+    def write_effects(self):
+        """Write the active effects into the record."""
+        r = self.record + R_EFFECTS
+        for kind in EFFECT_KINDS:
+            self.records[r:r + 3] = array('d', self.effects.get(kind) or EMPTY_RECORD[:3])
+            r += 3
+
     def update(self, dt):
-        # Handle slow timer
-        if self.slow_timer > 0:
-            self.slow_timer -= dt
-            if self.slow_timer <= 0:
-                # Restore speed
-                if self._original_speed is not None:
-                    self.speed = self._original_speed
-                self.slow_factor = 1.0
-                self._original_speed = None
+        rec, r = self.records, self.record
         if not self.is_alive():
             # For spiders and gnomes, start/update dead timer
             if self.type in ('fast_spider', 'big_spider', 'gnome', 'boss_gnome'):
@@ -193,123 +162,131 @@ class Monster:
                     self.dead_timer = 0
                 else:
                     self.dead_timer += dt
+                rec[r + R_DEAD_TIMER] = self.dead_timer
             return
 
-        # Animation direction and frame update for all monsters with animation
-        if hasattr(self, 'anim_frames'):
-            dx = self.pos[0] - self._last_pos[0]
-            dy = self.pos[1] - self._last_pos[1]
-            if abs(dx) > abs(dy):
-                if dx > 0:
-                    self.anim_direction = 'right'
-                elif dx < 0:
-                    self.anim_direction = 'left'
-            else:
-                if dy < 0:
-                    self.anim_direction = 'up'
-                elif dy > 0:
-                    self.anim_direction = 'down'
-            self._last_pos = self.pos[:]
-            # Animate
-            self.anim_timer += dt
-            if self.anim_timer >= self.anim_delay:
-                self.anim_frame = (self.anim_frame + 1) % 3
-                self.anim_timer = 0
-
-        # Get current target point
-        if self.path_index >= len(self.path.points):
-            # Reached end of path
-            if self.is_boss:
-                # Boss instantly defeats the player
-                self.base.hp = 0
+        # Animate
+        self.anim_timer += dt
+        if self.anim_timer >= self.anim_delay:
+            self.anim_frame = (self.anim_frame + 1) % 3
+            self.anim_timer = 0
+            rec[r + R_FRAME] = self.anim_frame
+        rec[r + R_ANIM_TIMER] = self.anim_timer
+
+        start_x, start_y = self.pos
+        move_dist = self.speed * dt * self.slow_factor
+        flow = self.path.flow
+        if flow is None:
+            # Walk along the route. The record keeps only the distance: the
+            # position follows from it
+            self.distance += move_dist
+            rec[r + R_DISTANCE] = self.distance
+            if self.distance >= self.route.length:
+                # Reached end of path
+                self.reach_base()
+                return
+            self.pos[0], self.pos[1] = self.route.position_at(self.distance)
+        else:
+            # Flow maps: walk tile to tile down the shared distance field
+            if self.flow_target is not None and not flow.is_walkable_point(self.flow_target):
+                self.flow_target = flow.next_point(self.pos)  # A tower went up on the next tile
+            if self.flow_target is None:
+                self.reach_base()
+                return
+            target = self.flow_target
+            # Calculate direction to target
+            dx = target[0] - self.pos[0]
+            dy = target[1] - self.pos[1]
+            dist = math.sqrt(dx*dx + dy*dy)
+            if dist < 2:  # Close enough to target
+                self.flow_target = flow.next_point(target)
+            elif move_dist >= dist:
+                # Would overshoot: stop on the point (large steps could otherwise oscillate around it)
+                self.pos[0], self.pos[1] = target
+                self.flow_target = flow.next_point(target)
             else:
-                self.base.take_damage(10)
-            self.hp = 0
-            return
-        target = self.path.points[self.path_index]
-        # Calculate direction to target
-        dx = target[0] - self.pos[0]
-        dy = target[1] - self.pos[1]
-        dist = math.sqrt(dx*dx + dy*dy)
-        if dist < 2:  # Close enough to target
-            self.path_index += 1
+                # Move towards target
+                self.pos[0] += (dx/dist) * move_dist
+                self.pos[1] += (dy/dist) * move_dist
+            rec[r + R_X], rec[r + R_Y] = self.pos
+            rec[r + R_FLOW_X], rec[r + R_FLOW_Y] = self.flow_target or (NONE, NONE)
+
+        # Face the way the monster just moved
+        dx = self.pos[0] - start_x
+        dy = self.pos[1] - start_y
+        direction = self.anim_direction
+        if abs(dx) > abs(dy):
+            if dx > 0:
+                direction = 'right'
+            elif dx < 0:
+                direction = 'left'
         else:
-            # Move towards target
-            move_dist = self.speed * dt * self.slow_factor
-            self.pos[0] += (dx/dist) * move_dist
-            self.pos[1] += (dy/dist) * move_dist
-    
-    def take_damage(self, amount, particle_manager=None):
-        """Take damage and return True if killed. Optionally emit a hit particle effect."""
+            if dy < 0:
+                direction = 'up'
+            elif dy > 0:
+                direction = 'down'
+        if direction != self.anim_direction:
+            self.anim_direction = direction
+            rec[r + R_DIRECTION] = DIRECTION_INDEX[direction]
+
+    @property
+    def path_index(self):
+        """Index of the route point the monster is walking to."""
+        return bisect.bisect_right(self.route.arc_lengths, self.distance)
+
+    def reach_base(self):
+        """The monster got through: damage the base and remove the monster."""
+        if self.is_boss:
+            # Boss instantly defeats the player
+            self.base.hp = 0
+        else:
+            self.base.take_damage(10)
+        self.hp = 0
+        self.records[self.record + R_HP] = 0
+        self.records[self.record + R_X], self.records[self.record + R_Y] = self.pos
+
+    def apply_damage(self, amount):
+        """Subtract hp and return True if this damage killed the monster.
+
+        Side effects (particles, death sounds, rewards) are handled by the
+        tower manager's HitBuffer once per tick.
+        """
+        was_alive = self.is_alive()
         self.hp -= amount
-        if particle_manager:
-            particle_manager.emit((self.pos[0], self.pos[1] - self.size), self.color, count=8)
-        if not self.is_alive():
-            # Play death sounds
-            play_monster_death_sound(self.type)
-            # Give reward to player when monster dies
-            self.economy.earn(self.reward)
-            return True
-        return False
+        self.records[self.record + R_HP] = self.hp
+        return was_alive and not self.is_alive()
         
     def is_alive(self):
         return self.hp > 0
         
-    def apply_slow(self, factor, duration):
-        # Only apply if stronger or not already slowed
-        if self.slow_timer <= 0 or factor < self.slow_factor:
-            if self._original_speed is None:
-                self._original_speed = self.speed
-            self.slow_factor = factor
-            self.speed = self._original_speed * factor
-            self.slow_timer = duration
-
-    def draw(self, screen):
-        # --- Dead monster image logic (for any monster with dead_image and dead_timer) ---
-        if hasattr(self, 'dead_image') and self.dead_timer is not None and self.dead_timer < self.dead_duration:
-            sprite_rect = self.dead_image.get_rect(center=(int(self.pos[0]), int(self.pos[1])))
-            # Fade out dead image over dead_duration
-            fade_alpha = int(255 * (1 - self.dead_timer / self.dead_duration))
-            dead_img = self.dead_image.copy()
-            dead_img.set_alpha(max(0, min(255, fade_alpha)))
-            screen.blit(dead_img, sprite_rect)
-            return
-        if not self.is_alive():
+    def on_effects_changed(self):
+        """Called by the EffectManager whenever an effect is applied or expires."""
+        slow = self.effects.get('slow')
+        self.slow_factor = slow[0] if slow else 1.0
+        self.write_effects()
+
+    def corpse_fade(self):
+        """None while alive, how much of the corpse is left (1 to 0) while it
+        fades, or 0 once it is gone."""
+        if self.is_alive():
+            return None
+        if self.dead_timer is not None and self.dead_timer < self.dead_duration:
+            return 1 - self.dead_timer / self.dead_duration
+        return 0
+
+    def queue_draw(self, queue):
+        """Add this monster's sprite (and health bar) to the frame's render queue."""
+        fade = self.corpse_fade()
+        if fade == 0:
             return
-        # Draw health bar
-        hp_width = 30
-        hp_height = 4
-        hp_x = self.pos[0] - hp_width//2
-        if self.is_boss:
-            # Offset further up for boss (scaled sprite)
-            hp_y = self.pos[1] - self.size * 2 - 16
-        else:
-            hp_y = self.pos[1] - self.size - 8
-        # Background (red)
-        pygame.draw.rect(screen, (255, 0, 0),
-                        (hp_x, hp_y, hp_width, hp_height))
-        # Foreground (green)
-        green_width = int(hp_width * (self.hp / self.max_hp))
-        pygame.draw.rect(screen, (0, 255, 0),
-                        (hp_x, hp_y, green_width, hp_height))
-        # Draw monster shape based on type
-        # Draw the correct directional frame for all monsters (bosses use scaled-up sprites)
-        sprite = self.anim_frames[self.anim_direction][self.anim_frame]
-        sprite_rect = sprite.get_rect(center=(int(self.pos[0]), int(self.pos[1])))
-        # Visual indicator for slow: blue overlay
-        if self.slow_timer > 0:
-            temp_sprite = sprite.copy()
-            blue_overlay = pygame.Surface(temp_sprite.get_size(), pygame.SRCALPHA)
-            blue_overlay.fill((80, 180, 255, 70))
-            temp_sprite.blit(blue_overlay, (0, 0), special_flags=pygame.BLEND_RGBA_ADD)
-            screen.blit(temp_sprite, sprite_rect)
-        else:
-            screen.blit(sprite, sprite_rect)
+        queue_monster_sprite(queue, self.sprite_type, self.size, self.is_boss, self.pos[0], self.pos[1],
+                             fade, self.hp / self.max_hp, 'slow' in self.effects,
+                             self.anim_direction, self.anim_frame)
 
 
 class MonsterManager:
     """Manages all monsters in the game."""
-    def __init__(self, path, economy):
+    def __init__(self, path, economy, rng=None, difficulty=None, endless=False):
         self.monsters = []
         self.path = path
         self.economy = economy
@@ -317,8 +294,114 @@ class MonsterManager:
         self.spawn_timer = 0
         self.wave_in_progress = False
         self.monsters_to_spawn = []
+        # How far through monsters_to_spawn the wave is. The list itself is
+        # left alone once the wave starts, so history snapshots can share it
+        self.spawn_index = 0
         self.particles = ParticleManager()
-    
+        self.effects = EffectManager()
+        # Random source for spawn patterns (a seeded random.Random in simulations)
+        self.rng = rng if rng is not None else random
+        # Per-stage health/count/delay multipliers (see DIFFICULTY in config)
+        self.difficulty = difficulty if difficulty is not None else DIFFICULTY
+        self.stage_scale = None
+        self.endless = endless  # Generate waves past the boss wave
+        self.endless_delay = 1.0
+        self.corpse_duration = 2.0  # How long corpses fade (lowered by the quality governor)
+        self.next_route = 0  # Monsters are sent down the map's routes in turn
+        # Per route: (distances, monsters) of the living monsters on it, sorted
+        # by distance and rebuilt every tick, so towers look up a stretch of
+        # route with a bisect instead of testing every monster
+        self.route_index = [([], []) for _ in path.routes]
+        self.telemetry = None  # Set by Telemetry.attach
+        # One record per monster (see RECORD_FIELDS). Freed records are reused
+        # lowest first, so the layout only depends on what happened in the game
+        self.records = array('d')
+        self.free_records = []  # Heap of record offsets
+        self.spawned = 0  # Sequence number of the next monster, keeps the spawn order in the records
+
+    def stage_scale_for(self, wave_number):
+        """Difficulty multipliers for the wave's stage, or None for the boss wave."""
+        if wave_number <= 5:
+            return self.difficulty['early']
+        elif wave_number <= 15:
+            return self.difficulty['mid']
+        elif wave_number <= 20:
+            return self.difficulty['late']
+        return None
+
+    def scale_spawn_counts(self, count_scale):
+        """Scale how many of each monster type the wave spawns, keeping the order."""
+        counts = {}
+        for monster_type in self.monsters_to_spawn:
+            counts[monster_type] = counts.get(monster_type, 0) + 1
+        self.monsters_to_spawn = []
+        for monster_type, count in counts.items():
+            self.monsters_to_spawn += [monster_type] * max(1, round(count * count_scale))
+
+    def endless_wave(self, wave_number):
+        """Monsters for a procedural wave after the boss wave.
+
+        Counts grow geometrically from ENDLESS_BASE_COUNTS and the mix is
+        shuffled. The whole wave spawns over ENDLESS_WAVE_DURATION, so the
+        number of monsters on screen grows with it.
+        """
+        growth = ENDLESS_GROWTH ** (wave_number - TOTAL_WAVES - 1)
+        monsters = []
+        for monster_type, count in ENDLESS_BASE_COUNTS.items():
+            monsters += [monster_type] * round(count * growth)
+        self.rng.shuffle(monsters)
+        self.endless_delay = ENDLESS_WAVE_DURATION / len(monsters)
+        return monsters
+
+    def spawn_monster(self, monster_type, position_offset=0, route_id=None):
+        """Add a monster at the start of a route (the next one in turn if not
+        given) with its wave reward and scaled health. Returns the monster."""
+        if route_id is None:
+            route_id = self.next_route
+            self.next_route = (self.next_route + 1) % len(self.path.routes)
+        monster = Monster(monster_type, self.path, self.base, self.economy,
+                          position_offset=position_offset, route_id=route_id)
+        # Dynamic gnome reward: use config for early waves
+        if monster_type == 'gnome':
+            if self.current_wave <= 5:
+                monster.reward = WAVE_CONFIGS['early']['gnome']['reward'](self.current_wave)
+            elif self.current_wave <= 15:
+                monster.reward = 8 + (self.current_wave // 4)  # 8-11 gold
+            else:
+                monster.reward = 10 + (self.current_wave // 5)  # 10-14 gold
+        monster.dead_duration = self.corpse_duration
+        if self.stage_scale is not None and self.stage_scale['health'] != 1.0:
+            monster.max_hp = max(1, round(monster.max_hp * self.stage_scale['health']))
+            monster.hp = monster.max_hp
+        self.attach(monster)
+        self.monsters.append(monster)
+        if self.telemetry is not None:
+            self.telemetry.spawned_monster(monster)
+        return monster
+
+    def next_spawn(self):
+        """Take the next monster type off the wave's spawn list."""
+        monster_type = self.monsters_to_spawn[self.spawn_index]
+        self.spawn_index += 1
+        return monster_type
+
+    def attach(self, monster):
+        """Give a new monster a record and write its state into it."""
+        if self.free_records:
+            record = heapq.heappop(self.free_records)
+        else:
+            record = len(self.records)
+            self.records.extend(EMPTY_RECORD)
+        monster.records, monster.record = self.records, record
+        monster.write_record(self.spawned)
+        self.spawned += 1
+
+    def release(self, monster):
+        """Free a removed monster's record."""
+        self.records[monster.record + R_SEQ] = NONE
+        heapq.heappush(self.free_records, monster.record)
+        monster.records, monster.record = DETACHED_RECORDS, 0
+
     def start_wave(self, wave_number, base):
         self.base = base  # Store base reference
         self.current_wave = wave_number  # Store for dynamic rewards
@@ -401,35 +484,16 @@ class MonsterManager:
         self.wave_in_progress = True
         self.spawn_timer = 0
         # Play wave start sound for normal waves, warning/danger for every 5th wave
-        import os
         if wave_number % 5 == 0:
-            # Load warning/danger sounds if needed
-            if not hasattr(MonsterManager, 'warning_sound'):
-                try:
-                    MonsterManager.warning_sound = pygame.mixer.Sound(os.path.join('assets', 'sounds', 'UI', 'warning.wav'))
-                except Exception as e:
-                    print(f"Failed to load warning sound: {e}")
-            if not hasattr(MonsterManager, 'danger_sound'):
-                try:
-                    MonsterManager.danger_sound = pygame.mixer.Sound(os.path.join('assets', 'sounds', 'UI', 'danger.wav'))
-                except Exception as e:
-                    print(f"Failed to load danger sound: {e}")
             # Play warning and danger at the same time, then chain a second danger after the first danger finishes
-            if getattr(MonsterManager, 'warning_sound', None):
-                MonsterManager.warning_sound.play()
-            if getattr(MonsterManager, 'danger_sound', None):
-                MonsterManager.danger_sound.play()
+            audio.play_sound('UI', 'warning.wav')
+            danger_sound = audio.play_sound('UI', 'danger.wav')
+            if danger_sound:
                 # Schedule only the second danger sound to play after the first finishes
-                pygame.time.set_timer(pygame.USEREVENT + 50, int(MonsterManager.danger_sound.get_length() * 1000), loops=1)
+                pygame.time.set_timer(pygame.USEREVENT + 50, int(danger_sound.get_length() * 1000), loops=1)
                 MonsterManager._danger_sounds_left = 1
         else:
-            if not hasattr(MonsterManager, 'wave_start_sound'):
-                try:
-                    MonsterManager.wave_start_sound = pygame.mixer.Sound(os.path.join('assets', 'sounds', 'UI', 'wave_start.wav'))
-                except Exception as e:
-                    print(f"Failed to load wave_start sound: {e}")
-            if getattr(MonsterManager, 'wave_start_sound', None):
-                MonsterManager.wave_start_sound.play()
+            audio.play_sound('UI', 'wave_start.wav')
 
         # Every 5th wave is a challenge wave: spawn 1.5x monsters
         challenge_wave = (wave_number % 5 == 0 and wave_number <= 20)
@@ -505,27 +569,47 @@ class MonsterManager:
         else:
             # Final Boss Wave: Giant version of each monster
             self.monsters_to_spawn = ['boss_gnome', 'boss_fast_spider', 'boss_big_spider']
+        if wave_number > TOTAL_WAVES:
+            # Past the boss wave. A normal game has been won by now and the
+            # simulation marks it completed on the next tick, so nothing spawns
+            self.monsters_to_spawn = self.endless_wave(wave_number) if self.endless else []
+        self.stage_scale = self.stage_scale_for(wave_number)
+        if self.stage_scale is not None and self.stage_scale['count'] != 1.0:
+            self.scale_spawn_counts(self.stage_scale['count'])
         self.wave_in_progress = True
         self.spawn_timer = 0
+        self.spawn_index = 0
     
     def update(self, dt):
-        # Update existing monsters
-        for monster in self.monsters:
-            monster.update(dt)
-        # Only remove monsters after dead image duration if they have a dead_image (fade-out)
-        new_monsters = []
+        # Expire status effects, then update existing monsters
+        self.effects.update(dt)
+        if self.telemetry is None:
+            for monster in self.monsters:
+                monster.update(dt)
+        else:
+            # A living monster only dies in its own update by reaching the base
+            for monster in self.monsters:
+                alive = monster.is_alive()
+                monster.update(dt)
+                if alive and not monster.is_alive():
+                    self.telemetry.leaked(monster)
+        # Only remove dead monsters after their fade-out duration
+        kept = []
         for m in self.monsters:
-            if hasattr(m, 'dead_image'):
-                if m.is_alive() or (m.dead_timer is not None and m.dead_timer < m.dead_duration):
-                    new_monsters.append(m)
+            if m.is_alive() or (m.dead_timer is not None and m.dead_timer < m.dead_duration):
+                kept.append(m)
             else:
-                if m.is_alive():
-                    new_monsters.append(m)
-        self.monsters = new_monsters
+                self.release(m)
+        self.monsters = kept
+        self.cull_corpses()
+        if not self.monsters and self.records:
+            # Between waves: start the records afresh so snapshots stay small
+            del self.records[:]
+            self.free_records = []
         self.particles.update(dt)
         
         # Spawn new monsters
-        if self.wave_in_progress and self.monsters_to_spawn:
+        if self.wave_in_progress and self.spawn_index < len(self.monsters_to_spawn):
             self.spawn_timer += dt
             boss_types = {'boss_gnome', 'boss_fast_spider', 'boss_big_spider'}
             # Use config for gnome spawn delay (early/mid/late)
@@ -535,50 +619,62 @@ class MonsterManager:
                 spawn_delay = WAVE_CONFIGS['mid']['gnome']['delay']
             elif self.current_wave <= 20:
                 spawn_delay = WAVE_CONFIGS['late']['gnome']['delay']
+            elif self.current_wave > TOTAL_WAVES:
+                spawn_delay = self.endless_delay
             else:
-                spawn_delay = 5.0 if self.monsters_to_spawn[0] in boss_types else 1.0
+                spawn_delay = 5.0 if self.monsters_to_spawn[self.spawn_index] in boss_types else 1.0
+            if self.stage_scale is not None:
+                spawn_delay *= self.stage_scale['delay']
             if self.spawn_timer >= spawn_delay:
-                monster_type = self.monsters_to_spawn.pop(0)
-                # Dynamic gnome reward: use config for early waves
-                if monster_type == 'gnome':
-                    if self.current_wave <= 5:
-                        reward = WAVE_CONFIGS['early']['gnome']['reward'](self.current_wave)
-                    elif self.current_wave <= 15:
-                        reward = 8 + (self.current_wave // 4)  # 8-11 gold
-                    else:
-                        reward = 10 + (self.current_wave // 5)  # 10-14 gold
-                    monster = Monster(monster_type, self.path, self.base, self.economy)
-                    monster.reward = reward
-                    self.monsters.append(monster)
-                else:
-                    self.monsters.append(Monster(monster_type, self.path, self.base, self.economy))
+                leader = self.spawn_monster(self.next_spawn())
                 self.spawn_timer = 0  # Reset timer
 
                 # Starting on wave 5, 60% chance to immediately spawn next monster (not on boss wave)
-                import random
-                if self.current_wave >= 5 and self.current_wave != 21 and self.monsters_to_spawn:
-                    if random.random() < 0.6:
-                        monster_type = self.monsters_to_spawn.pop(0)
-                        if monster_type == 'gnome':
-                            if self.current_wave <= 5:
-                                reward = WAVE_CONFIGS['early']['gnome']['reward'](self.current_wave)
-                            elif self.current_wave <= 15:
-                                reward = 8 + (self.current_wave // 4)  # 8-11 gold
-                            else:
-                                reward = 10 + (self.current_wave // 5)  # 10-14 gold
-                            monster = Monster(monster_type, self.path, self.base, self.economy, position_offset=18)
-                            monster.reward = reward
-                            self.monsters.append(monster)
-                        else:
-                            self.monsters.append(Monster(monster_type, self.path, self.base, self.economy, position_offset=18))
-                        last_spawn_offset = 0
-
-
-        if not self.monsters_to_spawn and not self.monsters:
+                if self.current_wave >= 5 and self.current_wave != 21 and self.spawn_index < len(self.monsters_to_spawn):
+                    if self.rng.random() < 0.6:
+                        self.spawn_monster(self.next_spawn(), position_offset=18,
+                                           route_id=leader.route_id)
+
+        if self.spawn_index >= len(self.monsters_to_spawn) and not self.monsters:
             self.wave_in_progress = False
+        self.index_routes()
+
+    def index_routes(self):
+        """Rebuild route_index from the living monsters' route distances."""
+        if self.path.flow is not None:
+            return  # Flow monsters aren't on a route
+        buckets = [[] for _ in self.route_index]
+        for monster in self.monsters:
+            if monster.is_alive():
+                buckets[monster.route_id].append(monster)
+        for route_id, bucket in enumerate(buckets):
+            # Monsters mostly keep their order, so this sort is close to linear
+            bucket.sort(key=attrgetter('distance'))
+            self.route_index[route_id] = ([monster.distance for monster in bucket], bucket)
+
+    def set_corpse_duration(self, duration):
+        """Change the corpse fade time for new and existing monsters."""
+        self.corpse_duration = duration
+        for monster in self.monsters:
+            monster.dead_duration = duration
+            monster.records[monster.record + R_DEAD_DURATION] = duration
+
+    def cull_corpses(self):
+        """Drop the oldest corpses when more than MAX_CORPSES are fading out."""
+        corpses = [m for m in self.monsters if m.dead_timer is not None]
+        if len(corpses) <= MAX_CORPSES:
+            return
+        corpses.sort(key=lambda m: m.dead_timer, reverse=True)
+        culled = set(map(id, corpses[:len(corpses) - MAX_CORPSES]))
+        for monster in corpses[:len(corpses) - MAX_CORPSES]:
+            self.release(monster)
+        self.monsters = [m for m in self.monsters if id(m) not in culled]
 
-    def draw(self, screen):
+    def queue_draw(self, queue, view=None):
+        """Queue the monsters and particles that can be seen in view."""
+        left, top, right, bottom = cull_bounds(view)
         for monster in self.monsters:
-            monster.draw(screen)
-        # Particle drawing is now handled by the tower manager for projectile effects
-        # self.particles.draw(screen)
+            x, y = monster.pos
+            if left < x < right and top < y < bottom:
+                monster.queue_draw(queue)
+        self.particles.queue_draw(queue, view)
@@ -1,8 +1,12 @@
 import pygame
 import random
 import math
+from core.config import MAX_PARTICLES
+from core.render_queue import LAYER_EFFECTS, cull_bounds
 
 class Particle:
+    __slots__ = ('x', 'y', 'dx', 'dy', 'life', 'color', 'radius', 'image', 'rotation', 'scale')
+
     def __init__(self, pos, color, image=None):
         self.x, self.y = pos
         angle = random.uniform(0, 2 * 3.14159)
@@ -22,22 +26,32 @@ class Particle:
         self.life -= dt
         self.radius = max(0, self.radius - 8 * dt)
 
-    def draw(self, screen):
-        if self.life > 0 and (self.radius > 0 or self.image):
-            if self.image:
-                # Draw small, rotated, faded version of the projectile image
-                img = pygame.transform.rotozoom(self.image, self.rotation, self.scale)
-                img.set_alpha(max(0, int(255 * (self.life / 0.3))))
-                rect = img.get_rect(center=(int(self.x), int(self.y)))
-                screen.blit(img, rect)
-            else:
-                pygame.draw.circle(screen, self.color, (int(self.x), int(self.y)), int(self.radius))
+    def draw(self, screen, offset=(0, 0)):
+        pygame.draw.circle(screen, self.color, (int(self.x) + offset[0], int(self.y) + offset[1]), int(self.radius))
+
+    def image_sprite(self):
+        """Return (surface, top-left) for a small, rotated, faded version of the projectile image."""
+        img = pygame.transform.rotozoom(self.image, self.rotation, self.scale)
+        img.set_alpha(max(0, int(255 * (self.life / 0.3))))
+        w, h = img.get_size()
+        return img, (int(self.x) - w//2, int(self.y) - h//2)
 
 class ParticleManager:
-    def __init__(self):
+    def __init__(self, max_particles=MAX_PARTICLES):
         self.particles = []
+        self.enabled = True  # Headless simulations switch particles off
+        self.max_particles = max_particles
+        # Set by the quality governor
+        self.scale = 1.0             # Fraction of each burst to emit
+        self.image_particles = True  # Rotated projectile-image particles
 
     def emit(self, pos, color, count=8, image=None):
+        if not self.enabled or (image and not self.image_particles):
+            return
+        if self.scale != 1.0:
+            count = max(1, round(count * self.scale))
+        # Past the cap new bursts are trimmed, so big fights don't snowball
+        count = min(count, self.max_particles - len(self.particles))
         for _ in range(count):
             self.particles.append(Particle(pos, color, image=image))
 
@@ -46,6 +60,21 @@ class ParticleManager:
             p.update(dt)
         self.particles = [p for p in self.particles if p.life > 0 and p.radius > 0]
 
-    def draw(self, screen):
+    def queue_draw(self, queue, view=None):
+        """Queue image particles as sprites and draw all circle particles in one
+        callback. Particles outside view are skipped (and never rotated)."""
+        left, top, right, bottom = cull_bounds(view)
+        circles = []
         for p in self.particles:
-            p.draw(screen)
+            if p.life <= 0 or not (left < p.x < right and top < p.y < bottom):
+                continue
+            if p.image:
+                img, dest = p.image_sprite()
+                queue.add(LAYER_EFFECTS, img, dest)
+            elif p.radius > 0:
+                circles.append(p)
+        if circles:
+            def draw_circles(screen, offset):
+                for p in circles:
+                    p.draw(screen, offset)
+            queue.add_draw(LAYER_EFFECTS, draw_circles)
@@ -1,4 +1,6 @@
 import pygame
+import os
+from core.assets import load_image
 
 def load_sprite_sheet(filename, frame_width, frame_height, horizontal=True):
     """Load a sprite sheet and return a list of frames as surfaces. If horizontal, split only along x axis (single row)."""
@@ -16,3 +18,68 @@ def load_sprite_sheet(filename, frame_width, frame_height, horizontal=True):
                 frame = sheet.subsurface(pygame.Rect(x, y, frame_width, frame_height)).copy()
                 frames.append(frame)
     return frames
+
+# Shared monster sprites, keyed by (sprite_type, is_boss)
+_monster_sprite_cache = {}
+
+# Sprite files per monster model: (folder, frame file prefix, death image)
+MONSTER_SPRITE_FILES = {
+    'gnome': ('gnome', 'gnome_', None),  # Death image is gnome_right3 rotated
+    'fast_spider': ('spider_fast', '', 'dead.png'),
+    'big_spider': ('spider_big', '', 'dead.png'),
+}
+
+# Blue overlay used to show the slow effect
+SLOW_TINT = (80, 180, 255, 70)
+# Number of pre-baked alpha levels for the death fade-out
+DEATH_FADE_STEPS = 16
+
+def tint_surface(surface, rgba):
+    """Return a copy of surface with rgba added to every pixel (alpha respected)."""
+    tinted = surface.copy()
+    overlay = pygame.Surface(tinted.get_size(), pygame.SRCALPHA)
+    overlay.fill(rgba)
+    tinted.blit(overlay, (0, 0), special_flags=pygame.BLEND_RGBA_ADD)
+    return tinted
+
+def get_monster_sprites(sprite_type, size, is_boss=False):
+    """Load (once) and return the shared sprite set for a monster model.
+
+    Returns a dict with 'frames' and 'slowed' (direction -> list of 3 frames),
+    'dead' (death image) and 'dead_fade' (DEATH_FADE_STEPS copies of the death
+    image, from faintest to opaque). Tinted and faded variants are baked once
+    here so drawing never allocates.
+    """
+    key = (sprite_type, is_boss)
+    if key in _monster_sprite_cache:
+        return _monster_sprite_cache[key]
+    folder, prefix, dead_file = MONSTER_SPRITE_FILES[sprite_type]
+    base_dir = os.path.join('assets', 'monsters', folder)
+    scale = 2.0 if is_boss else 1.0
+    scaled_size = int(size * 2 * scale)
+
+    def load_and_scale(name):
+        return load_image(os.path.join(base_dir, name), (scaled_size, scaled_size))
+
+    frames = {
+        'up':   [load_and_scale(f'{prefix}up{i}.png') for i in range(1, 4)],
+        'left': [load_and_scale(f'{prefix}left{i}.png') for i in range(1, 4)],
+        'right':[load_and_scale(f'{prefix}right{i}.png') for i in range(1, 4)],
+    }
+    frames['down'] = [frames['up'][0]] * 3
+    if dead_file is None:
+        # Gnome death image: right3 rotated -90 degrees (laying on back)
+        dead = pygame.transform.rotate(frames['right'][2], -90)
+    else:
+        dead = load_and_scale(dead_file)
+    slowed = {direction: [tint_surface(f, SLOW_TINT) for f in frames[direction]]
+              for direction in ('up', 'left', 'right')}
+    slowed['down'] = [slowed['up'][0]] * 3
+    dead_fade = []
+    for i in range(DEATH_FADE_STEPS):
+        faded = dead.copy()
+        faded.set_alpha(round(255 * (i + 1) / DEATH_FADE_STEPS))
+        dead_fade.append(faded)
+    sprites = {'frames': frames, 'slowed': slowed, 'dead': dead, 'dead_fade': dead_fade}
+    _monster_sprite_cache[key] = sprites
+    return sprites
@@ -1,90 +1,56 @@
 import pygame
 from core.config import *
+import bisect
 import math
 import os
+from entities.hit_buffer import HitBuffer
+from core.render_queue import LAYER_ENTITIES, LAYER_PROJECTILES, LAYER_OVERLAY, cull_bounds
+from core.input import mouse
+from core.assets import load_image
+from core import audio
 
-CANNON_SHOT_SOUND = None
-CANNON_IMPACT_SOUND = None
-ICE_SHOT_SOUND = None
-ICE_IMPACT_SOUND = None
-FIRE_SHOT_SOUND = None
-FIRE_IMPACT_SOUND = None
+# Sound file prefix per tower type (assets/sounds/towers/<prefix>_shot.wav, _impact.wav)
+TOWER_SOUND_NAMES = {'cannon': 'cannon', 'water': 'ice', 'fire': 'fire'}
 
-def load_tower_sounds():
-    global CANNON_SHOT_SOUND, CANNON_IMPACT_SOUND, ICE_SHOT_SOUND, ICE_IMPACT_SOUND, FIRE_SHOT_SOUND, FIRE_IMPACT_SOUND
-    # Cannon
-    if CANNON_SHOT_SOUND is None:
-        shot_path = os.path.join('assets', 'sounds', 'towers', 'cannon_shot.wav')
-        if os.path.exists(shot_path):
-            try:
-                if not pygame.mixer.get_init():
-                    pygame.mixer.init()
-                CANNON_SHOT_SOUND = pygame.mixer.Sound(shot_path)
-            except Exception as e:
-                print(f"Failed to load cannon shot sound: {e}")
-        else:
-            print("Cannon shot sound not found at assets/sounds/towers/cannon_shot.wav")
-    if CANNON_IMPACT_SOUND is None:
-        impact_path = os.path.join('assets', 'sounds', 'towers', 'cannon_impact.wav')
-        if os.path.exists(impact_path):
-            try:
-                if not pygame.mixer.get_init():
-                    pygame.mixer.init()
-                CANNON_IMPACT_SOUND = pygame.mixer.Sound(impact_path)
-            except Exception as e:
-                print(f"Failed to load cannon impact sound: {e}")
-        else:
-            print("Cannon impact sound not found at assets/sounds/towers/cannon_impact.wav")
-    # Ice/Water
-    if ICE_SHOT_SOUND is None:
-        shot_path = os.path.join('assets', 'sounds', 'towers', 'ice_shot.wav')
-        if os.path.exists(shot_path):
-            try:
-                if not pygame.mixer.get_init():
-                    pygame.mixer.init()
-                ICE_SHOT_SOUND = pygame.mixer.Sound(shot_path)
-            except Exception as e:
-                print(f"Failed to load ice shot sound: {e}")
-        else:
-            print("Ice shot sound not found at assets/sounds/towers/ice_shot.wav")
-    if ICE_IMPACT_SOUND is None:
-        impact_path = os.path.join('assets', 'sounds', 'towers', 'ice_impact.wav')
-        if os.path.exists(impact_path):
-            try:
-                if not pygame.mixer.get_init():
-                    pygame.mixer.init()
-                ICE_IMPACT_SOUND = pygame.mixer.Sound(impact_path)
-            except Exception as e:
-                print(f"Failed to load ice impact sound: {e}")
-        else:
-            print("Ice impact sound not found at assets/sounds/towers/ice_impact.wav")
-    # Fire
-    if FIRE_SHOT_SOUND is None:
-        shot_path = os.path.join('assets', 'sounds', 'towers', 'fire_shot.wav')
-        if os.path.exists(shot_path):
-            try:
-                if not pygame.mixer.get_init():
-                    pygame.mixer.init()
-                FIRE_SHOT_SOUND = pygame.mixer.Sound(shot_path)
-            except Exception as e:
-                print(f"Failed to load fire shot sound: {e}")
-        else:
-            print("Fire shot sound not found at assets/sounds/towers/fire_shot.wav")
-    if FIRE_IMPACT_SOUND is None:
-        impact_path = os.path.join('assets', 'sounds', 'towers', 'fire_impact.wav')
-        if os.path.exists(impact_path):
-            try:
-                if not pygame.mixer.get_init():
-                    pygame.mixer.init()
-                FIRE_IMPACT_SOUND = pygame.mixer.Sound(impact_path)
-            except Exception as e:
-                print(f"Failed to load fire impact sound: {e}")
-        else:
-            print("Fire impact sound not found at assets/sounds/towers/fire_impact.wav")
+# Projectile colour, fallback shape and speed per tower type
+PROJECTILE_STYLES = {
+    'cannon': ((150, 75, 0), 'small', 400),
+    'water': ((0, 100, 255), 'medium', 300),
+    'fire': ((100, 100, 100), 'large', 200),
+}
+
+
+def draw_projectile_shape(screen, color, size, x, y):
+    """Fallback shapes when the projectile image is missing."""
+    if size == 'small':
+        pygame.draw.circle(screen, color, (x, y), 3)
+    elif size == 'medium':
+        points = [
+            (x, y - 4),
+            (x - 4, y + 4),
+            (x + 4, y + 4)
+        ]
+        pygame.draw.polygon(screen, color, points)
+    else:  # large
+        pygame.draw.rect(screen, color,
+                       (x - 5, y - 5, 10, 10))
+
+
+def queue_projectile(queue, proj_type, x, y, color, size):
+    """Queue a projectile centred on (x, y): its image, or the fallback shape."""
+    img = Tower.projectile_images.get(proj_type) if Tower.projectile_images else None
+    if img:
+        w, h = img.get_size()
+        queue.add(LAYER_PROJECTILES, img, (int(x) - w//2, int(y) - h//2))
+    else:
+        queue.add_draw(LAYER_PROJECTILES, lambda screen, offset: draw_projectile_shape(
+            screen, color, size, int(x) + offset[0], int(y) + offset[1]))
 
 
 class Projectile:
     """Represents a tower's projectile."""
+    __slots__ = ('pos', 'target', 'speed', 'color', 'size', 'proj_type')
+
     def __init__(self, start_pos, target, speed, color, size, proj_type=None):
         self.pos = list(start_pos)
         self.target = target  # Store reference to target monster
@@ -104,33 +70,29 @@ class Projectile:
         
         if dist < 5:  # Hit target
             return True
+        move_dist = self.speed * dt
+        if move_dist >= dist:
+            # Reaches the target this tick (large steps could otherwise fly past it)
+            self.pos[0], self.pos[1] = target_pos
+            return True
             
         # Move towards target
-        self.pos[0] += (dx/dist) * self.speed * dt
-        self.pos[1] += (dy/dist) * self.speed * dt
+        self.pos[0] += (dx/dist) * move_dist
+        self.pos[1] += (dy/dist) * move_dist
         return False
         
-    def draw(self, screen):
-        img = Tower.projectile_images.get(self.proj_type) if Tower.projectile_images else None
-        x, y = int(self.pos[0]), int(self.pos[1])
-        if img:
-            rect = img.get_rect(center=(x, y))
-            screen.blit(img, rect)
-        elif self.size == 'small':
-            pygame.draw.circle(screen, self.color, (x, y), 3)
-        elif self.size == 'medium':
-            points = [
-                (x, y - 4),
-                (x - 4, y + 4),
-                (x + 4, y + 4)
-            ]
-            pygame.draw.polygon(screen, self.color, points)
-        else:  # large
-            pygame.draw.rect(screen, self.color,
-                           (x - 5, y - 5, 10, 10))
+    def queue_draw(self, queue):
+        queue_projectile(queue, self.proj_type, self.pos[0], self.pos[1], self.color, self.size)
+
+    def draw(self, screen, offset=(0, 0)):
+        draw_projectile_shape(screen, self.color, self.size,
+                              int(self.pos[0]) + offset[0], int(self.pos[1]) + offset[1])
 
 class Tower:
     """Base class for all towers."""
+    __slots__ = ('tower_type', 'pos', 'level', 'selected', 'damage', 'range', 'attack_speed',
+                 'splash_radius', 'upgrades', 'attack_timer', 'target', 'projectiles', 'shots_fired',
+                 'coverage', 'projectile_type', 'projectile_color', 'projectile_size', 'projectile_speed')
     tower_images = None
     projectile_images = None
 
@@ -141,10 +103,9 @@ class Tower:
             for ttype in ['cannon', 'water', 'fire']:
                 img_path = os.path.join('assets', 'towers', f'{ttype}_tower.png')
                 if os.path.exists(img_path):
-                    img = pygame.image.load(img_path).convert_alpha()
                     # Revert tower size to 1.5x TILE_SIZE
                     TOWER_IMG_SIZE = int(TILE_SIZE * 1.5)
-                    Tower.tower_images[ttype] = pygame.transform.smoothscale(img, (TOWER_IMG_SIZE, TOWER_IMG_SIZE))
+                    Tower.tower_images[ttype] = load_image(img_path, (TOWER_IMG_SIZE, TOWER_IMG_SIZE))
                 else:
                     Tower.tower_images[ttype] = None
         if Tower.projectile_images is None:
@@ -152,13 +113,11 @@ class Tower:
             for ttype in ['cannon', 'water', 'fire']:
                 img_path = os.path.join('assets', 'projectiles', f'{ttype}_projectile.png')
                 if os.path.exists(img_path):
-                    img = pygame.image.load(img_path).convert_alpha()
-                    Tower.projectile_images[ttype] = pygame.transform.smoothscale(img, (16, 16))
+                    Tower.projectile_images[ttype] = load_image(img_path, (16, 16))
                 else:
                     Tower.projectile_images[ttype] = None
 
     def __init__(self, tower_type, pos):
-        Tower.load_images()
         self.tower_type = tower_type
         self.pos = pos
         self.level = 1
@@ -180,21 +139,14 @@ class Tower:
         self.attack_timer = 0
         self.target = None
         self.projectiles = []
+        self.shots_fired = 0
+        # (route id, start, end) stretches of route in range, set by the
+        # TowerManager on placement (None: scan every monster)
+        self.coverage = None
         
         # Set projectile properties based on tower type
         self.projectile_type = tower_type  # For image lookup
-        if tower_type == 'cannon':
-            self.projectile_color = (150, 75, 0)
-            self.projectile_size = 'small'
-            self.projectile_speed = 400
-        elif tower_type == 'water':
-            self.projectile_color = (0, 100, 255)
-            self.projectile_size = 'medium'
-            self.projectile_speed = 300
-        else:
-            self.projectile_color = (100, 100, 100)
-            self.projectile_size = 'large'
-            self.projectile_speed = 200
+        self.projectile_color, self.projectile_size, self.projectile_speed = PROJECTILE_STYLES[tower_type]
 
     def can_attack(self, dt):
         self.attack_timer -= dt
@@ -217,15 +169,29 @@ class Tower:
         
         return closest_monster
 
+    def find_target_on_routes(self, route_index):
+        """find_target, but only testing the monsters on the stretches of
+        route this tower covers (looked up in the manager's route_index)."""
+        closest_dist = float('inf')
+        closest_monster = None
+        px, py = self.pos
+        for route_id, start, end in self.coverage:
+            distances, monsters = route_index[route_id]
+            for k in range(bisect.bisect_left(distances, start), bisect.bisect_right(distances, end)):
+                monster = monsters[k]
+                if not monster.is_alive():
+                    continue  # Killed earlier this tick
+                dx = monster.pos[0] - px
+                dy = monster.pos[1] - py
+                dist = math.sqrt(dx * dx + dy * dy)
+                if dist <= self.range and dist < closest_dist:
+                    closest_dist = dist
+                    closest_monster = monster
+        return closest_monster
+
     def attack(self, monster, monster_manager):
         # Play shot sound for tower type
-        load_tower_sounds()
-        if self.tower_type == 'cannon' and CANNON_SHOT_SOUND:
-            CANNON_SHOT_SOUND.play()
-        elif self.tower_type == 'water' and ICE_SHOT_SOUND:
-            ICE_SHOT_SOUND.play()
-        elif self.tower_type == 'fire' and FIRE_SHOT_SOUND:
-            FIRE_SHOT_SOUND.play()
+        audio.play_sound('towers', f'{TOWER_SOUND_NAMES[self.tower_type]}_shot.wav')
         # Create new projectile
         self.projectiles.append(Projectile(
             self.pos,
@@ -236,98 +202,90 @@ class Tower:
             self.projectile_type
         ))
         self.attack_timer = self.attack_speed
+        self.shots_fired += 1
 
-    def update(self, dt, monster_manager, economy):
-        
-        if self.tower_type == 'cannon':
-            load_tower_sounds()
-        # Update projectiles
+    def update(self, dt, monster_manager, hits):
+        # Update projectiles; hits are recorded and resolved later in one batch
+        # Ice tower: slow effect (0.81 keeps the old feel, when 0.9 was applied to speed twice)
+        slow = (0.81, 3.0) if self.tower_type == 'water' else None
+        proj_img = Tower.projectile_images.get(self.projectile_type) if Tower.projectile_images else None
         for proj in self.projectiles[:]:  # Copy list to safely remove while iterating
             proj.update(dt)
             if proj.update(dt):  # Returns True when hit target
-                # Play cannon impact sound for cannon tower
-                load_tower_sounds()
-                if self.tower_type == 'cannon' and CANNON_IMPACT_SOUND:
-                    CANNON_IMPACT_SOUND.play()
-                elif self.tower_type == 'water' and ICE_IMPACT_SOUND:
-                    ICE_IMPACT_SOUND.play()
-                elif self.tower_type == 'fire' and FIRE_IMPACT_SOUND:
-                    FIRE_IMPACT_SOUND.play()
-                
-                
+                # Play impact sound for tower type
+                audio.play_sound('towers', f'{TOWER_SOUND_NAMES[self.tower_type]}_impact.wav')
                 
                 if self.splash_radius > 0:
                     # Area damage
-                    for monster in monster_manager.monsters:
-                        dx = monster.pos[0] - proj.pos[0]
-                        dy = monster.pos[1] - proj.pos[1]
-                        dist = math.sqrt(dx*dx + dy*dy)
-                        if dist <= self.splash_radius:
-                            # Emit monster color particles
-                            monster_manager.particles.emit((monster.pos[0], monster.pos[1] - monster.size), monster.color, count=8)
-                            # Emit projectile image particles
-                            proj_img = Tower.projectile_images.get(self.projectile_type) if Tower.projectile_images else None
-                            monster_manager.particles.emit((monster.pos[0], monster.pos[1] - monster.size), self.projectile_color, count=6, image=proj_img)
-                            monster.take_damage(self.damage, monster_manager.particles)
-                            # Ice tower: apply slow effect
-                            if self.tower_type == 'water':
-                                monster.apply_slow(0.9, 3.0)
+                    hits.add_splash(proj.pos, self.splash_radius, self.damage, slow,
+                                    self.projectile_color, proj_img, self)
                 else:
                     # Single target damage
-                    # Emit monster color particles
-                    monster_manager.particles.emit((proj.target.pos[0], proj.target.pos[1] - proj.target.size), proj.target.color, count=8)
-                    # Emit projectile image particles
-                    proj_img = Tower.projectile_images.get(self.projectile_type) if Tower.projectile_images else None
-                    monster_manager.particles.emit((proj.target.pos[0], proj.target.pos[1] - proj.target.size), self.projectile_color, count=6, image=proj_img)
-                    proj.target.take_damage(self.damage, monster_manager.particles)
-                    # Ice tower: apply slow effect
-                    if self.tower_type == 'water':
-                        proj.target.apply_slow(0.9, 3.0)
+                    hits.add(proj.target, self.damage, slow, self.projectile_color, proj_img, self)
                 
                 self.projectiles.remove(proj)
         
         # Find and attack target
         if self.can_attack(dt):
-            target = self.find_target(monster_manager.monsters)
+            if self.coverage is not None:
+                target = self.find_target_on_routes(monster_manager.route_index)
+            else:
+                target = self.find_target(monster_manager.monsters)
             if target:
                 self.attack(target, monster_manager)
                 self.target = target
             else:
                 self.target = None
 
-    def draw(self, screen, monster_particles=None):
-        # Draw tower image if available, else fallback to color circle
+    def sprite(self):
+        """Return the (y, surface, dest) draw command for the tower image, or None."""
         img = Tower.tower_images.get(self.tower_type) if Tower.tower_images else None
-        if img:
-            rect = img.get_rect(center=self.pos)
-            screen.blit(img, rect)
-        else:
-            color = {
-                'cannon': (150, 100, 50),
-                'water': (50, 50, 200),
-                'fire': (100, 100, 100)
-            }[self.tower_type]
-            pygame.draw.circle(screen, color, self.pos, TILE_SIZE // 2)
+        if not img:
+            return None
+        rect = img.get_rect(center=self.pos)
+        return (self.pos[1], img, rect.topleft)
+
+    def draw(self, screen, offset=(0, 0)):
+        # Fallback circle when the tower image is missing
+        color = {
+            'cannon': (150, 100, 50),
+            'water': (50, 50, 200),
+            'fire': (100, 100, 100)
+        }[self.tower_type]
+        pygame.draw.circle(screen, color, (self.pos[0] + offset[0], self.pos[1] + offset[1]), TILE_SIZE // 2)
+
+    def draw_range(self, screen, offset=(0, 0)):
+        # Draw a fully opaque, 2px wide circle matching the targeting logic
+        # (Targeting uses distance from self.pos to monster.pos <= self.range)
+        center = (self.pos[0] + offset[0], self.pos[1] + offset[1])
+        pygame.draw.circle(screen, (255, 255, 255), center, int(self.range), 2)
+
+    def queue_draw(self, queue, view=None):
+        """Queue the tower's dynamic parts: range circle and the projectiles in view."""
         # Draw range circle if this tower is selected
         if self.selected:
-            # Draw a fully opaque, 2px wide circle matching the targeting logic
-            # (Targeting uses distance from self.pos to monster.pos <= self.range)
-            pygame.draw.circle(screen, (255, 255, 255), self.pos, int(self.range), 2)
-        # Draw projectiles
+            queue.add_draw(LAYER_OVERLAY, self.draw_range)
+        left, top, right, bottom = cull_bounds(view)
         for proj in self.projectiles:
-            proj.draw(screen)
-        # Draw hit particles created by tower hits (if provided)
-        if monster_particles:
-            monster_particles.draw(screen)
+            x, y = proj.pos
+            if left < x < right and top < y < bottom:
+                proj.queue_draw(queue)
 
 
 class TowerManager:
     """Manages all towers on the map."""
-    tower_placement_sound = None
     def __init__(self, path):
         self.towers = []
         self.path = path
         self.selected_tower = None
+        # (tile_x, tile_y) -> tower, so a click finds its tower without a scan
+        self.tower_at = {}
+        self.hits = HitBuffer()
+        self.telemetry = None  # Set by Telemetry.attach
+        # Towers never move, so their draw commands are kept sorted by y
+        # and only rebuilt when a tower is placed
+        self._sprite_run = None
+        self._fallback_towers = []
 
     def place_tower(self, tower_type, pos, economy):
         """Try to place a tower at the given position."""
@@ -338,45 +296,74 @@ class TowerManager:
             return False
             
         # Create and add the tower
-        tower = Tower(tower_type, pos)
-        self.towers.append(tower)
-        # Play tower placement sound if loaded
-        if TowerManager.tower_placement_sound is None:
-            import os
-            try:
-                TowerManager.tower_placement_sound = pygame.mixer.Sound(os.path.join('assets', 'sounds', 'UI', 'tower_placement.wav'))
-            except Exception as e:
-                print(f"Failed to load tower_placement sound: {e}")
-        if TowerManager.tower_placement_sound:
-            TowerManager.tower_placement_sound.play()
+        self.add_tower(tower_type, pos)
+        audio.play_sound('UI', 'tower_placement.wav')
         return True
 
+    def add_tower(self, tower_type, pos):
+        """Put a tower on the map (no cost, no sound) and return it."""
+        tower = Tower(tower_type, pos)
+        tower.coverage = self.path.coverage(tower.pos, tower.range)
+        # Keep towers ordered by y (so lower towers are drawn in front)
+        index = len(self.towers)
+        while index > 0 and self.towers[index - 1].pos[1] > pos[1]:
+            index -= 1
+        self.towers.insert(index, tower)
+        self.tower_at[(pos[0] // TILE_SIZE, pos[1] // TILE_SIZE)] = tower
+        self._sprite_run = None
+        return tower
+
+    def clear(self):
+        """Remove every tower (rewinding to before some were built)."""
+        self.towers = []
+        self.tower_at = {}
+        self.selected_tower = None
+        self._sprite_run = None
+
+    def select(self, tower):
+        """Select a tower (or None), clearing only the previous selection."""
+        if self.selected_tower is not None:
+            self.selected_tower.selected = False
+        if tower is not None:
+            tower.selected = True
+        self.selected_tower = tower
+
     def handle_event(self, event, economy):
         if event.type == pygame.MOUSEBUTTONDOWN:
-            mouse_pos = pygame.mouse.get_pos()
-            clicked_any = False
-            for tower in self.towers:
+            mouse_pos = mouse.world_pos
+            tower = self.tower_at.get((int(mouse_pos[0]) // TILE_SIZE, int(mouse_pos[1]) // TILE_SIZE))
+            if tower is not None:
                 dx = mouse_pos[0] - tower.pos[0]
                 dy = mouse_pos[1] - tower.pos[1]
-                if dx*dx + dy*dy <= (TILE_SIZE//2) * (TILE_SIZE//2):
-                    # Select this tower, deselect others
-                    for t in self.towers:
-                        t.selected = False
-                    tower.selected = True
-                    self.selected_tower = tower
-                    clicked_any = True
-                    break
-            if not clicked_any:
-                # Deselect all towers if clicked empty space
-                for t in self.towers:
-                    t.selected = False
-                self.selected_tower = None
+                if dx*dx + dy*dy > (TILE_SIZE//2) * (TILE_SIZE//2):
+                    tower = None  # Tile corner outside the tower's circle
+            # Clicking empty space deselects
+            self.select(tower)
 
     def update(self, dt, monster_manager, economy):
         for tower in self.towers:
-            tower.update(dt, monster_manager, economy)
+            tower.update(dt, monster_manager, self.hits)
+        # Apply all hits of this tick at once
+        self.hits.resolve(monster_manager, economy, self.telemetry)
 
-    def draw(self, screen, monster_particles=None):
-        # Draw towers sorted by Y (so lower towers are drawn in front)
-        for tower in sorted(self.towers, key=lambda t: t.pos[1]):
-            tower.draw(screen, monster_particles=monster_particles)
+    def queue_draw(self, queue, view=None):
+        # Images are loaded on first draw, so headless simulations never need them
+        Tower.load_images()
+        if self._sprite_run is None:
+            self._sprite_run = []
+            self._fallback_towers = []
+            for tower in self.towers:
+                command = tower.sprite()
+                if command:
+                    self._sprite_run.append(command)
+                else:
+                    self._fallback_towers.append(tower)
+        # The sprite run is built once and culled by the queue; fallback
+        # circles are drawn per frame, so only the ones in view are queued
+        queue.add_sorted_run(LAYER_ENTITIES, self._sprite_run)
+        left, top, right, bottom = cull_bounds(view)
+        for tower in self._fallback_towers:
+            if left < tower.pos[0] < right and top < tower.pos[1] < bottom:
+                queue.add_draw(LAYER_ENTITIES, tower.draw)
+        for tower in self.towers:
+            tower.queue_draw(queue, view)
@@ -1,121 +1,298 @@
-import pygame
+import argparse
+import json
 import os
 import sys
+import time
+START_TIME = time.perf_counter()  # Before pygame and the game modules are imported (--profile-startup)
+# pygame imports numpy (for surfarray) and pkg_resources (to find its data
+# files) whenever they are installed, which is most of its import time. The
+# game uses neither, so they are hidden while pygame loads and can still be
+# imported normally afterwards.
+SKIPPED_BY_PYGAME = ('numpy', 'pkg_resources')
+for name in SKIPPED_BY_PYGAME:
+    sys.modules.setdefault(name, None)
+import pygame
+for name in SKIPPED_BY_PYGAME:
+    if name in sys.modules and sys.modules[name] is None:
+        del sys.modules[name]
 from core.game import Game
-from core.config import SCREEN_WIDTH, SCREEN_HEIGHT
-
-# Global variables for mouse coordinate transformation
-global_scale = 1.0
-global_x_offset = 0
-global_y_offset = 0
-
-# Override pygame.mouse.get_pos to return transformed coordinates
-original_get_pos = pygame.mouse.get_pos
-def transformed_get_pos():
-    real_pos = original_get_pos()
-    # Transform from screen to game coordinates
-    mx = int((real_pos[0] - global_x_offset) / global_scale)
-    my = int((real_pos[1] - global_y_offset) / global_scale)
-    # Clamp to valid range
-    mx = max(0, min(SCREEN_WIDTH-1, mx))
-    my = max(0, min(SCREEN_HEIGHT-1, my))
-    return (mx, my)
-
-# Replace the original function with our transformed version
-pygame.mouse.get_pos = transformed_get_pos
+from core.config import SCREEN_WIDTH, SCREEN_HEIGHT, FRAME_PACING, TARGET_FPS, ENDLESS_MODE, MAP_PATH
+from core.frame_pacer import FramePacer, PACING_MODES, percentile, vsync_works
+from core.replay import ReplayRecorder, ReplayPlayer
+from core.telemetry import Telemetry
+from core.input import mouse
+from core.assets import load_image
+from core.startup import StartupProfile
+from core import audio
 
 # Get the directory where this script is located
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
-def main():
-    pygame.init()
-    # Get the display size
-    info = pygame.display.Info()
-    display_width, display_height = info.current_w, info.current_h
-    # Create a borderless fullscreen window
-    window = pygame.display.set_mode((display_width, display_height), pygame.NOFRAME)
+# Cursor image size and the pixel that points (the arrow's tip), in screen pixels
+CURSOR_SIZE = (32, 32)
+CURSOR_HOTSPOT = (1, 1)
+
+
+def set_hardware_cursor(image):
+    """Install image as the system cursor. Returns False if the platform can't."""
+    try:
+        pygame.mouse.set_cursor(pygame.cursors.Cursor(CURSOR_HOTSPOT, image))
+    except (pygame.error, AttributeError) as e:
+        print(f"Hardware cursor not available, drawing it instead: {e}")
+        return False
+    return True
+
+
+def parse_resolution(text):
+    try:
+        width, height = (int(v) for v in text.lower().split('x'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected WIDTHxHEIGHT, got {text!r}")
+    return width, height
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Mystic Towers')
+    display = parser.add_argument_group('display')
+    display.add_argument('--windowed', action='store_true',
+                         help='open a normal window instead of borderless fullscreen')
+    display.add_argument('--resizable', action='store_true', help='let the window be resized (implies --windowed)')
+    display.add_argument('--resolution', type=parse_resolution, metavar='WxH',
+                         help='window size (default: desktop size fullscreen, game size windowed)')
+    display.add_argument('--headless', action='store_true',
+                         help='run without a window or audio device (SDL dummy drivers)')
+    display.add_argument('--pacing', choices=PACING_MODES, default=FRAME_PACING)
+    display.add_argument('--fps', type=int, default=TARGET_FPS)
+    run = parser.add_argument_group('run control')
+    run.add_argument('--frames', type=int, help='quit after this many frames')
+    run.add_argument('--waves', type=int, help='quit after this many waves have ended')
+    run.add_argument('--start-wave', type=int, default=1, help='first wave to play')
+    run.add_argument('--auto-start', action='store_true',
+                     help='start each wave as soon as the previous one ends')
+    run.add_argument('--endless', action='store_true', default=ENDLESS_MODE,
+                     help='keep generating waves after the boss wave')
+    run.add_argument('--seed', type=int, help='random seed for spawn patterns')
+    run.add_argument('--map', default=MAP_PATH, help='map file to play (default: %(default)s)')
+    run.add_argument('--record', metavar='FILE', help='record player commands to a replay file')
+    run.add_argument('--replay', metavar='FILE', help='play back a replay file')
+    run.add_argument('--sim-process', action='store_true',
+                     help='run the simulation in a separate process (uses a second core)')
+    run.add_argument('--telemetry', metavar='FILE',
+                     help='write per-wave and per-tower stats (JSON lines, or CSV if FILE ends in .csv)')
+    run.add_argument('--timing-json', metavar='FILE',
+                     help="write a JSON timing summary at exit ('-' for stdout)")
+    run.add_argument('--profile-startup', action='store_true',
+                     help='print how long each startup phase took until the first frame')
+    args = parser.parse_args(argv)
+    if args.record and args.replay:
+        parser.error('--record and --replay cannot be combined')
+    if args.sim_process and (args.record or args.replay):
+        parser.error('--sim-process runs on wall-clock time and cannot record or replay')
+    if args.sim_process and args.telemetry:
+        parser.error('--telemetry needs the simulation in this process')
+    if args.resizable:
+        args.windowed = True
+    return args
+
+
+def create_window(args, pacer):
+    """Open the output window described by the command line. Returns (window, pacer)."""
+    if args.headless:
+        size = args.resolution or (SCREEN_WIDTH, SCREEN_HEIGHT)
+        flags = 0
+    elif args.windowed:
+        size = args.resolution or (SCREEN_WIDTH, SCREEN_HEIGHT)
+        flags = pygame.RESIZABLE if args.resizable else 0
+    else:
+        # Borderless fullscreen at the desktop size
+        info = pygame.display.Info()
+        size = args.resolution or (info.current_w, info.current_h)
+        flags = pygame.NOFRAME
+    if pacer.mode == 'vsync':
+        # pygame only honours vsync on SCALED (or OPENGL) windows, and says
+        # nothing when it can't, so the flips are timed to make sure
+        try:
+            window = pygame.display.set_mode(size, flags | pygame.SCALED, vsync=1)
+        except pygame.error as e:
+            print(f"VSync not available, capping the frame rate instead: {e}")
+        else:
+            if vsync_works():
+                return window, pacer
+            print("VSync was not granted by the display, capping the frame rate instead")
+        pacer = FramePacer('capped', pacer.fps)
+    return pygame.display.set_mode(size, flags), pacer
+
+
+def timing_summary(args, pacer, game, wall_time, waves_ended, tick_times, draw_times):
+    summary = {
+        'wall_time_s': round(wall_time, 3),
+        'wave': game.wave_manager.wave_number,
+        'waves_ended': waves_ended,
+        'state': game.state,
+        'base_hp': game.base.hp,
+        'quality_tier': game.quality.tier,
+        'tick_ms_p50': round(percentile(tick_times, 50), 3),
+        'tick_ms_p95': round(percentile(tick_times, 95), 3),
+        'draw_ms_p50': round(percentile(draw_times, 50), 3),
+        'draw_ms_p95': round(percentile(draw_times, 95), 3),
+        'args': vars(args),
+    }
+    summary.update(pacer.report())
+    return summary
+
+
+def main(argv=None):
+    profile = StartupProfile(START_TIME)
+    profile.mark('imports')
+    args = parse_args(argv)
+    if args.headless:
+        os.environ['SDL_VIDEODRIVER'] = 'dummy'
+        os.environ['SDL_AUDIODRIVER'] = 'dummy'
+    # Only what the first frame needs; the mixer is opened once it is on screen
+    pygame.display.init()
+    pygame.font.init()
+    profile.mark('pygame init')
+    pacer = FramePacer(args.pacing, args.fps)
+    window, pacer = create_window(args, pacer)
     pygame.display.set_caption("Mystic Towers")
-    clock = pygame.time.Clock()
+    profile.mark('window')
+
+    # Replays and recordings use a fixed timestep and seed so they play back exactly
+    replay = ReplayPlayer(args.replay) if args.replay else None
+    seed = replay.seed if replay else args.seed
+    fixed_dt = None
+    if replay:
+        fixed_dt = replay.dt
+    elif args.record:
+        if seed is None:
+            seed = int(time.time())
+        fixed_dt = 1.0 / args.fps
+    recorder = ReplayRecorder(args.record, seed, fixed_dt) if args.record else None
+    telemetry = Telemetry(args.telemetry) if args.telemetry else None
+
     # Create the fixed-resolution game surface
     game_surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-    game = Game(game_surface)
+    game = Game(game_surface, pacer, endless=args.endless, seed=seed, recorder=recorder, replay=replay,
+                map_path=args.map, sim_process=args.sim_process, telemetry=telemetry)
+    if args.start_wave > 1:
+        game.set_next_wave(args.start_wave)
+    profile.mark('game')
+    dt = 0.0
     running = True
+    frames = 0
+    waves_ended = 0
+    was_in_progress = False
+    # Per-frame times for the --timing-json summary (not kept otherwise, so long runs don't grow)
+    tick_times = [] if args.timing_json else None
+    draw_times = [] if args.timing_json else None
+    start_time = time.perf_counter()
 
-    # Hide the system cursor
-    pygame.mouse.set_visible(False)
-    # Load and scale the custom cursor image using script-relative path
-    cursor_img_path = os.path.join(BASE_DIR, 'assets', 'UI', 'cursor_image.png')
-    cursor_img = pygame.image.load(cursor_img_path).convert_alpha()
-    cursor_img = pygame.transform.smoothscale(cursor_img, (32, 32))
-    cursor_offset = (16, 16)  # Center the cursor image
+    # Custom cursor: a colour hardware cursor when the platform supports one,
+    # otherwise the system cursor is hidden and the image drawn every frame
+    cursor_img = load_image(os.path.join(BASE_DIR, 'assets', 'UI', 'cursor_image.png'), CURSOR_SIZE)
+    software_cursor = not set_hardware_cursor(cursor_img)
+    if software_cursor:
+        pygame.mouse.set_visible(False)
+    profile.mark('cursor')
 
     while running:
-        # Calculate scale and offsets for aspect ratio
+        # Calculate scale and offsets for aspect ratio (the window may have been resized)
+        display_width, display_height = window.get_size()
         scale = min(display_width / SCREEN_WIDTH, display_height / SCREEN_HEIGHT)
         scaled_width = int(SCREEN_WIDTH * scale)
         scaled_height = int(SCREEN_HEIGHT * scale)
         x_offset = (display_width - scaled_width) // 2
         y_offset = (display_height - scaled_height) // 2
         
-        # Update global transformation variables
-        global global_scale, global_x_offset, global_y_offset
-        global_scale = scale
-        global_x_offset = x_offset
-        global_y_offset = y_offset
+        # Map the cursor into game coordinates once for this frame
+        mouse.set_viewport(scale, x_offset, y_offset)
+        mouse.update()
         
         for event in pygame.event.get():
-            # Transform mouse event positions to game surface coordinates
-            if event.type in (pygame.MOUSEMOTION, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP):
-                # Adjust event.pos if present
-                if hasattr(event, 'pos'):
-                    mx, my = event.pos
-                    # Convert to game surface coordinates
-                    mx = int((mx - x_offset) / scale)
-                    my = int((my - y_offset) / scale)
-                    # Clamp to surface bounds
-                    mx = max(0, min(SCREEN_WIDTH-1, mx))
-                    my = max(0, min(SCREEN_HEIGHT-1, my))
-                    # Replace event with new pos
-                    event = pygame.event.Event(event.type, {**event.dict, 'pos': (mx, my)})
+            # Mouse event positions are converted to game surface coordinates in place
+            mouse.map_event(event)
             if event.type == pygame.QUIT:
                 running = False
             # Danger sound chaining for every 5th wave
             if event.type == pygame.USEREVENT + 50:
                 try:
                     from entities.monster import MonsterManager
-                    if hasattr(MonsterManager, 'danger_sound') and getattr(MonsterManager, '_danger_sounds_left', 0) > 0:
-                        MonsterManager.danger_sound.play()
+                    if getattr(MonsterManager, '_danger_sounds_left', 0) > 0:
+                        danger_sound = audio.play_sound('UI', 'danger.wav')
                         MonsterManager._danger_sounds_left -= 1
-                        if MonsterManager._danger_sounds_left > 0:
-                            pygame.time.set_timer(pygame.USEREVENT + 50, int(MonsterManager.danger_sound.get_length() * 1000), loops=1)
+                        if danger_sound and MonsterManager._danger_sounds_left > 0:
+                            pygame.time.set_timer(pygame.USEREVENT + 50, int(danger_sound.get_length() * 1000), loops=1)
                 except Exception as e:
                     print(f"Error playing chained danger sound: {e}")
-            game.handle_event(event)
-        game.update()
+            if replay:
+                # The replay drives the game; live input only moves the camera
+                game.handle_camera_event(event)
+            else:
+                game.handle_event(event)
+        if args.auto_start and not game.wave_manager.wave_in_progress:
+            game.start_wave()
+        game.update(fixed_dt if fixed_dt is not None else dt)
+        if tick_times is not None:
+            tick_times.append(game.tick_ms)
+            draw_times.append(game.draw_ms)
         game_surface.fill((0, 0, 0))  # Clear the game surface every frame
         game.draw()
-        # Draw the custom cursor last so it appears above everything
-        # Use the original mouse position for drawing the cursor in screen space
-        mouse_x, mouse_y = original_get_pos()
-        # Scale the game surface
-        scaled_surface = pygame.transform.smoothscale(game_surface, (scaled_width, scaled_height))
+        # Scale the game surface (nearest-neighbour when the quality governor asks for it)
+        if game.quality.settings['smooth_scaling']:
+            scaled_surface = pygame.transform.smoothscale(game_surface, (scaled_width, scaled_height))
+        else:
+            scaled_surface = pygame.transform.scale(game_surface, (scaled_width, scaled_height))
         window.fill((0, 0, 0))  # Letterbox
         window.blit(scaled_surface, (x_offset, y_offset))
-        # Adjust mouse position to game surface coordinates for cursor
-        game_mouse_x = int((mouse_x - x_offset) / scale)
-        game_mouse_y = int((mouse_y - y_offset) / scale)
-        # Only draw cursor if inside the scaled area
-        if 0 <= game_mouse_x < SCREEN_WIDTH and 0 <= game_mouse_y < SCREEN_HEIGHT:
-            # Draw cursor in screen space (not game space)
-            cursor_rect = cursor_img.get_rect(center=(mouse_x - cursor_offset[0], mouse_y - cursor_offset[1]))
-            window.blit(cursor_img, cursor_rect)
+        # Software cursor last so it appears above everything, in screen space
+        if software_cursor:
+            mouse_x, mouse_y = mouse.screen_pos
+            # Only draw cursor if inside the scaled area
+            if (x_offset <= mouse_x < x_offset + scaled_width
+                    and y_offset <= mouse_y < y_offset + scaled_height):
+                # Draw cursor in screen space (not game space), tip on the mouse position
+                window.blit(cursor_img, (mouse_x - CURSOR_HOTSPOT[0], mouse_y - CURSOR_HOTSPOT[1]))
         
         # Add ESC key to quit for convenience
         keys = pygame.key.get_pressed()
         if keys[pygame.K_ESCAPE]:
             running = False
         pygame.display.flip()
-        clock.tick(60)
+        if frames == 0:
+            # The window has something in it: now open the audio device
+            profile.first_frame()
+            audio.init()
+            profile.mark('audio')
+            if args.profile_startup:
+                print(profile.report())
+        dt = pacer.tick()
+
+        # Auto-quit for scripted runs
+        frames += 1
+        in_progress = game.wave_manager.wave_in_progress
+        if was_in_progress and not in_progress:
+            waves_ended += 1
+        was_in_progress = in_progress
+        if args.frames is not None and frames >= args.frames:
+            running = False
+        if args.waves is not None and waves_ended >= args.waves:
+            running = False
+        if (args.frames is not None or args.waves is not None) and game.state in ('gameover', 'completed'):
+            running = False
+    game.close()
+    report = pacer.report()
+    print(f"Frame pacing ({report['mode']}): {report['fps']} fps, "
+          f"p95 frame {report['frame_ms_p95']} ms, p99 jitter {report['jitter_ms_p99']} ms, "
+          f"missed deadlines {report['missed_deadlines']} "
+          f"({report['missed_pacing']} pacing, {report['missed_work']} work)")
+    if args.timing_json:
+        summary = timing_summary(args, pacer, game, time.perf_counter() - start_time,
+                                 waves_ended, tick_times, draw_times)
+        if args.timing_json == '-':
+            print(json.dumps(summary, indent=2))
+        else:
+            with open(args.timing_json, 'w') as f:
+                json.dump(summary, f, indent=2)
     pygame.quit()
 
 if __name__ == "__main__":
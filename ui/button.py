@@ -13,14 +13,15 @@ class Button:
         self.font = font
         self.hovered = False
         self.pressed = False  # New: pressed state
+        self.rect = pygame.Rect(x - size, y - size, size * 2, size * 2)
     
-    def draw(self, screen):
-        # Update hover state
-        mouse_pos = pygame.mouse.get_pos()
-        dx = mouse_pos[0] - self.x
-        dy = mouse_pos[1] - self.y
-        self.hovered = dx*dx + dy*dy <= self.size*self.size
+    def contains(self, pos):
+        dx = pos[0] - self.x
+        dy = pos[1] - self.y
+        return dx*dx + dy*dy <= self.size*self.size
 
+    def draw(self, screen):
+        # hovered is kept up to date by the HUD's hit grid on mouse motion
         # Pressed visual: offset and darken
         draw_x = self.x
         draw_y = self.y
@@ -1,5 +1,5 @@
-import pygame
 import os
+from core.assets import load_image
 
 class CoinAnimation:
     def __init__(self, size=32, frame_duration=0.13):
@@ -10,9 +10,7 @@ class CoinAnimation:
         self.time_accum = 0
         # Load all 8 coin frames
         for i in range(1, 9):
-            img = pygame.image.load(os.path.join('assets', 'ui', f'coin{i}.png')).convert_alpha()
-            img = pygame.transform.smoothscale(img, (self.size, self.size))
-            self.frames.append(img)
+            self.frames.append(load_image(os.path.join('assets', 'ui', f'coin{i}.png'), (self.size, self.size)))
 
     def update(self, dt):
         self.time_accum += dt
@@ -0,0 +1,28 @@
+HIT_GRID_CELL = 64  # Pixels per grid cell
+
+
+class HitGrid:
+    """Spatial index for clickable widgets.
+
+    The screen is split into coarse cells and every widget is listed in each
+    cell its bounding rect touches, so a lookup only tests the one or two
+    widgets in the cell under the mouse instead of every widget on screen.
+    """
+    def __init__(self, cell_size=HIT_GRID_CELL):
+        self.cell_size = cell_size
+        self.cells = {}
+
+    def add(self, target, rect, contains=None):
+        """Register target under rect. contains(pos) refines round widgets."""
+        entry = (target, rect, contains)
+        for cx in range(rect.left // self.cell_size, (rect.right - 1) // self.cell_size + 1):
+            for cy in range(rect.top // self.cell_size, (rect.bottom - 1) // self.cell_size + 1):
+                self.cells.setdefault((cx, cy), []).append(entry)
+
+    def at(self, pos):
+        """Return the widget under pos, or None."""
+        cell = (int(pos[0]) // self.cell_size, int(pos[1]) // self.cell_size)
+        for target, rect, contains in self.cells.get(cell, ()):
+            if rect.collidepoint(pos) and (contains is None or contains(pos)):
+                return target
+        return None
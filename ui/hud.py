@@ -1,15 +1,17 @@
 import pygame
 from core.config import *
 from core.font_manager import get_font
+from core.assets import load_image
+from core import audio
 from .button import Button
 from .image_button import ImageButton
 from .wave_select_menu import WaveSelectMenu
 from .coin_anim import CoinAnimation
+from .hit_grid import HitGrid
+from core.input import mouse
 
 class HUD:
     """Heads-up display for coins, HP, wave, and controls."""
-    button_click_sound = None
-    towerselection_click_sound = None
     def __init__(self, game):
         self.game = game
         self.font = get_font(28)
@@ -17,19 +19,7 @@ class HUD:
         
         # Create buttons
         button_y = SCREEN_HEIGHT - BUTTON_MARGIN - BUTTON_SIZE
-        # Load button click sound if not already loaded
         import os
-        if HUD.button_click_sound is None:
-            try:
-                HUD.button_click_sound = pygame.mixer.Sound(os.path.join('assets', 'sounds', 'UI', 'button_click.wav'))
-            except Exception as e:
-                print(f"Failed to load button_click sound: {e}")
-        # Load towerselection click sound if not already loaded
-        if HUD.towerselection_click_sound is None:
-            try:
-                HUD.towerselection_click_sound = pygame.mixer.Sound(os.path.join('assets', 'sounds', 'UI', 'towerselection_click.wav'))
-            except Exception as e:
-                print(f"Failed to load towerselection_click sound: {e}")
         # Use image-based buttons for start wave and tower menu
         self.start_wave_button = ImageButton(
             SCREEN_WIDTH - BUTTON_MARGIN - BUTTON_SIZE,
@@ -93,17 +83,45 @@ class HUD:
         self.wave_select_menu.menu_rect.x = SCREEN_WIDTH - BUTTON_MARGIN - BUTTON_SIZE * 5 - self.wave_select_menu.menu_width
         self.wave_select_menu.menu_rect.y = SCREEN_HEIGHT - BUTTON_MARGIN - BUTTON_SIZE - self.wave_select_menu.menu_height - 10
 
+        # HUD buttons never move, so they are indexed once for hit testing
+        self.widgets = HitGrid()
+        for btn in [self.start_wave_button, self.tower_menu_button, self.gold_button, self.wave_select_button, self.options_button]:
+            self.widgets.add(btn, btn.rect, btn.contains)
+        self.hovered_button = None
+
+        # Tower menu layout is fixed too: build its rects once, not every frame
+        menu_width = 250
+        menu_height = 240
+        menu_x = SCREEN_WIDTH - menu_width - BUTTON_MARGIN
+        menu_y = SCREEN_HEIGHT - menu_height - BUTTON_SIZE - BUTTON_MARGIN - BUTTON_SPACING
+        self.tower_menu_rect = pygame.Rect(menu_x, menu_y, menu_width, menu_height)
+        self.tower_buttons = []
+        self.tower_menu_grid = HitGrid()
+        for i, tower_type in enumerate(['cannon', 'water', 'fire']):
+            button_rect = pygame.Rect(menu_x + 10, menu_y + 10 + i * 70, menu_width - 20, 60)
+            self.tower_buttons.append((button_rect, tower_type))
+            self.tower_menu_grid.add(tower_type, button_rect)
+
         # Coin animation for HUD
         self.coin_anim = CoinAnimation(size=32)
         # Load wavehead image for HUD
-        self.wavehead_img = pygame.image.load(os.path.join('assets', 'ui', 'wavehead.png')).convert_alpha()
-        self.wavehead_img = pygame.transform.smoothscale(self.wavehead_img, (60, 60))
+        self.wavehead_img = load_image(os.path.join('assets', 'ui', 'wavehead.png'), (60, 60))
         # Track last time for coin animation
         self.last_anim_time = pygame.time.get_ticks() / 1000.0
 
+    def update_hover(self, mouse_pos):
+        """Move the hover highlight to the button under the mouse (if any)."""
+        hit = self.widgets.at(mouse_pos)
+        if hit is not self.hovered_button:
+            if self.hovered_button is not None:
+                self.hovered_button.hovered = False
+            if hit is not None:
+                hit.hovered = True
+            self.hovered_button = hit
+
     def handle_event(self, event):
         if event.type == pygame.MOUSEMOTION:
-            mouse_pos = event.pos if hasattr(event, 'pos') else pygame.mouse.get_pos()
+            mouse_pos = event.pos
             # If options menu is open, only track hover for menu buttons
             if self.options_menu_open:
                 if self.quit_button_rect and self.quit_button_rect.collidepoint(mouse_pos):
@@ -115,24 +133,20 @@ class HUD:
                 else:
                     self.restart_hovered = False
                 return
-            for btn in [self.start_wave_button, self.tower_menu_button, self.gold_button, self.wave_select_button, self.options_button]:
-                dx = mouse_pos[0] - btn.x
-                dy = mouse_pos[1] - btn.y
-                btn.hovered = dx*dx + dy*dy <= btn.size*btn.size
+            self.update_hover(mouse_pos)
 
         if event.type == pygame.MOUSEBUTTONDOWN:
-            mouse_pos = pygame.mouse.get_pos()
+            mouse_pos = mouse.pos
+            self.update_hover(mouse_pos)
             # Only visually press the button that is hovered
             if self.start_wave_button.hovered:
                 self.start_wave_button.pressed = True
-                if HUD.button_click_sound:
-                    HUD.button_click_sound.play()
+                audio.play_sound('UI', 'button_click.wav')
             if self.tower_menu_button.hovered:
                 self.tower_menu_button.pressed = True
-                if HUD.button_click_sound:
-                    HUD.button_click_sound.play()
+                audio.play_sound('UI', 'button_click.wav')
             if self.options_menu_open:
-                mouse_pos = pygame.mouse.get_pos()
+                mouse_pos = mouse.pos
                 # Only handle clicks for menu buttons
                 if self.quit_button_rect and self.quit_button_rect.collidepoint(mouse_pos):
                     import sys
@@ -140,7 +154,7 @@ class HUD:
                     sys.exit()
                 elif self.restart_button_rect and self.restart_button_rect.collidepoint(mouse_pos):
                     self.options_menu_open = False
-                    self.game.restart_game()
+                    self.game.restart()
                 return
             if self.gold_button.hovered:
                 self.gold_button.pressed = True
@@ -151,7 +165,7 @@ class HUD:
 
                 # Dev: Check gold button (for dev only)
                 if self.gold_button.hovered:
-                    self.game.economy.coins += 1000
+                    self.game.add_gold(1000)
 
             # Dev: Check wave select button
             if self.wave_select_button.hovered:
@@ -163,9 +177,7 @@ class HUD:
 
             # Check start wave button
             if self.start_wave_button.hovered:
-                if not self.game.wave_manager.wave_in_progress:
-                    self.game.wave_manager.start_wave()
-                    self.game.state = 'playing'
+                self.game.start_wave()
             
             # Check tower menu button
             if self.tower_menu_button.hovered:
@@ -180,38 +192,27 @@ class HUD:
 
         # Play button click for restart button (if present in HUD)
         if hasattr(self, 'restart_button') and event.type == pygame.MOUSEBUTTONDOWN:
-            if self.restart_button.hovered and HUD.button_click_sound:
-                HUD.button_click_sound.play()
+            if self.restart_button.hovered:
+                audio.play_sound('UI', 'button_click.wav')
 
         # Handle wave select menu
         selected_wave = self.wave_select_menu.handle_event(event)
         if selected_wave is not None:
             # Start selected wave (for dev)
-            self.game.wave_manager.wave_number = selected_wave - 1
-            self.game.wave_manager.start_wave()
-            self.game.state = 'playing'
+            self.game.jump_to_wave(selected_wave)
 
         # --- Tower selection menu: close on right click if nothing is selected ---
         if self.tower_menu_open and event.type == pygame.MOUSEBUTTONDOWN:
-            mouse_pos = pygame.mouse.get_pos()
+            mouse_pos = mouse.pos
             # Only close menu if click is outside the menu and button, and no tower is selected
-            menu_width = 250
-            menu_height = 240
-            menu_x = SCREEN_WIDTH - menu_width - BUTTON_MARGIN
-            menu_y = SCREEN_HEIGHT - menu_height - BUTTON_SIZE - BUTTON_MARGIN - BUTTON_SPACING
-            menu_rect = pygame.Rect(menu_x, menu_y, menu_width, menu_height)
             if (event.button in (1, 3)
                 and self.game.tower_manager.selected_tower is None
-                and not menu_rect.collidepoint(mouse_pos)
+                and not self.tower_menu_rect.collidepoint(mouse_pos)
                 and not self.tower_menu_button.hovered):
                 self.tower_menu_open = False
                 return
-            if hasattr(self, 'tower_buttons'):
-                for button_rect, tower_type in self.tower_buttons:
-                    if button_rect.collidepoint(mouse_pos):
-                        if HUD.towerselection_click_sound:
-                            HUD.towerselection_click_sound.play()
-                        break
+            if self.tower_menu_grid.at(mouse_pos) is not None:
+                audio.play_sound('UI', 'towerselection_click.wav')
 
     def draw_cog_icon(self, screen, x, y, size):
         # Draw a simple cog icon using pygame drawing primitives
@@ -331,30 +332,18 @@ class HUD:
         
         # Draw tower menu if open
         if self.tower_menu_open:
-            menu_width = 250
-            menu_height = 240
-            menu_x = SCREEN_WIDTH - menu_width - BUTTON_MARGIN
-            menu_y = SCREEN_HEIGHT - menu_height - BUTTON_SIZE - BUTTON_MARGIN - BUTTON_SPACING
-            
             # Draw menu background
-            pygame.draw.rect(screen, COLORS['button'],
-                           (menu_x, menu_y, menu_width, menu_height))
-            pygame.draw.rect(screen, COLORS['text'],
-                           (menu_x, menu_y, menu_width, menu_height), 2)
+            pygame.draw.rect(screen, COLORS['button'], self.tower_menu_rect)
+            pygame.draw.rect(screen, COLORS['text'], self.tower_menu_rect, 2)
             
             # Draw tower options
-            self.tower_buttons = []  # Reset tower buttons
-            for i, tower_type in enumerate(['cannon', 'water', 'fire']):
+            for button_rect, tower_type in self.tower_buttons:
                 cost = TOWER_COSTS[tower_type]
                 can_afford = self.game.economy.coins >= cost
                 stats = TOWER_STATS[tower_type]
                 # Fire tower locked until wave 10
                 locked = (tower_type == 'fire' and self.game.wave_manager.wave_number < 10)
                 
-                # Calculate button rectangle (taller to fit all info)
-                button_rect = pygame.Rect(menu_x + 10, menu_y + 10 + i * 70, menu_width - 20, 60)
-                self.tower_buttons.append((button_rect, tower_type))
-                
                 # Draw button background
                 if tower_type == 'fire' and self.game.wave_manager.wave_number < 10:
                     button_color = (120, 120, 120)  # Grayed out
@@ -415,14 +404,14 @@ class HUD:
         """Check if a tower option was clicked in the menu. Plays sound if selection is valid."""
         if not self.tower_menu_open:
             return None
-        for rect, tower_type in self.tower_buttons:
-            if rect.collidepoint(mouse_pos):
-                # Prevent fire tower selection if locked
-                if tower_type == 'fire' and self.game.wave_manager.wave_number < 10:
-                    return None
-                if self.game.economy.coins >= TOWER_COSTS[tower_type]:
-                    # Play tower selection sound only on valid selection
-                    if HUD.towerselection_click_sound:
-                        HUD.towerselection_click_sound.play()
-                    return tower_type
+        tower_type = self.tower_menu_grid.at(mouse_pos)
+        if tower_type is None:
+            return None
+        # Prevent fire tower selection if locked
+        if tower_type == 'fire' and self.game.wave_manager.wave_number < 10:
+            return None
+        if self.game.economy.coins >= TOWER_COSTS[tower_type]:
+            # Play tower selection sound only on valid selection
+            audio.play_sound('UI', 'towerselection_click.wav')
+            return tower_type
         return None
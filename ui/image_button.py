@@ -1,4 +1,5 @@
 import pygame
+from core.assets import load_image
 
 class ImageButton:
     """A circular button that displays an image, with hover/pressed effects."""
@@ -6,21 +7,22 @@ class ImageButton:
         self.x = x
         self.y = y
         self.size = size
-        self.image = pygame.image.load(image_path).convert_alpha()
-        self.image = pygame.transform.smoothscale(self.image, (size*2, size*2))
+        self.image = load_image(image_path, (size*2, size*2))
         self.hover_image = None
         if hover_image_path:
-            self.hover_image = pygame.image.load(hover_image_path).convert_alpha()
-            self.hover_image = pygame.transform.smoothscale(self.hover_image, (size*2, size*2))
+            self.hover_image = load_image(hover_image_path, (size*2, size*2))
         self.hovered = False
         self.pressed = False
         self.pressed_offset = pressed_offset
+        self.rect = pygame.Rect(x - size, y - size, size * 2, size * 2)
+
+    def contains(self, pos):
+        dx = pos[0] - self.x
+        dy = pos[1] - self.y
+        return dx*dx + dy*dy <= self.size*self.size
 
     def draw(self, screen):
-        mouse_pos = pygame.mouse.get_pos()
-        dx = mouse_pos[0] - self.x
-        dy = mouse_pos[1] - self.y
-        self.hovered = dx*dx + dy*dy <= self.size*self.size
+        # hovered is kept up to date by the HUD's hit grid on mouse motion
         draw_x = self.x
         draw_y = self.y
         if self.pressed:
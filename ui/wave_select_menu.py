@@ -1,6 +1,7 @@
 import pygame
 from core.config import SCREEN_WIDTH, SCREEN_HEIGHT, COLORS
 from core.font_manager import get_font
+from core.input import mouse
 
 class WaveSelectMenu:
     def __init__(self, font, total_waves=21):
@@ -34,7 +35,7 @@ class WaveSelectMenu:
             self.just_opened = False
             return None
         if event.type == pygame.MOUSEBUTTONDOWN:
-            mouse_pos = pygame.mouse.get_pos()
+            mouse_pos = mouse.pos
             for idx, rect in enumerate(self.button_rects):
                 if rect.collidepoint(mouse_pos):
                     self.selected_wave = idx + 1